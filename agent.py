@@ -2,14 +2,18 @@
 Modified from: https://github.com/patrickloeber/snake-ai-pytorch/
 '''
 
+import os
 import torch
 import random
 import numpy as np
 
 from torch.utils.data import Dataset, DataLoader
-from wordle import Wordle, get_state_from_board
+import wordle_patterns as wp
+from wordle import Wordle
+from wordle_state import STATE_SIZE, encode_board
+from wordle_buffer import ReplayBuffer
+from wordle_masks import ActionMasks, prior_tensor
 from wordle_ai import WordleAI, ALLOWED_WORDS
-from collections import deque
 from model import Linear_QNet, QTrainer
 from helper import plot
 
@@ -17,56 +21,61 @@ MAX_MEMORY = 200_000
 BATCH_SIZE = 14855
 LR = 0.01
 
+
+def last_pattern(game: Wordle) -> int:
+    return wp.pattern_to_index(game.get_board().get_last_guess().get_score_pattern())
+
+
 class Agent:
 
     def __init__(self, device: torch.device | None = None):
         self.n_games = 0
         self.epsilon = 0 # randomness
         self.gamma = 0.9 # discount rate
-        self.memory = deque(maxlen=MAX_MEMORY) # popleft()
-        self.model = Linear_QNet(61, [780, 26], 14855, device)
+        self.memory = ReplayBuffer(MAX_MEMORY, STATE_SIZE, num_actions=14855) # overwrites the oldest when full
+        self.rng = np.random.default_rng()
+        self.model = Linear_QNet(STATE_SIZE, [780, 26], 14855, device)
+        self.masks = ActionMasks(1, device) # valid actions of the current game
         self.trainer = QTrainer(self.model, lr=LR, gamma=self.gamma)
 
     def get_state(self, game: Wordle):
-        state = get_state_from_board(game.get_board())
-        return np.array(state, dtype=int)
+        return encode_board(game.get_board())
 
     def remember(self, state, action, reward, next_state, done):
-        self.memory.append((state, action, reward, next_state, done)) # popleft if MAX_MEMORY is reached
+        # next state's valid actions, the masks are already pruned by observe
+        self.memory.append(state, action, reward, next_state, done, self.masks.get_valid()[0])
 
     def train_long_memory(self):
         if len(self.memory) > BATCH_SIZE:
-            mini_sample = random.sample(self.memory, BATCH_SIZE) # list of tuples
+            batch = self.memory.sample(BATCH_SIZE, self.rng)
         else:
-            mini_sample = self.memory
+            batch = self.memory.gather(np.arange(len(self.memory)))
 
-        states, actions, rewards, next_states, dones = zip(*mini_sample)
-        self.trainer.train_step(states, actions, rewards, next_states, dones)
+        self.trainer.train_step(batch['states'], batch['actions'], batch['rewards'], batch['next_states'], batch['dones'],
+                                batch['next_valid'])
         # for state, action, reward, nexrt_state, done in mini_sample:
         #     self.trainer.train_step(state, action, reward, next_state, done)
 
+    def observe(self, action, game: Wordle):
+        # narrow the valid actions to the words that fit the feedback of action
+        self.masks.prune(np.array([0]), np.array([action]), np.array([last_pattern(game)]))
+
     def train_short_memory(self, state, action, reward, next_state, done):
-        self.trainer.train_step(state, action, reward, next_state, done)
+        self.trainer.train_step(state, action, reward, next_state, done, self.masks.get_valid()[0])
 
-    def get_action(self, state, game_helper: WordleAI):
+    def get_action(self, state):
         # random moves: tradeoff exploration / exploitation
         x = 14855
         self.epsilon = x - self.n_games
         final_move = 0
         if random.randint(0, int(x * 2.5)) < self.epsilon:
-            final_move = np.random.choice(game_helper.get_valid_actions())
+            final_move = int(self.masks.sample(self.rng)[0])
         else:
             state0 = torch.tensor(state, dtype=torch.float, device=self.model.device)
-            prediction = self.model(state0)
-            valid_mask = game_helper.get_valid_action_mask(self.model.device)
-            prob_mask = game_helper.get_prob_action_mask(self.model.device)
-            masked_prediction = (prediction * prob_mask) + valid_mask
-            # for i, val in enumerate(masked_prediction):
-            #     if val < -100:
-            #         continue
-            #     print(f'{i}: {val}', end=', ')
-            final_move = torch.argmax(masked_prediction).item()
-            # print(f'\n{masked_prediction[final_move]}')
+            with torch.no_grad():
+                prediction = self.model(state0)
+            # prediction * letter probability prior, best valid action
+            final_move = int(self.masks.select(prediction[None])[0])
         return final_move
 
 
@@ -86,13 +95,14 @@ def train(device: torch.device | None = None):
             state_old = agent.get_state(game_helper.get_game())
 
             # get move
-            final_move = agent.get_action(state_old, game_helper)
+            final_move = agent.get_action(state_old)
             # print(game_helper._WordleAI__available_words)
             # print(final_move)
             # input()
 
             # perform move and get new state
             reward, done = game_helper.play_step(final_move)
+            agent.observe(final_move, game_helper.get_game())
             state_new = agent.get_state(game_helper.get_game())
 
             # train short memory
@@ -134,45 +144,43 @@ def train(device: torch.device | None = None):
                 plot_mean_scores.append(mean_score)
                 plot(plot_scores, plot_mean_scores, plot_win_rates)
                 game_helper.reset()
+                agent.masks.reset()
     except (KeyboardInterrupt, Exception) as e:
         agent.model.save()
         print(game_helper._WordleAI__available_words)
-        print(game_helper.get_valid_actions())
+        valid_actions = np.flatnonzero(agent.masks.get_valid()[0])
+        print(valid_actions)
         print(game_helper._WordleAI__hints_dict)
         state0 = torch.tensor(state_old, dtype=torch.float, device=agent.model.device)
-        prediction = agent.model(state0)
-        valid_mask = game_helper.get_valid_action_mask(agent.model.device)
-        prob_mask = game_helper.get_prob_action_mask(agent.model.device)
-        masked_prediction = (prediction * prob_mask) + valid_mask
-        for i, val in enumerate(masked_prediction):
-            if val < -100:
-                continue
-            print(f'{i}: {val}', end=', ')
+        with torch.no_grad():
+            weighted_prediction = agent.model(state0) * prior_tensor(agent.model.device)
+        for i in valid_actions:
+            print(f'{i}: {weighted_prediction[i]}', end=', ')
         raise e
 
 
 def play(device: torch.device | None = None):
-    model = Linear_QNet(61, [780, 26], 14855, device=device)
+    model = Linear_QNet(STATE_SIZE, [780, 26], 14855, device=device)
     model.load('./model/model_98.pth')
     game_helper = WordleAI(Wordle())
+    masks = ActionMasks(1, device)
 
     while not game_helper.get_game().is_game_over():
-        state = get_state_from_board(game_helper.get_game().get_board())
+        state = encode_board(game_helper.get_game().get_board())
         state0 = torch.tensor(state, dtype=torch.float, device=model.device)
-        prediction = model(state0)
-        valid_mask = game_helper.get_valid_action_mask(model.device)
-        prob_mask = game_helper.get_prob_action_mask(model.device)
-        masked_prediction: list[torch.Tensor]
-        masked_prediction = (prediction * prob_mask) + valid_mask
-        final_moves = torch.topk(masked_prediction, 5)
-        print(f'Suggested moves: {[(ALLOWED_WORDS[i], round(float(masked_prediction[i]), 4)) for i in final_moves.indices if i in game_helper.get_valid_actions()]}')
+        with torch.no_grad():
+            prediction = model(state0)
+        masked_prediction = (prediction * prior_tensor(model.device)).masked_fill(~masks.get_tensor()[0], float('-inf'))
+        final_moves = torch.topk(masked_prediction, min(5, int(masks.get_valid()[0].sum())))
+        print(f'Suggested moves: {[(ALLOWED_WORDS[i], round(float(masked_prediction[i]), 4)) for i in final_moves.indices]}')
         print(game_helper.get_game())
-        guess = input('Enter guess: ')
-        game_helper.play_step(ALLOWED_WORDS.index(guess))
+        guess = ALLOWED_WORDS.index(input('Enter guess: '))
+        game_helper.play_step(guess)
+        masks.prune(np.array([0]), np.array([guess]), np.array([last_pattern(game_helper.get_game())]))
 
 
 if __name__ == '__main__':
-    torch.set_num_threads(40)
+    torch.set_num_threads(os.cpu_count() or 1)
     if not torch.backends.mps.is_available():
         if not torch.backends.mps.is_built():
             print('MPS not available because the current PyTorch install was not '
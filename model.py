@@ -8,6 +8,7 @@ import torch.nn as nn
 import torch.optim as optim
 import torch.nn.functional as F
 import os
+import copy
 import numpy as np
 
 class Linear_QNet(nn.Module):
@@ -52,19 +53,37 @@ class Linear_QNet(nn.Module):
 
 
 class QTrainer:
-    def __init__(self, model: Linear_QNet, lr, gamma):
+    def __init__(self, model: Linear_QNet, lr, gamma, target_update: int = 0, mixed_precision: bool = False):
         self.lr = lr
         self.gamma = gamma
         self.model = model
         self.optimizer = optim.Adam(model.parameters(), lr=self.lr)
-        self.criterion = nn.MSELoss()
-
-    def train_step(self, state, action, reward, next_state, done):
-        # print('shape:', state.shape, next_state.shape, action, reward, done)
-        state = torch.tensor(np.array(state), dtype=torch.float, device=self.model.device)
-        next_state = torch.tensor(np.array(next_state), dtype=torch.float, device=self.model.device)
-        action = torch.tensor(action, dtype=torch.int, device=self.model.device)
-        reward = torch.tensor(reward, dtype=torch.float, device=self.model.device)
+        # Frozen copy the Q targets come from, synced every target_update steps, 0 uses the model itself
+        self.target_update = target_update
+        self.target_model = None
+        if target_update > 0:
+            self.target_model = copy.deepcopy(model)
+            self.target_model.requires_grad_(False)
+        # bfloat16 autocast of the forward passes, only on CPU
+        self.mixed_precision = mixed_precision and (model.device is None or torch.device(model.device).type == 'cpu')
+        self.steps = 0
+
+    def sync_target(self):
+        if self.target_model is not None:
+            self.target_model.load_state_dict(self.model.state_dict())
+
+    def train_step(self, state, action, reward, next_state, done, next_valid=None, weights=None):
+        """
+        One update on a batch (or a single transition). next_valid is an optional (n, actions)
+        bool mask the next state's max is taken over, weights optional per transition
+        loss weights such as prioritized replay importance weights. Returns the TD errors.
+        """
+        device = self.model.device
+        state = torch.as_tensor(np.asarray(state), dtype=torch.float, device=device)
+        next_state = torch.as_tensor(np.asarray(next_state), dtype=torch.float, device=device)
+        action = torch.as_tensor(np.asarray(action), dtype=torch.long, device=device)
+        reward = torch.as_tensor(np.asarray(reward), dtype=torch.float, device=device)
+        done = torch.as_tensor(np.asarray(done, dtype=bool), device=device)
         # (n, x)
 
         if len(state.shape) == 1:
@@ -73,26 +92,45 @@ class QTrainer:
             next_state = torch.unsqueeze(next_state, 0)
             action = torch.unsqueeze(action, 0)
             reward = torch.unsqueeze(reward, 0)
-            done = (done, )
+            done = torch.unsqueeze(done, 0)
+            if next_valid is not None:
+                next_valid = np.asarray(next_valid)[None]
 
         # 1: predicted Q values with current state
-        pred: torch.Tensor = self.model(state)
-
+        with torch.autocast('cpu', dtype=torch.bfloat16, enabled=self.mixed_precision):
+            pred: torch.Tensor = self.model(state)
+        pred = pred.float()
+        pred_action = pred.gather(1, action[:, None]).squeeze(1)
 
         # 2: Q_new = r + y * max(next_predicted Q value) -> only do this if not done
-        # pred.clone()
-        # preds[argmax(action)] = Q_new
-        target = pred.clone()
-        for idx in range(len(done)):
-            Q_new = reward[idx]
-            if not done[idx]:
-                Q_new = reward[idx] + self.gamma * torch.max(self.model(next_state[idx]))
-
-            target[idx][action[idx].item()] = Q_new
+        # one forward pass over every next state, max over valid actions only
+        with torch.no_grad():
+            target_model = self.target_model if self.target_model is not None else self.model
+            with torch.autocast('cpu', dtype=torch.bfloat16, enabled=self.mixed_precision):
+                next_pred = target_model(next_state)
+            next_pred = next_pred.float()
+            if next_valid is not None:
+                next_valid = torch.as_tensor(np.asarray(next_valid, dtype=bool), device=device)
+                next_pred = next_pred.masked_fill(~next_valid, float('-inf'))
+            next_max = next_pred.max(dim=1).values
+            next_max = torch.where(torch.isfinite(next_max), next_max, torch.zeros_like(next_max))
+            q_new = torch.where(done, reward, reward + self.gamma * next_max)
         # End 2
 
+        # Only the taken actions differ from pred in the target, so the MSE over the
+        # whole (n, actions) target reduces to the taken actions' squared errors
+        td_errors = q_new - pred_action
+        squared_errors = td_errors ** 2
+        if weights is not None:
+            squared_errors = squared_errors * torch.as_tensor(np.asarray(weights), dtype=torch.float, device=device)
+        loss = squared_errors.sum() / pred.numel()
+
         self.optimizer.zero_grad()
-        loss = self.criterion(target, pred)
         loss.backward()
 
         self.optimizer.step()
+
+        self.steps += 1
+        if self.target_update > 0 and self.steps % self.target_update == 0:
+            self.sync_target()
+        return td_errors.detach().cpu().numpy()
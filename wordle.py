@@ -6,6 +6,7 @@ Author: Kamron Cole kjc8084@rit.edu
 import numpy as np
 
 import wordle_utils as utils
+import wordle_words as words
 
 # Old Wordle Possible guesses including answers
 # ALLOWED_WORDS = None
@@ -17,9 +18,11 @@ import wordle_utils as utils
 # with open(utils.POSSIBLE_ANSWERS_PATH, 'r', encoding='utf-8') as file:
 #     ANSWERS = sorted([word.strip() for word in file.readlines()])
 
-# New York Times Wordle Words
-with open(utils.NEW_ALLOWED_GUESSES_PATH, 'r', encoding='utf-8') as file:
-    ALLOWED_WORDS = sorted([word.strip() for word in file.readlines()])
+# New York Times Wordle Words, ALLOWED_WORDS is loaded from the shared registry on first use
+def __getattr__(name: str):
+    if name == 'ALLOWED_WORDS':
+        return words.get_word_list().get_words()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
 
 # with open(utils.NEW_POSSIBLE_ANSWERS_PATH, 'r', encoding='utf-8') as file:
 #     ANSWERS = sorted([word.strip() for word in file.readlines()])
@@ -194,9 +197,20 @@ class Board:
         return [guess for guess in self.__board if isinstance(guess, Guess)][-1]
 
 
+LETTERS_NORM = {letter: (i + 1) / 27 for i, letter in enumerate('abcdefghijklmnopqrstuvwxyz')}
+LETTERS_NORM[''] = 0
+
+SCORES_NORM = {
+    utils.WRONG: 0.33,
+    utils.CORRECT_LETTER: 0.66,
+    utils.CORRECT_ALL: 1,
+}
+
+
 def get_state_from_board(board: Board) -> tuple:
     """
-    Get board state as a tuple of 61 integers with values 0 to 1
+    Get board state as a tuple of 61 floats with values 0 to 1,
+    see wordle_state for encoding batches of boards
     """
 
     board_state = [0] * 61
@@ -205,15 +219,6 @@ def get_state_from_board(board: Board) -> tuple:
 
     board_state[0] = guesses_left_norm
 
-    letters_norm_dict = {letter: (i + 1) / 27 for i, letter in enumerate('abcdefghijklmnopqrstuvwxyz')}
-    letters_norm_dict[''] = 0
-
-    score_trans_dict = {
-        0: 0.33,
-        10: 0.66,
-        20: 1,
-    }
-
     index = 1
     for guess in board.get_guesses():
         if isinstance(guess, str):
@@ -221,8 +226,8 @@ def get_state_from_board(board: Board) -> tuple:
 
         guess_feedback = guess.get_feedback()
         for letter, score in guess_feedback:
-            letter_index_norm = letters_norm_dict[letter]
-            letter_score_norm = score_trans_dict[score]
+            letter_index_norm = LETTERS_NORM[letter]
+            letter_score_norm = SCORES_NORM[score]
             board_state[index] = letter_index_norm
             board_state[index + 1] = letter_score_norm
             index += 2
@@ -269,8 +274,9 @@ class Wordle:
 
     def __init__(self, answer=None):
         self.__board = Board()
-        self.__allowed_words = ALLOWED_WORDS
-        self.__words = ALLOWED_WORDS
+        # WordList checks membership through its word -> index map
+        self.__allowed_words = words.get_word_list()
+        self.__words = self.__allowed_words.get_array()
         self.use_allowed_words = True
 
         self.__answer = np.random.choice(self.__words, 1)[0] if answer is None else answer
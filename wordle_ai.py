@@ -1,19 +1,20 @@
 # import wordle as w
-import wordle_utils as utils
+import wordle_words as words
 
 # import pickle
 # import torch
-import numpy as np
 # import json
 
-import aiomysql
 import asyncio
 
-# from copy import deepcopy
-from time import perf_counter
-from os import cpu_count
+import wordle_scheduler as scheduler
+
+try:
+    import aiomysql
+except ImportError:
+    aiomysql = None
 
-import concurrent.futures as concurr
+# from copy import deepcopy
 
 # Colours used in output
 # RED = '\033[1;31m'
@@ -67,14 +68,12 @@ DB_CONFIG = {
     'auth_plugin': 'mysql_native_password',
 }
 
-with open(utils.NEW_ALLOWED_GUESSES_PATH, 'r', encoding='utf-8') as file:
-    ALLOWED_WORDS = sorted([word.strip() for word in file.readlines()])
+ALLOWED_WORDS = words.get_word_list().get_words()
 
 # PATTERN_DTYPE = np.dtype([('pos0', 'i1'), ('pos1', 'i1'), ('pos2', 'i1'), ('pos3', 'i1'), ('pos4', 'i1')])
 ALL_POSSIBLE_PATTERNS = [(i, j, k, p, m) for i in range(0, 21, 10) for j in range(0, 21, 10) for k in range(0, 21, 10) for p in range(0, 21, 10) for m in range(0, 21, 10)]
 # ALL_POSSIBLE_PATTERNS_NPARRAY = np.array([(i, j, k, p, m) for i in range(0, 21, 10) for j in range(0, 21, 10) for k in range(0, 21, 10) for p in range(0, 21, 10) for m in range(0, 21, 10)], dtype=PATTERN_DTYPE)
 ALL_POSSIBLE_PATTERNS_PAT_TO_IDX = {pattern: i for i, pattern in enumerate(ALL_POSSIBLE_PATTERNS)}
-# PATTERNS = np.load('./assets/patterns.npy')
 
 # PATTERN_LOCATION_LEN_IDX = {
 #     47257244: [0], 14019939: [1], 10847464: [2], 14336735: [3], 4003247: [4],
@@ -387,93 +386,9 @@ async def clear_table(table_name: str):
 #         agent.play_step(action)
 
 
-async def just_data_yknow(first_guess_idx: int):
-    start = perf_counter()
-    async with aiomysql.connect(**DB_CONFIG) as db_conn:
-        db_conn: aiomysql.Connection
-        async with db_conn.cursor() as cursor:
-            cursor: aiomysql.Cursor
-            for first_pattern_idx in range(0, len(ALL_POSSIBLE_PATTERNS)):
-                await cursor.execute(f'SELECT col_idx FROM pattern_locations WHERE pattern_idx = {first_pattern_idx} AND row_idx = {first_guess_idx} AND col_idx != {first_guess_idx}')
-                first_words_remaining = [res[0] for res in (await cursor.fetchall())]
-                first_words_remaining_len = len(first_words_remaining)
-                if first_words_remaining_len == 0:
-                    continue
-                guess_pattern = ALL_POSSIBLE_PATTERNS[first_pattern_idx]
-                green_idxs = [i for i, score in enumerate(guess_pattern) if score == 20]
-                valid_patterns = [i for i, pattern in enumerate(ALL_POSSIBLE_PATTERNS) if all([pattern[idx] == guess_pattern[idx] for idx in green_idxs])]
-                if len(valid_patterns) == 0:
-                    continue
-                values = []
-                # i = 0
-                for second_guess_idx in first_words_remaining:
-                    await cursor.execute(f'SELECT * FROM second_guess_info WHERE first_guess_idx = {first_guess_idx} AND first_pattern_idx = {first_pattern_idx} AND second_guess_idx = {second_guess_idx}')
-                    if (await cursor.fetchone()) is not None:
-                        continue
-                    expected_info = 0
-                    for second_pattern_idx in valid_patterns:
-                        # i += 1
-                        # print(f'[{first_guess_idx}, {first_pattern_idx}, {second_guess_idx}]'.ljust(9), f'Processing ({i}/{first_words_remaining_len * len(valid_patterns)})', sep='', end='\r')
-                        await cursor.execute(f'SELECT COUNT(*) FROM pattern_locations pl1 JOIN pattern_locations pl2 ON pl1.col_idx = pl2.col_idx WHERE pl1.pattern_idx = {second_pattern_idx} AND pl1.row_idx = {second_guess_idx}  AND pl1.col_idx NOT IN ({first_guess_idx}, {second_guess_idx}) AND pl2.pattern_idx = {first_pattern_idx} AND pl2.row_idx = {first_guess_idx} AND pl2.col_idx != {first_guess_idx}')
-                        second_words_remaining_len = (await cursor.fetchone())[0]
-                        if second_words_remaining_len == 0:
-                            continue
-                        pattern_prob = second_words_remaining_len / first_words_remaining_len
-                        pattern_info = np.log2(1 / pattern_prob)
-                        expected_info += pattern_prob * pattern_info
-                    values.append(tuple([first_guess_idx, first_pattern_idx, second_guess_idx, expected_info]))
-                if not values:
-                    continue
-                with open(f'./assets/second_guess_info_{first_guess_idx}.txt', 'a', encoding='utf-8') as file:
-                    file.writelines(['"' + str(value)[1:-1].replace(' ', '').replace(',', '", "') + '"\n' for value in values])
-                    file.flush()
-                # await cursor.execute(f'INSERT INTO second_guess_info (first_guess_idx, first_pattern_idx, second_guess_idx, expected_info) VALUES {", ".join([str(value) for value in values])}')
-                # await db_conn.commit()
-                # print()
-    return perf_counter() - start
-
-
-async def main():
-    # await create_first_guess_words_remaining_table()
-    # await clear_table('first_guess_words_remaining')
-    await clear_table('guess_info')
-    # game = w.Wordle()
-    # agent = WordleAI(game)
-    first_guess_idxs = []
-    async with aiomysql.connect(**DB_CONFIG) as db_conn:
-        db_conn: aiomysql.Connection
-        async with db_conn.cursor() as cursor:
-            cursor: aiomysql.Cursor
-            await cursor.execute('SELECT first_guess_idx FROM second_guess_info GROUP BY first_guess_idx HAVING COUNT(first_pattern_idx) != 14854')
-            first_guess_idxs = [res[0] for res in (await cursor.fetchall())]
-
-    print(f'Starting at {first_guess_idxs[0]} (1/{len(first_guess_idxs)})...')
-    times = []
-    with concurr.ProcessPoolExecutor(max_workers=cpu_count(), max_tasks_per_child=1) as executor:
-        tasks = {executor.submit(run_async_in_process, just_data_yknow, first_guess_idx): first_guess_idx for first_guess_idx in first_guess_idxs}
-        for task in concurr.as_completed(tasks):
-            time = task.result()
-            times.append(time)
-            total_seconds = sum(times)
-            mean_seconds = total_seconds // len(times)
-            min_time = min(times)
-            max_time = max(times)
-            eta = (mean_seconds * (len(first_guess_idxs) - len(times))) // cpu_count()
-            print(
-                f' ({len(times)}/{len(first_guess_idxs)}) Min: {int(min_time // 60)}m {round(min_time % 60)}s',
-                f'Max: {int(max_time // 60)}m {round(max_time % 60)}s',
-                f'Mean: {int(mean_seconds // 60)}m {round(mean_seconds % 60)}s',
-                f'Total: {int(total_seconds // 60)}m {round(total_seconds % 60)}s',
-                f'ETA: {int(eta // 60)}m {round(eta % 60)}s {" " * 25}',
-                sep=' - ',
-                end='\r',
-                flush=True
-            )
-
-
-
-    exit()
+def main():
+    scheduler.precompute_second_guess_info()
 
 
 if __name__ == '__main__':
-    asyncio.run(main())
+    main()
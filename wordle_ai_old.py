@@ -12,13 +12,20 @@ import alive_progress as ap
 import wordle as w
 import wordle_utils as wu
 import wordle_ai_utils as utils
+import wordle_filter as wf
+import wordle_words as words
+
+# Letter probability weight of every word in ALLOWED_WORDS order
+WORDS = utils.WORDS
+WEIGHTS = utils.WEIGHTS.astype(np.float64)
+WORD_INDEX = words.get_word_list().get_index()
 
 
 class WordleAI:
     """
     Rudimentary AI to solve wordle puzzle, either from web GUI or internal CLI
     """
-    __slots__ = ['__hints_dict', '__wordle', '__word_weights_dict', '__next_guess',
+    __slots__ = ['__hints_dict', '__constraint', '__wordle', '__candidates', '__next_guess',
                  '__guesses', '__verbose', '__probability_distribution']
 
     def __init__(self, game: w.Wordle, starting_word: str = 'proms', verbose=True) -> None:
@@ -32,13 +39,15 @@ class WordleAI:
             # Where included letters do not belong
             'GUESSED': set()
         }
+        # Exact letter count and position constraints from every report
+        self.__constraint = wf.Constraint()
 
         self.__wordle = game
-        self.__word_weights_dict = dict(utils.WORD_WEIGHTS_LETTER_PROB)
+        # Words still possible, ALLOWED_WORDS order
+        self.__candidates = np.ones(len(WORDS), dtype=bool)
         self.__next_guess = starting_word
         self.__guesses = 0
-        weights = self.__word_weights_dict.values()
-        self.__probability_distribution = np.array(list(weights)) / sum(weights)
+        self.__probability_distribution = WEIGHTS / WEIGHTS.sum()
         self.__verbose = verbose
 
     def make_guess(self, raw_guess: str) -> w.Guess:
@@ -53,6 +62,7 @@ class WordleAI:
         for a word by removing invalid entries from the word list
         """
         feedback = guess.get_feedback()
+        self.__constraint.update(feedback)
         for i, token in enumerate(feedback):
             letter, result = token
             # If is correct letter and in correct position
@@ -80,21 +90,18 @@ class WordleAI:
         """
         Update probablility distribution after words list has been narrowed
         """
-        weights = self.__word_weights_dict.values()
-        self.__probability_distribution = np.array(list(weights)) / sum(weights)
+        weights = WEIGHTS[self.__candidates]
+        self.__probability_distribution = weights / weights.sum()
 
     def narrow_words(self) -> None:
         """
-        Using a dict of all feedback gained from previous guesses, remove words and
-        their weight from from their respective list so that the remaining words meet
-        the criteria of the answer
+        Using all feedback gained from previous guesses, remove words from the
+        candidate mask so that the remaining words meet the criteria of the answer
         """
-        if self.__next_guess in self.__word_weights_dict:
-            self.__word_weights_dict.pop(self.__next_guess)
+        if self.__next_guess in WORD_INDEX:
+            self.__candidates[WORD_INDEX[self.__next_guess]] = False
 
-        self.__word_weights_dict = {word: self.__word_weights_dict[word]
-                                    for word in self.__word_weights_dict.keys()
-                                    if not utils.is_junk(word, self.__hints_dict)}
+        self.__candidates = self.__constraint.matches(self.__candidates)
 
         self.update_probability_distribution()
 
@@ -104,7 +111,7 @@ class WordleAI:
         meaning all remaining words have letters in common but not in the same order,
         remove a word from remaining words list and try again
         """
-        words_left = list(self.__word_weights_dict.keys())
+        words_left = list(WORDS[self.__candidates])
         common_letters = functools.reduce(lambda x, y: set(x) ^ set(y), words_left)
         while not common_letters:
             words_left.pop()
@@ -126,7 +133,7 @@ class WordleAI:
         Find next guess based on score
         """
         # randomly choose next guess from a weighted list
-        word_list = list(self.__word_weights_dict.keys())
+        word_list = WORDS[self.__candidates]
         prob_dist = self.__probability_distribution
         guess = np.random.choice(word_list, 1, False, prob_dist)[0]
 
@@ -135,7 +142,7 @@ class WordleAI:
         # over guessing a correct word
         above_score_thresh = score >= utils.SCORE_THRESHOLD
         guesses_left = self.__guesses < utils.GUESS_THRESHOLD
-        guessable = (wu.MAX_GUESSES - self.__guesses) >= len(self.__word_weights_dict)
+        guessable = (wu.MAX_GUESSES - self.__guesses) >= np.count_nonzero(self.__candidates)
         if above_score_thresh and guesses_left and not guessable:
             guess = self.prioritize_unique_letters()
         return guess
@@ -159,7 +166,7 @@ class WordleAI:
             self.read_report(guess) # update hints dict from guess report
 
             if self.__verbose:
-                print(guess, str(score).ljust(5), len(self.__word_weights_dict))
+                print(guess, str(score).ljust(5), np.count_nonzero(self.__candidates))
 
             if score >= 100: # if game is solved, end
                 return True
@@ -171,9 +178,9 @@ class WordleAI:
 
     def get_remaining_words(self) -> list:
         """
-        Get list of remaining words from words weight dict
+        Get list of remaining words from candidate mask
         """
-        return list(self.__word_weights_dict.keys())
+        return wf.remaining_words(self.__candidates)
 
     def get_next_guess(self) -> str:
         """
@@ -4,25 +4,23 @@ Common tasks wordle_ai needs to reads image of Wordle board into a workable boar
 Author: Kamron Cole kjc8084@rit.edu
 """
 import functools
-import json
 import time
 
 import numpy as np
 
 import wordle
 import wordle_utils as utils
+import wordle_weights as ww
+import wordle_words
 
 # Game variables
 MAX_ROWS = utils.MAX_GUESSES
 MAX_COLS = utils.WORD_LEN
 
-with open('./assets/nyt_word_weights_letter_prob.json', 'r', encoding='utf-8') as file_1:
-    WORD_WEIGHTS_LETTER_PROB = json.loads(file_1.read())
-
-# with open('./assets/word_weights_winrate.json', 'r', encoding='utf-8') as file_2:
-#     WORD_WEIGHT_WINRATE = json.loads(file_2.read())
-
-ALLOWED_FULL, WEIGHTS = list(zip(*WORD_WEIGHTS_LETTER_PROB.items()))
+# Letter probability weight of every word, memory mapped in ALLOWED_WORDS order
+ALLOWED_FULL = tuple(wordle.ALLOWED_WORDS)
+WORDS = wordle_words.get_word_list().get_array()
+WEIGHTS = ww.get_weights('letter_prob')
 
 SCORE_THRESHOLD = 60
 GUESS_THRESHOLD = utils.MAX_GUESSES - 1
@@ -78,11 +76,10 @@ def choose_word_from_unique_words(unique_words: set) -> str:
     Rebuild a weighted words dict with the unique words
     Choose a random word from the weighted words dict
     """
-    common_word_weights = {}
-    for word in unique_words:
-        common_word_weights[word] = WORD_WEIGHTS_LETTER_PROB[word]
-    prob_dist = np.array(list(common_word_weights.values())) / sum(common_word_weights.values())
-    return np.random.choice(list(common_word_weights.keys()), 1, False, prob_dist)[0]
+    words = sorted(unique_words)
+    weights = WEIGHTS[np.searchsorted(WORDS, words)].astype(np.float64)
+    prob_dist = weights / weights.sum()
+    return np.random.choice(words, 1, False, prob_dist)[0]
 
 def main():
     """
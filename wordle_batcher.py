@@ -0,0 +1,220 @@
+"""
+Micro-batching in front of the solver core.
+
+Callers submit one item each and await its result. The batcher collects items until
+max_batch are waiting or max_wait seconds have passed since the first one, then hands
+the whole batch to one evaluate call in a worker thread and resolves every caller's
+future from its results. A bigger batch lets evaluate build every candidate mask in one
+array, analyze each distinct candidate set once and share one cache pass; the wait
+bounds the latency that costs a lone request. If a batch call raises, its items are
+evaluated one at a time so only the failing ones get the error.
+
+Batch sizes, queue waits, evaluation times and end to end latencies are kept as
+histograms with p50 and p99.
+"""
+import asyncio
+from collections import deque
+from time import perf_counter
+
+import numpy as np
+
+DEFAULT_MAX_BATCH = 64
+DEFAULT_MAX_WAIT = 0.002
+# Upper edges of the latency histogram buckets in milliseconds
+LATENCY_BUCKETS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+# Most recent samples quantiles are computed from
+QUANTILE_SAMPLES = 4096
+
+
+class Histogram:
+    """
+    Fixed bucket histogram of latencies in milliseconds or any other value, with
+    p50 and p99 over the most recent QUANTILE_SAMPLES values
+    """
+    __slots__ = ['__edges', '__unit', '__counts', '__total', '__count', '__recent']
+
+    def __init__(self, edges=LATENCY_BUCKETS_MS, unit: str = 'ms'):
+        """
+        Params:
+            edges - ascending upper bucket edges, one more bucket catches everything past the last
+            unit:str - suffix of the bucket labels and summary keys
+        """
+        self.__edges = np.asarray(edges, dtype=np.float64)
+        self.__unit = unit
+        self.__counts = np.zeros(len(self.__edges) + 1, dtype=np.int64)
+        self.__total = 0.0
+        self.__count = 0
+        self.__recent = deque(maxlen=QUANTILE_SAMPLES)
+
+    def record(self, value: float):
+        self.__counts[np.searchsorted(self.__edges, value)] += 1
+        self.__total += value
+        self.__count += 1
+        self.__recent.append(value)
+
+    def get_count(self) -> int:
+        return self.__count
+
+    def quantile(self, q: float) -> float:
+        """
+        Quantile q of the recent values, 0 before any are recorded
+        """
+        if not self.__recent:
+            return 0.0
+        return float(np.quantile(np.fromiter(self.__recent, dtype=np.float64), q))
+
+    def snapshot(self) -> dict:
+        unit = f'_{self.__unit}' if self.__unit else ''
+        labels = [f'<={edge:g}{self.__unit}' for edge in self.__edges] + [f'>{self.__edges[-1]:g}{self.__unit}']
+        return {
+            'count': self.__count,
+            f'mean{unit}': self.__total / self.__count if self.__count else 0.0,
+            f'p50{unit}': self.quantile(0.5),
+            f'p99{unit}': self.quantile(0.99),
+            'buckets': dict(zip(labels, self.__counts.tolist()))
+        }
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent submits into batches for one evaluate call each
+    """
+    __slots__ = ['__evaluate', '__max_batch', '__max_wait', '__executor', '__queue', '__worker',
+                 '__batch_sizes', '__queue_wait', '__evaluation', '__latency']
+
+    def __init__(self, evaluate, max_batch: int = DEFAULT_MAX_BATCH, max_wait: float = DEFAULT_MAX_WAIT, executor=None):
+        """
+        Params:
+            evaluate - function from a list of items to a list of results, one per item in
+                order. A result that is an Exception is raised to that item's caller
+            max_batch:int - most items per evaluate call
+            max_wait:float - seconds a batch stays open for more items after its first
+            executor - concurrent.futures executor evaluate runs on, None for the loop's default
+        """
+        self.__evaluate = evaluate
+        self.__max_batch = max(1, max_batch)
+        self.__max_wait = max(0.0, max_wait)
+        self.__executor = executor
+        self.__queue = None
+        self.__worker = None
+        self.__batch_sizes = Histogram(BATCH_SIZE_BUCKETS, unit='')
+        self.__queue_wait = Histogram()
+        self.__evaluation = Histogram()
+        self.__latency = Histogram()
+
+    def get_max_batch(self) -> int:
+        return self.__max_batch
+
+    def get_max_wait(self) -> float:
+        return self.__max_wait
+
+    async def start(self):
+        self.__queue = asyncio.Queue()
+        self.__worker = asyncio.create_task(self.__run())
+
+    async def stop(self):
+        """
+        Stop batching, callers still waiting get CancelledError
+        """
+        if self.__worker is not None:
+            self.__worker.cancel()
+            try:
+                await self.__worker
+            except asyncio.CancelledError:
+                pass
+            self.__worker = None
+        while self.__queue is not None and not self.__queue.empty():
+            _, future, _ = self.__queue.get_nowait()
+            future.cancel()
+
+    async def submit(self, item):
+        """
+        Queue item for the next batch and wait for its result
+        """
+        future = asyncio.get_running_loop().create_future()
+        start = perf_counter()
+        self.__queue.put_nowait((item, future, start))
+        try:
+            return await future
+        finally:
+            self.__latency.record((perf_counter() - start) * 1000)
+
+    async def __collect(self) -> list:
+        """
+        Wait for one item, then up to max_wait for the batch to fill
+        """
+        batch = [await self.__queue.get()]
+        deadline = perf_counter() + self.__max_wait
+        while len(batch) < self.__max_batch:
+            if not self.__queue.empty():
+                batch.append(self.__queue.get_nowait())
+                continue
+            timeout = deadline - perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.__queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    def __evaluate_each(self, items: list) -> list:
+        """
+        Evaluate items as one batch, or if that raises, one at a time so a bad item
+        only fails its own caller
+        """
+        try:
+            results = self.__evaluate(items)
+            if len(results) == len(items):
+                return results
+            raise ValueError(f'evaluate returned {len(results)} results for {len(items)} items')
+        except Exception as error:
+            if len(items) == 1:
+                return [error]
+        results = []
+        for item in items:
+            try:
+                results.append(self.__evaluate([item])[0])
+            except Exception as error:
+                results.append(error)
+        return results
+
+    async def __run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self.__collect()
+            # Callers that gave up while queued don't need evaluating
+            batch = [entry for entry in batch if not entry[1].done()]
+            if not batch:
+                continue
+            start = perf_counter()
+            for _, _, queued in batch:
+                self.__queue_wait.record((start - queued) * 1000)
+            self.__batch_sizes.record(len(batch))
+            try:
+                results = await loop.run_in_executor(self.__executor, self.__evaluate_each, [item for item, _, _ in batch])
+            except Exception as error:
+                results = [error] * len(batch)
+            self.__evaluation.record((perf_counter() - start) * 1000)
+            for (_, future, _), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    def get_stats(self) -> dict:
+        """
+        Get settings and batch size, queue wait, evaluation and latency histograms
+        """
+        return {
+            'max_batch': self.__max_batch,
+            'max_wait_ms': self.__max_wait * 1000,
+            'pending': 0 if self.__queue is None else self.__queue.qsize(),
+            'batch_size': self.__batch_sizes.snapshot(),
+            'queue_wait': self.__queue_wait.snapshot(),
+            'evaluation': self.__evaluation.snapshot(),
+            'latency': self.__latency.snapshot()
+        }
@@ -0,0 +1,224 @@
+"""
+Deterministic benchmarks for the core primitives and the solver strategies.
+
+Every input comes from a fixed seed or a fixed word list, so two runs on the same
+machine differ only by timing noise and any change in solve quality is real.
+Results are written as JSON for comparing runs.
+
+    python wordle_bench.py [primitives|solvers|all] [out_path]
+"""
+import json
+import platform
+import sys
+from datetime import datetime
+from time import perf_counter
+
+import numpy as np
+
+import wordle
+import wordle_utils as utils
+import wordle_patterns as wp
+import wordle_sim as sim
+from wordle_filter import Constraint, filter_hints
+from wordle_info import candidate_info, expected_info
+from wordle_solvers import SOLVERS
+
+BENCH_SEED = 0
+BENCH_PATH = './assets/benchmarks.json'
+SUITES = ('primitives', 'solvers')
+REPEATS = 5
+# Random (guess, answer) pairs scored per feedback benchmark
+SCORE_PAIRS = 100_000
+# Fixed size of each random candidate set for the next guess benchmark
+CANDIDATE_SET_SIZES = (8, 64, 512)
+ANSWER_LISTS = {
+    'answers': utils.POSSIBLE_ANSWERS_PATH,
+    'nyt': utils.NEW_ALLOWED_GUESSES_PATH
+}
+# Games per answer list in a solve sweep, None plays every word
+SWEEP_GAMES = {
+    'answers': None,
+    'nyt': 2000
+}
+
+
+def time_call(func, repeats: int = REPEATS, number: int = 1) -> dict:
+    """
+    Time func() number times per repeat, returns per call seconds
+    """
+    func()
+    times = []
+    for _ in range(repeats):
+        start = perf_counter()
+        for _ in range(number):
+            func()
+        times.append((perf_counter() - start) / number)
+    return {
+        'repeats': repeats,
+        'number': number,
+        'min': min(times),
+        'median': float(np.median(times)),
+        'mean': float(np.mean(times))
+    }
+
+
+def random_histories(rng: np.random.Generator, count: int, turns: int = 2) -> list[tuple[str, list]]:
+    """
+    Get (answer, feedbacks of turns random guesses) for count random answers
+    """
+    words = wordle.ALLOWED_WORDS
+    histories = []
+    for answer_idx in rng.integers(len(words), size=count):
+        guesses = rng.integers(len(words), size=turns)
+        answer = words[answer_idx]
+        histories.append((answer, [wordle.Guess(words[guess], answer).get_feedback() for guess in guesses]))
+    return histories
+
+
+def hints_from_feedback(feedbacks: list) -> dict:
+    """
+    WordleAI style hints dict from a list of feedbacks
+    """
+    hints_dict = {'INCLUDED': set(), 'EXCLUDED': set(), 'CORRECT': set(), 'GUESSED': set()}
+    for feedback in feedbacks:
+        for i, (letter, score) in enumerate(feedback):
+            if score == utils.CORRECT_ALL:
+                hints_dict['CORRECT'].add((letter, i))
+                hints_dict['INCLUDED'].add(letter)
+            elif score == utils.CORRECT_LETTER:
+                hints_dict['GUESSED'].add((letter, i))
+                hints_dict['INCLUDED'].add(letter)
+            else:
+                hints_dict['GUESSED'].add((letter, i))
+    for feedback in feedbacks:
+        for letter, score in feedback:
+            if score == utils.WRONG and letter not in hints_dict['INCLUDED']:
+                hints_dict['EXCLUDED'].add(letter)
+    return hints_dict
+
+
+def random_candidate_sets(rng: np.random.Generator, size: int, count: int) -> list[np.ndarray]:
+    """
+    Get count sorted random candidate index sets of size words
+    """
+    num_words = len(wordle.ALLOWED_WORDS)
+    return [np.sort(rng.choice(num_words, size, replace=False)) for _ in range(count)]
+
+
+def bench_primitives(seed: int = BENCH_SEED, repeats: int = REPEATS) -> dict:
+    """
+    Time feedback scoring, filtering, entropy and next guess selection on fixed inputs
+    """
+    rng = np.random.default_rng(seed)
+    words = wordle.ALLOWED_WORDS
+    patterns = wp.get_pattern_matrix()
+    wp.get_answer_pattern_matrix()
+    results = {}
+
+    guess_idxs = rng.integers(len(words), size=SCORE_PAIRS)
+    answer_idxs = rng.integers(len(words), size=SCORE_PAIRS)
+    pairs = [(words[g], words[a]) for g, a in zip(guess_idxs[:1000], answer_idxs[:1000])]
+    results['score_guess_object'] = time_call(lambda: [wordle.Guess(g, a).get_feedback() for g, a in pairs], repeats)
+    results['score_guess_object']['items'] = len(pairs)
+    results['score_patterns'] = time_call(lambda: wp.score_patterns(guess_idxs, answer_idxs), repeats)
+    results['score_patterns']['items'] = SCORE_PAIRS
+    results['score_matrix_lookup'] = time_call(lambda: patterns[guess_idxs, answer_idxs], repeats)
+    results['score_matrix_lookup']['items'] = SCORE_PAIRS
+
+    histories = random_histories(rng, 20)
+    hints = [hints_from_feedback(feedbacks) for _, feedbacks in histories]
+    constraints = []
+    for _, feedbacks in histories:
+        constraint = Constraint()
+        for feedback in feedbacks:
+            constraint.update(feedback)
+        constraints.append(constraint)
+    results['filter_hints'] = time_call(lambda: [filter_hints(hints_dict) for hints_dict in hints], repeats)
+    results['filter_hints']['items'] = len(hints)
+    results['filter_constraint'] = time_call(lambda: [constraint.matches() for constraint in constraints], repeats)
+    results['filter_constraint']['items'] = len(constraints)
+
+    results['entropy_all_words'] = time_call(lambda: expected_info(), max(1, repeats // 2))
+    for size in CANDIDATE_SET_SIZES:
+        candidate_sets = random_candidate_sets(rng, size, 5)
+        results[f'entropy_{size}_candidates'] = time_call(lambda: [candidate_info(answers) for answers in candidate_sets], repeats)
+        results[f'entropy_{size}_candidates']['items'] = len(candidate_sets)
+
+    # Uncached so every call does the full analysis
+    solvers = [solver_class(cache_entries=0) for solver_class in SOLVERS.values()]
+    for size in CANDIDATE_SET_SIZES:
+        candidate_sets = random_candidate_sets(rng, size, 5)
+        masks = np.zeros((len(candidate_sets), len(words)), dtype=bool)
+        for row, answers in enumerate(candidate_sets):
+            masks[row, answers] = True
+        for solver in solvers:
+            key = f'next_guess_{solver.name}_{size}_candidates'
+            results[key] = time_call(lambda: solver.next_guesses(masks, 1), repeats)
+            results[key]['items'] = len(candidate_sets)
+            results[key]['guesses'] = solver.next_guesses(masks, 1).tolist()
+    return results
+
+
+def bench_solvers(seed: int = BENCH_SEED, processes: int = 1, verbose: bool = True) -> dict:
+    """
+    Full solve sweep of every strategy over every answer list
+    """
+    results = {}
+    for list_name, path in ANSWER_LISTS.items():
+        answers = sim.load_answer_list(path)
+        for solver_class in SOLVERS.values():
+            solver = solver_class()
+            summary = sim.simulate(solver, answers, sample=SWEEP_GAMES[list_name], seed=seed, processes=processes)
+            summary['games_per_second'] = summary['games'] / summary['seconds'] if summary['seconds'] else 0.0
+            results[f'{list_name}/{solver.name}'] = summary
+            if verbose:
+                print(
+                    f'{list_name}/{solver.name}',
+                    f'Win rate: {round(summary["win_rate"] * 100, 2)}%',
+                    f'Mean guesses: {round(summary["mean_guesses"], 4)}',
+                    f'{round(summary["games_per_second"])} games/s',
+                    sep=' - '
+                )
+    return results
+
+
+def run_benchmarks(suites=SUITES, path: str | None = BENCH_PATH, seed: int = BENCH_SEED) -> dict:
+    """
+    Run benchmark suites and write the results to path
+    """
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'seed': seed,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'words': len(wordle.ALLOWED_WORDS),
+        'words_hash': utils.word_list_hash(wordle.ALLOWED_WORDS).hex()
+    }
+    if 'primitives' in suites:
+        report['primitives'] = bench_primitives(seed)
+    if 'solvers' in suites:
+        report['solvers'] = bench_solvers(seed)
+    if path is not None:
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+    return report
+
+
+def main():
+    """
+    Run benchmarks from the command line
+    """
+    suite = sys.argv[1] if len(sys.argv) > 1 else 'all'
+    path = sys.argv[2] if len(sys.argv) > 2 else BENCH_PATH
+    if suite != 'all' and suite not in SUITES:
+        sys.exit(f'Usage: python wordle_bench.py [{"|".join(SUITES)}|all] [out_path]')
+    suites = SUITES if suite == 'all' else (suite,)
+    report = run_benchmarks(suites, path)
+    for name, result in report.get('primitives', {}).items():
+        print(f'{name}: {round(result["median"] * 1000, 3)}ms')
+    print(f'Wrote {path}')
+
+
+if __name__ == '__main__':
+    main()
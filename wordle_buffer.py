@@ -0,0 +1,341 @@
+"""
+Array backed replay buffer for the Q-network.
+
+Transitions live in preallocated arrays used as a ring: (capacity, state size)
+float32 states and next states, int64 actions, float32 rewards and bool dones. Appends
+write one row, or a whole VecWordleEnv step at once, and overwrite the oldest rows
+when full. Sampling gathers a batch into reusable batch arrays with one take per field,
+which torch can wrap without copying.
+
+Prioritized sampling keeps priorities ** alpha in an array sum tree: leaves hold each
+row's priority and every parent the sum of its children, so drawing a batch
+proportional to priority and updating priorities are both log(capacity) array steps
+for the whole batch. Importance weights (rows * P(i)) ** -beta are returned scaled to
+a max of 1.
+
+Buffers made with num_actions also keep each next state's valid actions as a packed
+bit row (num_actions / 8 bytes), unpacked to a (batch, num_actions) bool mask when
+sampled so the Q-target max can skip actions the policy can never take.
+
+Buffers save to and load from one .npz file for resuming long runs.
+"""
+import os
+
+import numpy as np
+
+try:
+    import torch
+except ImportError:
+    torch = None
+
+BUFFER_VERSION = 1
+DEFAULT_ALPHA = 0.6
+DEFAULT_BETA = 0.4
+# Priority of new rows before the buffer has seen any
+INITIAL_PRIORITY = 1.0
+# Added to absolute TD errors so no row's priority reaches 0
+PRIORITY_EPSILON = 1e-6
+
+
+class SumTree:
+    """
+    Complete binary tree of sums over capacity leaves, stored in one array
+    """
+    __slots__ = ['__leaves', '__tree']
+
+    def __init__(self, capacity: int):
+        self.__leaves = 1 << max(0, int(capacity - 1).bit_length())
+        self.__tree = np.zeros(2 * self.__leaves, dtype=np.float64)
+
+    def total(self) -> float:
+        return float(self.__tree[1])
+
+    def get(self, indexes: np.ndarray) -> np.ndarray:
+        return self.__tree[self.__leaves + np.asarray(indexes)]
+
+    def get_leaves(self) -> np.ndarray:
+        return self.__tree[self.__leaves:]
+
+    def update(self, indexes: np.ndarray, values: np.ndarray):
+        """
+        Set leaves and recompute their ancestors one level at a time
+        """
+        nodes = self.__leaves + np.asarray(indexes, dtype=np.int64)
+        self.__tree[nodes] = values
+        nodes = np.unique(nodes // 2)
+        while nodes[0] >= 1:
+            self.__tree[nodes] = self.__tree[2 * nodes] + self.__tree[2 * nodes + 1]
+            if nodes[0] == 1:
+                break
+            nodes = np.unique(nodes // 2)
+
+    def find(self, targets: np.ndarray) -> np.ndarray:
+        """
+        Leaf index of each target in [0, total), walking down every target at once
+        """
+        targets = np.array(targets, dtype=np.float64)
+        nodes = np.ones(len(targets), dtype=np.int64)
+        while nodes[0] < self.__leaves:
+            left = self.__tree[2 * nodes]
+            right = targets >= left
+            targets -= left * right
+            nodes = 2 * nodes + right
+        return nodes - self.__leaves
+
+
+class ReplayBuffer:
+    """
+    Ring buffer of (state, action, reward, next state, done) transitions
+    """
+    __slots__ = ['__capacity', '__states', '__actions', '__rewards', '__next_states', '__dones', '__next_valid',
+                 '__num_actions', '__position', '__size', '__alpha', '__tree', '__max_priority', '__batch']
+
+    def __init__(self, capacity: int, state_size: int, prioritized: bool = False, alpha: float = DEFAULT_ALPHA,
+                 num_actions: int = 0):
+        """
+        Params:
+            capacity:int - transitions kept before the oldest are overwritten
+            state_size:int - features per state, see wordle_state
+            prioritized:bool - sample proportional to priority instead of uniformly
+            alpha:float - how strongly priorities skew sampling, 0 is uniform
+            num_actions:int - actions in the next state valid masks, 0 to not keep them
+        """
+        self.__capacity = capacity
+        self.__states = np.zeros((capacity, state_size), dtype=np.float32)
+        self.__actions = np.zeros(capacity, dtype=np.int64)
+        self.__rewards = np.zeros(capacity, dtype=np.float32)
+        self.__next_states = np.zeros((capacity, state_size), dtype=np.float32)
+        self.__dones = np.zeros(capacity, dtype=bool)
+        self.__num_actions = num_actions
+        self.__next_valid = np.zeros((capacity, -(-num_actions // 8)), dtype=np.uint8) if num_actions else None
+        self.__position = 0
+        self.__size = 0
+        self.__alpha = alpha
+        self.__tree = SumTree(capacity) if prioritized else None
+        self.__max_priority = INITIAL_PRIORITY
+        self.__batch = None
+
+    def __len__(self) -> int:
+        return self.__size
+
+    def get_capacity(self) -> int:
+        return self.__capacity
+
+    def is_prioritized(self) -> bool:
+        return self.__tree is not None
+
+    def get_num_actions(self) -> int:
+        return self.__num_actions
+
+    def append(self, state, action: int, reward: float, next_state, done: bool, next_valid=None):
+        """
+        Add one transition, next_valid is the next state's (num_actions,) bool valid
+        action mask or its packbits when the buffer keeps them
+        """
+        row = self.__position
+        self.__states[row] = state
+        self.__actions[row] = action
+        self.__rewards[row] = reward
+        self.__next_states[row] = next_state
+        self.__dones[row] = done
+        if self.__next_valid is not None:
+            self.__next_valid[row] = pack_valid(next_valid)
+        if self.__tree is not None:
+            self.__tree.update(np.array([row]), np.array([self.__max_priority ** self.__alpha]))
+        self.__position = (row + 1) % self.__capacity
+        self.__size = min(self.__size + 1, self.__capacity)
+
+    def extend(self, states: np.ndarray, actions: np.ndarray, rewards: np.ndarray, next_states: np.ndarray, dones: np.ndarray,
+               next_valid: np.ndarray | None = None):
+        """
+        Add a batch of transitions, e.g. one VecWordleEnv step, with the next states'
+        (batch, num_actions) bool valid action masks or their packbits along axis 1
+        when the buffer keeps them
+        """
+        count = len(actions)
+        if count > self.__capacity:
+            states, actions, rewards = states[-self.__capacity:], actions[-self.__capacity:], rewards[-self.__capacity:]
+            next_states, dones = next_states[-self.__capacity:], dones[-self.__capacity:]
+            next_valid = None if next_valid is None else next_valid[-self.__capacity:]
+            count = self.__capacity
+        rows = (self.__position + np.arange(count)) % self.__capacity
+        self.__states[rows] = states
+        self.__actions[rows] = actions
+        self.__rewards[rows] = rewards
+        self.__next_states[rows] = next_states
+        self.__dones[rows] = dones
+        if self.__next_valid is not None:
+            self.__next_valid[rows] = pack_valid(next_valid)
+        if self.__tree is not None:
+            self.__tree.update(rows, np.full(count, self.__max_priority ** self.__alpha))
+        self.__position = int((self.__position + count) % self.__capacity)
+        self.__size = min(self.__size + count, self.__capacity)
+
+    def __batch_arrays(self, batch_size: int) -> dict:
+        """
+        Reusable arrays a sampled batch is gathered into, grown as needed
+        """
+        if self.__batch is None or len(self.__batch['actions']) < batch_size:
+            state_size = self.__states.shape[1]
+            self.__batch = {
+                'states': np.empty((batch_size, state_size), dtype=np.float32),
+                'actions': np.empty(batch_size, dtype=np.int64),
+                'rewards': np.empty(batch_size, dtype=np.float32),
+                'next_states': np.empty((batch_size, state_size), dtype=np.float32),
+                'dones': np.empty(batch_size, dtype=bool),
+                'weights': np.empty(batch_size, dtype=np.float32)
+            }
+            if self.__next_valid is not None:
+                self.__batch['packed_next_valid'] = np.empty((batch_size, self.__next_valid.shape[1]), dtype=np.uint8)
+        return {name: array[:batch_size] for name, array in self.__batch.items()}
+
+    def gather(self, indexes: np.ndarray) -> dict:
+        """
+        Get the transitions at indexes in the reusable batch arrays, overwritten by the
+        next call, with the unpacked 'next_valid' masks when the buffer keeps them
+        """
+        batch = self.__batch_arrays(len(indexes))
+        np.take(self.__states, indexes, axis=0, out=batch['states'])
+        np.take(self.__actions, indexes, out=batch['actions'])
+        np.take(self.__rewards, indexes, out=batch['rewards'])
+        np.take(self.__next_states, indexes, axis=0, out=batch['next_states'])
+        np.take(self.__dones, indexes, out=batch['dones'])
+        batch['weights'][:] = 1
+        if self.__next_valid is not None:
+            packed = np.take(self.__next_valid, indexes, axis=0, out=batch.pop('packed_next_valid'))
+            batch['next_valid'] = np.unpackbits(packed, axis=1, count=self.__num_actions).view(bool)
+        batch['indexes'] = indexes
+        return batch
+
+    def sample(self, batch_size: int, rng: np.random.Generator, beta: float = DEFAULT_BETA) -> dict:
+        """
+        Get a batch of states, actions, rewards, next_states, dones, importance weights
+        and the indexes sampled. Uniform unless the buffer is prioritized, in which
+        case rows are drawn proportional to priority, one from each of batch_size
+        equal slices of the total.
+        """
+        if self.__size == 0:
+            raise ValueError('Cannot sample from an empty replay buffer')
+        if self.__tree is None:
+            return self.gather(rng.integers(self.__size, size=batch_size))
+
+        total = self.__tree.total()
+        targets = (np.arange(batch_size) + rng.random(batch_size)) * (total / batch_size)
+        indexes = np.minimum(self.__tree.find(np.minimum(targets, np.nextafter(total, 0))), self.__size - 1)
+        batch = self.gather(indexes)
+        probabilities = self.__tree.get(indexes) / total
+        weights = (self.__size * probabilities) ** -beta
+        batch['weights'][:] = weights / weights.max()
+        return batch
+
+    def update_priorities(self, indexes: np.ndarray, td_errors: np.ndarray):
+        """
+        Set sampled rows' priorities from their absolute TD errors
+        """
+        if self.__tree is None:
+            return
+        priorities = np.abs(np.asarray(td_errors, dtype=np.float64)) + PRIORITY_EPSILON
+        self.__max_priority = max(self.__max_priority, float(priorities.max()))
+        self.__tree.update(indexes, priorities ** self.__alpha)
+
+    def save(self, path: str):
+        """
+        Write the filled rows, ring position and priorities to an .npz file
+        """
+        tmp_path = f'{path}.tmp.npz'
+        rows = slice(0, self.__size)
+        np.savez(
+            tmp_path,
+            version=BUFFER_VERSION,
+            capacity=self.__capacity,
+            position=self.__position,
+            alpha=self.__alpha,
+            num_actions=self.__num_actions,
+            max_priority=self.__max_priority,
+            prioritized=self.__tree is not None,
+            states=self.__states[rows],
+            actions=self.__actions[rows],
+            rewards=self.__rewards[rows],
+            next_states=self.__next_states[rows],
+            dones=self.__dones[rows],
+            next_valid=self.__next_valid[rows] if self.__next_valid is not None else np.zeros((0, 0), dtype=np.uint8),
+            priorities=self.__tree.get_leaves()[rows] if self.__tree is not None else np.zeros(0)
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'ReplayBuffer':
+        """
+        Restore a buffer written by save
+        """
+        with np.load(path) as data:
+            if int(data['version']) != BUFFER_VERSION:
+                raise ValueError(f'{path} is replay buffer version {int(data["version"])}, expected {BUFFER_VERSION}')
+            num_actions = int(data['num_actions']) if 'num_actions' in data else 0
+            buffer = cls(int(data['capacity']), data['states'].shape[1], bool(data['prioritized']), float(data['alpha']), num_actions)
+            size = len(data['actions'])
+            buffer.__states[:size] = data['states']
+            buffer.__actions[:size] = data['actions']
+            buffer.__rewards[:size] = data['rewards']
+            buffer.__next_states[:size] = data['next_states']
+            buffer.__dones[:size] = data['dones']
+            if buffer.__next_valid is not None:
+                buffer.__next_valid[:size] = data['next_valid']
+            buffer.__size = size
+            buffer.__position = int(data['position'])
+            buffer.__max_priority = float(data['max_priority'])
+            if buffer.__tree is not None and size:
+                buffer.__tree.update(np.arange(size), data['priorities'])
+        return buffer
+
+
+def pack_valid(valid: np.ndarray) -> np.ndarray:
+    """
+    packbits of bool valid action masks along the last axis, packed uint8 rows pass through
+    """
+    if valid is None:
+        raise ValueError('This replay buffer keeps next state valid masks, pass next_valid')
+    valid = np.asarray(valid)
+    return valid if valid.dtype == np.uint8 else np.packbits(valid, axis=-1)
+
+
+def to_tensors(batch: dict, device=None) -> dict:
+    """
+    Wrap a sampled batch as tensors, sharing memory on CPU
+    """
+    if torch is None:
+        raise ImportError('torch is needed for tensor batches')
+    tensors = {name: torch.from_numpy(array) for name, array in batch.items() if isinstance(array, np.ndarray)}
+    if device is not None:
+        tensors = {name: tensor.to(device, non_blocking=True) for name, tensor in tensors.items()}
+    return tensors
+
+
+def main():
+    """
+    Time appends and both samplers
+    """
+    from time import perf_counter
+
+    from wordle_state import STATE_SIZE
+
+    rng = np.random.default_rng(0)
+    capacity, batch_size = 200_000, 4096
+    for prioritized in (False, True):
+        buffer = ReplayBuffer(capacity, STATE_SIZE, prioritized)
+        states = rng.random((1024, STATE_SIZE), dtype=np.float32)
+        start = perf_counter()
+        for _ in range(capacity // 1024):
+            buffer.extend(states, rng.integers(14855, size=1024), rng.random(1024), states, rng.random(1024) < 0.2)
+        fill = perf_counter() - start
+        start = perf_counter()
+        for _ in range(20):
+            batch = buffer.sample(batch_size, rng)
+            buffer.update_priorities(batch['indexes'], rng.random(batch_size))
+        sample = (perf_counter() - start) / 20
+        print(f'{"prioritized" if prioritized else "uniform"}: {round(capacity / fill)} transitions/s appended, '
+              f'{round(sample * 1000, 2)}ms per {batch_size} sample and priority update')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""
+Transposition cache for candidate sets.
+
+Different guess histories often leave the same remaining words. Each distinct set is
+keyed by a 128 bit hash of its packed candidate bitset, and the cache keeps what was
+worked out for it (best guess, an entropy summary and the best guess's partition)
+so later games reaching the same set skip filtering and scoring. Least recently used
+entries are evicted past max_entries.
+"""
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+
+import wordle_patterns as wp
+
+DEFAULT_CACHE_ENTRIES = 1 << 16
+# Guesses kept in an entry's entropy summary
+SUMMARY_GUESSES = 5
+
+
+def bitset_hash(packed: np.ndarray) -> bytes:
+    """
+    128 bit hash of one packed candidate bitset row, see np.packbits
+    """
+    return hashlib.blake2b(np.ascontiguousarray(packed).tobytes(), digest_size=16).digest()
+
+
+def candidate_hash(candidates: np.ndarray) -> bytes:
+    """
+    128 bit hash of an (N,) bool candidate mask
+    """
+    return bitset_hash(np.packbits(candidates))
+
+
+class StateInfo:
+    """
+    What is known about one candidate set
+    """
+    __slots__ = ['guess', 'top_guesses', 'top_info', 'partition_sizes']
+
+    def __init__(self, guess: int, top_guesses: np.ndarray, top_info: np.ndarray, partition_sizes: np.ndarray):
+        """
+        Params:
+            guess:int - best next guess index
+            top_guesses:np.ndarray - SUMMARY_GUESSES guesses with the most expected information
+            top_info:np.ndarray - expected bits of top_guesses
+            partition_sizes:np.ndarray - (NUM_PATTERNS,) candidates left per pattern after guess
+        """
+        self.guess = guess
+        self.top_guesses = top_guesses
+        self.top_info = top_info
+        self.partition_sizes = partition_sizes
+
+
+def state_info(guess: int, info: np.ndarray, buckets: np.ndarray, sizes: np.ndarray) -> StateInfo:
+    """
+    Build a StateInfo from every guess's expected bits and the candidate_buckets of the set
+    """
+    top = np.argsort(-info, kind='stable')[:SUMMARY_GUESSES]
+    guess_buckets = (buckets // wp.NUM_PATTERNS) == guess
+    partition_sizes = np.zeros(wp.NUM_PATTERNS, dtype=np.uint16)
+    partition_sizes[buckets[guess_buckets] % wp.NUM_PATTERNS] = sizes[guess_buckets]
+    return StateInfo(guess, top.astype(np.int32), info[top].astype(np.float32), partition_sizes)
+
+
+class TranspositionCache:
+    """
+    Size bounded LRU map of candidate set hash -> StateInfo with hit, miss and eviction counters
+    """
+    __slots__ = ['__entries', '__max_entries', '__hits', '__misses', '__evictions']
+
+    def __init__(self, max_entries: int = DEFAULT_CACHE_ENTRIES):
+        self.__entries = OrderedDict()
+        self.__max_entries = max_entries
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def __contains__(self, key: bytes) -> bool:
+        return key in self.__entries
+
+    def get(self, key: bytes) -> StateInfo | None:
+        """
+        Get a cached state and mark it recently used, None on a miss
+        """
+        entry = self.__entries.get(key)
+        if entry is None:
+            self.__misses += 1
+            return None
+        self.__hits += 1
+        self.__entries.move_to_end(key)
+        return entry
+
+    def put(self, key: bytes, entry: StateInfo):
+        """
+        Cache a state, evicting the least recently used past max_entries
+        """
+        self.__entries[key] = entry
+        self.__entries.move_to_end(key)
+        while len(self.__entries) > self.__max_entries:
+            self.__entries.popitem(last=False)
+            self.__evictions += 1
+
+    def clear(self):
+        """
+        Drop every entry and reset the counters
+        """
+        self.__entries.clear()
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+
+    def get_stats(self) -> dict:
+        """
+        Get entries, hits, misses, evictions and hit rate
+        """
+        lookups = self.__hits + self.__misses
+        return {
+            'entries': len(self.__entries),
+            'max_entries': self.__max_entries,
+            'hits': self.__hits,
+            'misses': self.__misses,
+            'evictions': self.__evictions,
+            'hit_rate': self.__hits / lookups if lookups else 0.0
+        }
+
+    def __getstate__(self):
+        # Worker processes start with an empty cache of the same size
+        return self.__max_entries
+
+    def __setstate__(self, max_entries: int):
+        self.__init__(max_entries)
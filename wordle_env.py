@@ -0,0 +1,197 @@
+"""
+Vectorized Wordle environment for reinforcement learning rollouts.
+
+VecWordleEnv steps B games at once on arrays: answers are indexes, feedback comes
+from the pattern matrix and every game's remaining words are one row of a (B, N) bool
+candidate mask. Rewards follow WordleAI.get_reward (see the commented out class in
+wordle_ai.py): while a game runs, the guess score minus half the previous guess score
+plus (N - words left) ** 2 / 4.4e6; when it ends, 600 + 50 per guess left +
+words left ** 2 / 1.1e6 for a win, or -800 - words left ** 2 / 1.1e6 for a loss. Words
+left are the candidates still consistent with the feedback that haven't been guessed.
+Finished games reset on their own, so every step returns B live states.
+
+    python wordle_env.py [num_envs] [steps]
+"""
+import sys
+from time import perf_counter
+
+import numpy as np
+
+import wordle_utils as utils
+import wordle_patterns as wp
+import wordle_sim as sim
+from wordle_masks import ActionMasks
+from wordle_state import PATTERN_TRITS, StateEncoder, encode_states
+
+WIN_REWARD = 600
+LOSS_REWARD = -800
+GUESS_LEFT_REWARD = 50
+# Divisors of the squared words left rewards while playing and at the end of a game
+PLAYING_WORDS_LEFT_SCALE = 4_400_000
+FINAL_WORDS_LEFT_SCALE = 1_100_000
+
+
+def step_rewards(scores: np.ndarray, last_scores: np.ndarray, words_left: np.ndarray, guesses_left: np.ndarray,
+                 won: np.ndarray, over: np.ndarray, num_words: int) -> np.ndarray:
+    """
+    WordleAI.get_reward for a batch of steps. scores are the guesses' Guess.get_score(),
+    last_scores the previous guesses' scores, 0 on the first turn.
+    """
+    words_left = words_left.astype(np.float64)
+    playing = scores - last_scores * 0.5 + (num_words - words_left) ** 2 / PLAYING_WORDS_LEFT_SCALE
+    final_words_left = words_left ** 2 / FINAL_WORDS_LEFT_SCALE
+    final = np.where(won, WIN_REWARD + guesses_left * GUESS_LEFT_REWARD + final_words_left, LOSS_REWARD - final_words_left)
+    return np.where(over, final, playing)
+
+
+class VecWordleEnv:
+    """
+    B Wordle games held in arrays and stepped together, with automatic reset
+    """
+    __slots__ = ['__answer_pool', '__rng', '__max_guesses', '__patterns', '__answers', '__candidates', '__masks',
+                 '__guesses', '__codes', '__turns', '__last_scores', '__encoder', '__episodes', '__wins', '__guesses_won']
+
+    def __init__(self, num_envs: int, answers=None, seed: int | None = None, max_guesses: int = utils.MAX_GUESSES,
+                 layout: str = 'compact', device=None):
+        """
+        Params:
+            num_envs:int - games played at once
+            answers - words or indexes answers are drawn from, defaults to every word
+            seed:int - seed of the answer draws
+            max_guesses:int - guesses per game, at most the MAX_GUESSES the state layout has room for
+            layout:str - state layout, see wordle_state
+            device:torch.device - device of states_tensor and the action mask tensor, None for CPU
+        """
+        if not 0 < max_guesses <= utils.MAX_GUESSES:
+            raise ValueError(f'max_guesses must be 1 to {utils.MAX_GUESSES}')
+        self.__answer_pool = sim.answer_indexes(answers)
+        self.__rng = np.random.default_rng(seed)
+        self.__max_guesses = max_guesses
+        self.__patterns = wp.get_pattern_matrix()
+        num_words = self.__patterns.shape[1]
+        self.__answers = np.zeros(num_envs, dtype=np.int64)
+        self.__candidates = np.ones((num_envs, num_words), dtype=bool)
+        self.__masks = ActionMasks(self.__candidates, device)
+        self.__guesses = np.full((num_envs, utils.MAX_GUESSES), -1, dtype=np.int64)
+        self.__codes = np.zeros((num_envs, utils.MAX_GUESSES), dtype=np.int64)
+        self.__turns = np.zeros(num_envs, dtype=np.int64)
+        self.__last_scores = np.zeros(num_envs, dtype=np.float64)
+        self.__encoder = StateEncoder(num_envs, layout, device)
+        self.__episodes = 0
+        self.__wins = 0
+        self.__guesses_won = 0
+        self.reset()
+
+    def __len__(self) -> int:
+        return len(self.__answers)
+
+    def reset(self, envs: np.ndarray | None = None) -> np.ndarray:
+        """
+        Start new games in envs (default all), returns every env's state
+        """
+        envs = np.arange(len(self.__answers)) if envs is None else envs
+        self.__answers[envs] = self.__rng.choice(self.__answer_pool, len(envs))
+        self.__masks.reset(envs)
+        self.__guesses[envs] = -1
+        self.__codes[envs] = 0
+        self.__turns[envs] = 0
+        self.__last_scores[envs] = 0
+        return self.states()
+
+    def states(self) -> np.ndarray:
+        """
+        Get (B, state size) states of every game, a view of a buffer the next step overwrites
+        """
+        return self.__encoder.encode(self.__guesses, self.__codes)
+
+    def states_tensor(self):
+        """
+        states as a torch tensor on the env's device
+        """
+        self.states()
+        return self.__encoder.to_tensor(len(self.__answers))
+
+    def get_candidates(self) -> np.ndarray:
+        """
+        Get (B, N) bool mask of the words each game could still be, guessed words excluded
+        """
+        return self.__candidates
+
+    def get_masks(self) -> ActionMasks:
+        """
+        Get the action masks kept in step with the candidate masks
+        """
+        return self.__masks
+
+    def get_answers(self) -> np.ndarray:
+        return self.__answers
+
+    def get_turns(self) -> np.ndarray:
+        return self.__turns
+
+    def step(self, actions: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray, dict]:
+        """
+        Guess actions[i] in game i. Returns (next states, rewards, dones, info), where
+        finished games have already been reset so their next states start a new game.
+        info has 'codes', the feedback pattern of every guess, 'won', and 'final_states',
+        the (dones, state size) last states of the finished games.
+        """
+        actions = np.asarray(actions, dtype=np.int64)
+        envs = np.arange(len(self.__answers))
+        codes = self.__patterns[actions, self.__answers].astype(np.int64)
+        turns = self.__turns
+        self.__guesses[envs, turns] = actions
+        self.__codes[envs, turns] = codes
+        self.__turns += 1
+
+        self.__masks.prune(envs, actions, codes)
+        words_left = np.count_nonzero(self.__candidates, axis=1)
+        scores = 10.0 * PATTERN_TRITS[codes].sum(axis=1)
+        won = codes == wp.CORRECT_PATTERN
+        dones = won | (self.__turns >= self.__max_guesses)
+        guesses_left = self.__max_guesses - self.__turns
+        rewards = step_rewards(scores, self.__last_scores, words_left, guesses_left, won, dones, self.__patterns.shape[1])
+        self.__last_scores = scores
+
+        finished = np.flatnonzero(dones)
+        final_states = encode_states(self.__guesses[finished], self.__codes[finished], layout=self.__encoder.get_layout())
+        self.__episodes += len(finished)
+        self.__wins += int(np.count_nonzero(won))
+        self.__guesses_won += int(self.__turns[won].sum())
+        if len(finished):
+            self.reset(finished)
+        return self.states(), rewards, dones, {'codes': codes, 'won': won, 'final_states': final_states}
+
+    def get_stats(self) -> dict:
+        """
+        Get finished games, win rate and mean guesses of won games since creation
+        """
+        return {
+            'episodes': self.__episodes,
+            'wins': self.__wins,
+            'win_rate': self.__wins / self.__episodes if self.__episodes else 0.0,
+            'mean_guesses': self.__guesses_won / self.__wins if self.__wins else 0.0
+        }
+
+
+def main():
+    """
+    Time random valid rollouts
+    """
+    num_envs = int(sys.argv[1]) if len(sys.argv) > 1 else 256
+    steps = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    env = VecWordleEnv(num_envs, seed=0)
+    masks = env.get_masks()
+    rng = np.random.default_rng(0)
+    start = perf_counter()
+    total_reward = 0.0
+    for _ in range(steps):
+        _, rewards, _, _ = env.step(masks.sample(rng))
+        total_reward += float(rewards.sum())
+    seconds = perf_counter() - start
+    print(f'{num_envs} envs x {steps} steps in {round(seconds, 2)}s: {round(num_envs * steps / seconds)} steps/s')
+    print(env.get_stats(), f'mean reward per step: {round(total_reward / (num_envs * steps), 2)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+"""
+Bitset candidate filtering.
+
+Compiles the WordleAI hints dict into one 26 bit allowed letter mask per position and
+a required letter mask, then filters every word at once against a precomputed array
+of letter bits. Keeps exactly the words wordle_ai_utils.is_junk would keep.
+
+Constraint is the exact alternative: it keeps precisely the words that would have
+given every feedback seen so far, repeated letters included.
+"""
+import numpy as np
+
+import wordle
+import wordle_utils as utils
+import wordle_patterns as wp
+
+ALL_LETTERS = (1 << len(wp.ALPHABET)) - 1
+# Bit i of a mask set allows a letter to sit at exactly the positions in bitmask i
+ALL_MASK_SETS = (1 << wp.POSITION_MASKS) - 1
+MASK_SET_BITS = np.left_shift(np.uint64(1), np.arange(wp.POSITION_MASKS, dtype=np.uint64))
+POPCOUNTS = np.array([bin(mask).count('1') for mask in range(wp.POSITION_MASKS)])
+
+# (N, WORD_LEN) bit of each letter and (N,) bits of every letter in a word, ALLOWED_WORDS order
+LETTER_BITS = np.left_shift(np.uint32(1), wp.LETTERS.astype(np.uint32))
+WORD_BITS = np.bitwise_or.reduce(LETTER_BITS, axis=1)
+
+
+def letter_bit(letter: str) -> int:
+    return 1 << (ord(letter) - ord('a'))
+
+
+def compile_hints(hints_dict: dict) -> tuple[np.ndarray, int]:
+    """
+    Get (allowed letters per position, required letters) from a hints dict with
+    INCLUDED, EXCLUDED, CORRECT and GUESSED entries
+    """
+    allowed = np.full(utils.WORD_LEN, ALL_LETTERS, dtype=np.uint32)
+    required = 0
+    for letter, index in hints_dict['CORRECT']:
+        allowed[index] &= letter_bit(letter)
+    for letter in hints_dict['INCLUDED']:
+        required |= letter_bit(letter)
+    for letter in hints_dict['EXCLUDED']:
+        allowed &= ~np.uint32(letter_bit(letter))
+    for letter, index in hints_dict['GUESSED']:
+        allowed[index] &= ~np.uint32(letter_bit(letter))
+    return allowed, required
+
+
+def filter_words(allowed: np.ndarray, required: int, candidates: np.ndarray | None = None) -> np.ndarray:
+    """
+    Get a new (N,) bool candidate mask over ALLOWED_WORDS of words whose every letter is
+    allowed at its position and that contain every required letter.
+    candidates narrows an existing mask instead of starting from every word.
+    """
+    fits = np.all(LETTER_BITS & allowed, axis=1)
+    fits &= (WORD_BITS & np.uint32(required)) == required
+    if candidates is not None:
+        fits &= candidates
+    return fits
+
+
+def filter_hints(hints_dict: dict, candidates: np.ndarray | None = None) -> np.ndarray:
+    """
+    Compile hints_dict and filter candidates with it
+    """
+    allowed, required = compile_hints(hints_dict)
+    return filter_words(allowed, required, candidates)
+
+
+def remaining_words(candidates: np.ndarray) -> list[str]:
+    """
+    Get words left in a candidate mask
+    """
+    return [wordle.ALLOWED_WORDS[i] for i in np.flatnonzero(candidates)]
+
+
+class Constraint:
+    """
+    Everything known about the answer from feedback so far, as one set of allowed
+    position masks per letter: the answer fits if, for every letter, the bitmask of
+    positions that letter holds in the answer is in the letter's set. Feedback for a
+    letter only depends on where it sits in the guess and the answer (see
+    wordle_patterns.build_feedback_table), so intersecting these sets is exact.
+
+    Min and max letter counts and per position letter masks are derived from the sets.
+    Plain count bounds are not stored on their own because Guess's repeated letter
+    feedback, e.g. marking a later copy yellow instead of the first, can't always be
+    expressed by them without dropping the answer.
+    """
+    __slots__ = ['__mask_sets']
+
+    def __init__(self):
+        self.__mask_sets = np.full(len(wp.ALPHABET), ALL_MASK_SETS, dtype=np.uint32)
+
+    def update(self, feedback: list):
+        """
+        Add a guess's feedback, the list returned by Guess.get_feedback()
+        """
+        trits = np.array([wp.SCORE_TO_TRIT[score] for _, score in feedback])
+        letter_positions = {}
+        for i, (letter, _) in enumerate(feedback):
+            letter_positions.setdefault(letter, []).append(i)
+
+        for letter, positions in letter_positions.items():
+            guess_mask = sum(1 << i for i in positions)
+            # Answer position masks that would give the same feedback at this letter's positions
+            fits = np.all(wp.FEEDBACK_TABLE[guess_mask][:, positions] == trits[positions], axis=1)
+            self.__mask_sets[ord(letter) - ord('a')] &= np.uint32(MASK_SET_BITS[fits].sum())
+
+    def matches(self, candidates: np.ndarray | None = None) -> np.ndarray:
+        """
+        Get (N,) bool mask over ALLOWED_WORDS of words consistent with every update,
+        narrowed by candidates if given
+        """
+        letters = np.flatnonzero(self.__mask_sets != ALL_MASK_SETS)
+        fits = np.ones(len(wp.LETTER_MASKS), dtype=bool) if candidates is None else candidates.copy()
+        for letter in letters:
+            fits &= ((self.__mask_sets[letter] >> wp.LETTER_MASKS[:, letter]) & 1).astype(bool)
+        return fits
+
+    def get_mask_sets(self) -> np.ndarray:
+        """
+        Get (26,) allowed position mask sets
+        """
+        return self.__mask_sets
+
+    def __allowed_masks(self, letter: int) -> np.ndarray:
+        return np.flatnonzero((int(self.__mask_sets[letter]) >> np.arange(wp.POSITION_MASKS)) & 1)
+
+    def get_min_counts(self) -> np.ndarray:
+        """
+        Fewest copies of each letter the answer can have
+        """
+        return np.array([POPCOUNTS[self.__allowed_masks(letter)].min(initial=utils.WORD_LEN) for letter in range(len(wp.ALPHABET))])
+
+    def get_max_counts(self) -> np.ndarray:
+        """
+        Most copies of each letter the answer can have
+        """
+        return np.array([POPCOUNTS[self.__allowed_masks(letter)].max(initial=0) for letter in range(len(wp.ALPHABET))])
+
+    def get_position_masks(self) -> np.ndarray:
+        """
+        Get (WORD_LEN,) 26 bit masks of the letters still allowed at each position
+        """
+        allowed = np.zeros(utils.WORD_LEN, dtype=np.uint32)
+        for letter in range(len(wp.ALPHABET)):
+            reachable = np.bitwise_or.reduce(self.__allowed_masks(letter), initial=0)
+            for i in range(utils.WORD_LEN):
+                if reachable >> i & 1:
+                    allowed[i] |= np.uint32(1 << letter)
+        return allowed
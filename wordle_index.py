@@ -0,0 +1,166 @@
+"""
+Inverted index over the pattern matrix.
+
+Answers the questions wordle_ai used to ask the MySQL pattern_locations table, which
+answers give pattern p for guess g and which answers survive several guesses, in
+process with no database. MySQLPatternIndex keeps the old SQL as an optional backend.
+"""
+import numpy as np
+
+import wordle_patterns as wp
+
+try:
+    import aiomysql
+except ImportError:
+    aiomysql = None
+
+
+class PatternIndex:
+    """
+    Maps (guess_idx, pattern_idx) to the sorted array of answer indexes giving that
+    pattern. Each guess row is bucketed the first time it is asked for: a stable argsort
+    of the row groups answers by pattern while keeping them sorted inside a bucket,
+    and a bincount gives where each bucket starts.
+    """
+    __slots__ = ['__patterns', '__buckets', '__partitions']
+
+    def __init__(self, patterns: np.ndarray | None = None, partitions=None):
+        """
+        Params:
+            patterns:np.ndarray - (guesses, answers) pattern matrix, defaults to the shared
+                                  memory mapped wordle_patterns.get_pattern_matrix()
+            partitions:FirstGuessPartitions - precomputed buckets over every answer,
+                                              read instead of bucketing rows
+        """
+        self.__patterns = wp.get_pattern_matrix() if patterns is None else patterns
+        self.__buckets = {}
+        if partitions is not None and len(partitions.get_answers()) != self.__patterns.shape[1]:
+            raise ValueError('partitions must cover every answer of the pattern matrix')
+        self.__partitions = partitions
+
+    def __bucket_row(self, guess_idx: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Get (answers ordered by pattern, bucket offsets) for a guess, building it if needed
+        """
+        if self.__partitions is not None:
+            return self.__partitions.opener_row(guess_idx)
+        if guess_idx not in self.__buckets:
+            row = np.asarray(self.__patterns[guess_idx])
+            order = np.argsort(row, kind='stable').astype(np.uint16)
+            offsets = np.zeros(wp.NUM_PATTERNS + 1, dtype=np.int64)
+            np.cumsum(np.bincount(row, minlength=wp.NUM_PATTERNS), out=offsets[1:])
+            order.flags.writeable = False
+            self.__buckets[guess_idx] = (order, offsets)
+        return self.__buckets[guess_idx]
+
+    def get_patterns(self) -> np.ndarray:
+        """
+        Get pattern matrix the index was built from
+        """
+        return self.__patterns
+
+    def remaining(self, guess_idx: int, pattern_idx: int, exclude=None) -> np.ndarray:
+        """
+        Sorted answer indexes that give pattern_idx for guess_idx, less any in exclude.
+        Same as SELECT col_idx FROM pattern_locations WHERE pattern_idx = ? AND row_idx = ?
+        """
+        order, offsets = self.__bucket_row(guess_idx)
+        answers = order[offsets[pattern_idx]:offsets[pattern_idx + 1]]
+        if exclude is not None:
+            answers = answers[~np.isin(answers, exclude)]
+        return answers
+
+    def count(self, guess_idx: int, pattern_idx: int) -> int:
+        """
+        Number of answers that give pattern_idx for guess_idx
+        """
+        _, offsets = self.__bucket_row(guess_idx)
+        return int(offsets[pattern_idx + 1] - offsets[pattern_idx])
+
+    def partition_sizes(self, guess_idx: int, candidates=None) -> np.ndarray:
+        """
+        Number of answers per pattern for guess_idx, (NUM_PATTERNS,) int64.
+        With candidates (sorted answer indexes) only those answers are counted, which is
+        the per pattern count of a two guess intersection in one bincount.
+        """
+        if candidates is None:
+            _, offsets = self.__bucket_row(guess_idx)
+            return np.diff(offsets)
+        return np.bincount(self.__patterns[guess_idx, candidates], minlength=wp.NUM_PATTERNS)
+
+    def remaining_after(self, history, exclude=None) -> np.ndarray:
+        """
+        Sorted answer indexes consistent with every (guess_idx, pattern_idx) in history,
+        less any in exclude. The first pair comes straight from the index and later pairs
+        only look at the surviving answers' columns, so a two guess intersection is
+        one bucket slice and one comparison.
+        """
+        history = list(history)
+        if not history:
+            raise ValueError('history needs at least one (guess_idx, pattern_idx) pair')
+        guess_idx, pattern_idx = history[0]
+        answers = self.remaining(guess_idx, pattern_idx, exclude)
+        for guess_idx, pattern_idx in history[1:]:
+            answers = answers[self.__patterns[guess_idx, answers] == pattern_idx]
+        return answers
+
+    def count_after(self, history, exclude=None) -> int:
+        """
+        Number of answers consistent with every (guess_idx, pattern_idx) in history
+        """
+        return len(self.remaining_after(history, exclude))
+
+    def clear(self):
+        """
+        Drop bucketed rows, they are rebuilt on next use
+        """
+        self.__buckets.clear()
+
+
+class MySQLPatternIndex:
+    """
+    Same questions as PatternIndex asked of the pattern_locations table through aiomysql.
+    Every method is a coroutine and opens its own connection.
+    """
+    __slots__ = ['__db_config']
+
+    def __init__(self, db_config: dict):
+        if aiomysql is None:
+            raise ImportError('MySQLPatternIndex needs aiomysql, install it with `python -m pip install aiomysql`')
+        self.__db_config = db_config
+
+    async def __fetchall(self, query: str) -> tuple:
+        async with aiomysql.connect(**self.__db_config) as db_conn:
+            db_conn: aiomysql.Connection
+            async with db_conn.cursor() as cursor:
+                cursor: aiomysql.Cursor
+                await cursor.execute(query)
+                return await cursor.fetchall()
+
+    @staticmethod
+    def __history_query(select: str, history, exclude) -> str:
+        """
+        Build a self join of pattern_locations with one alias per guess in history
+        """
+        joins = [f'pattern_locations pl{i}' for i in range(len(history))]
+        conditions = [f'pl0.col_idx = pl{i}.col_idx' for i in range(1, len(history))]
+        for i, (guess_idx, pattern_idx) in enumerate(history):
+            conditions.append(f'pl{i}.pattern_idx = {pattern_idx} AND pl{i}.row_idx = {guess_idx}')
+        if exclude is not None and len(exclude) > 0:
+            conditions.append(f'pl0.col_idx NOT IN ({", ".join(str(int(idx)) for idx in exclude)})')
+        return f'SELECT {select} FROM {", ".join(joins)} WHERE {" AND ".join(conditions)}'
+
+    async def remaining(self, guess_idx: int, pattern_idx: int, exclude=None) -> np.ndarray:
+        return await self.remaining_after([(guess_idx, pattern_idx)], exclude)
+
+    async def count(self, guess_idx: int, pattern_idx: int) -> int:
+        return await self.count_after([(guess_idx, pattern_idx)])
+
+    async def remaining_after(self, history, exclude=None) -> np.ndarray:
+        query = self.__history_query('pl0.col_idx', list(history), exclude)
+        rows = await self.__fetchall(f'{query} ORDER BY pl0.col_idx')
+        return np.array([row[0] for row in rows], dtype=np.uint16)
+
+    async def count_after(self, history, exclude=None) -> int:
+        rows = await self.__fetchall(self.__history_query('COUNT(*)', list(history), exclude))
+        return rows[0][0]
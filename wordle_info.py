@@ -0,0 +1,155 @@
+"""
+Expected information (entropy) of guesses against a set of remaining answers.
+
+Every guess is scored at once from rows of the pattern matrix: each row's patterns
+are shifted into their own block of NUM_PATTERNS bins so a single bincount counts
+the partition of every guess in a chunk.
+"""
+import json
+from time import perf_counter
+
+import numpy as np
+
+import wordle_patterns as wp
+
+# Rough number of pattern matrix cells gathered per chunk
+CHUNK_CELLS = 1 << 23
+# Candidate count up to which candidate_info sorts bucket ids instead of counting every bin
+SORT_BUCKETS_LIMIT = 64
+
+
+def candidate_indexes(candidates, num_words: int) -> np.ndarray:
+    """
+    Get sorted answer indexes from a boolean mask or an array of indexes.
+    None means every word is still a candidate.
+    """
+    if candidates is None:
+        return np.arange(num_words)
+    candidates = np.asarray(candidates)
+    if candidates.dtype == bool:
+        return np.flatnonzero(candidates)
+    return np.sort(candidates)
+
+
+def pattern_counts(candidates=None, guess_idxs=None, patterns: np.ndarray | None = None) -> np.ndarray:
+    """
+    Get (guesses, NUM_PATTERNS) array of how many candidates give each pattern for each guess.
+    guess_idxs defaults to every allowed guess.
+    """
+    patterns = wp.get_pattern_matrix() if patterns is None else patterns
+    answers = candidate_indexes(candidates, patterns.shape[1])
+    every_answer = len(answers) == patterns.shape[1]
+    guess_idxs = np.arange(patterns.shape[0]) if guess_idxs is None else np.asarray(guess_idxs)
+
+    counts = np.empty((len(guess_idxs), wp.NUM_PATTERNS), dtype=np.int64)
+    chunk_size = max(1, CHUNK_CELLS // max(1, len(answers)))
+    for start in range(0, len(guess_idxs), chunk_size):
+        chunk = guess_idxs[start:start + chunk_size]
+        rows = patterns[chunk] if every_answer else patterns[chunk][:, answers]
+        bins = rows + (np.arange(len(chunk), dtype=np.int64) * wp.NUM_PATTERNS)[:, None]
+        counts[start:start + len(chunk)] = np.bincount(bins.ravel(), minlength=len(chunk) * wp.NUM_PATTERNS).reshape(len(chunk), wp.NUM_PATTERNS)
+    return counts
+
+
+def answer_pattern_counts(candidates, answer_patterns: np.ndarray | None = None) -> np.ndarray:
+    """
+    pattern_counts for every allowed guess read from the answer major matrix. Only the
+    candidates' rows are touched, so this is the cheap path when few answers remain.
+    """
+    answer_patterns = wp.get_answer_pattern_matrix() if answer_patterns is None else answer_patterns
+    num_guesses = answer_patterns.shape[1]
+    answers = candidate_indexes(candidates, answer_patterns.shape[0])
+    guess_bins = np.arange(num_guesses, dtype=np.int64) * wp.NUM_PATTERNS
+
+    counts = np.zeros(num_guesses * wp.NUM_PATTERNS, dtype=np.int64)
+    chunk_size = max(1, CHUNK_CELLS // num_guesses)
+    for start in range(0, len(answers), chunk_size):
+        rows = answer_patterns[answers[start:start + chunk_size]]
+        counts += np.bincount((rows + guess_bins).ravel(), minlength=len(counts))
+    return counts.reshape(num_guesses, wp.NUM_PATTERNS)
+
+
+def entropy_from_counts(counts: np.ndarray) -> np.ndarray:
+    """
+    Expected bits of information per row of partition counts:
+    log2(n) - sum(c * log2(c)) / n for n candidates split into buckets of size c
+    """
+    counts = np.asarray(counts, dtype=np.float64)
+    totals = counts.sum(axis=-1)
+    log_counts = np.log2(counts, out=np.zeros_like(counts), where=counts > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        info = np.log2(totals) - (counts * log_counts).sum(axis=-1) / totals
+    return np.where(totals > 0, info, 0.0)
+
+
+def expected_info(candidates=None, guess_idxs=None, patterns: np.ndarray | None = None) -> np.ndarray:
+    """
+    Expected bits of information of every guess in guess_idxs (default all allowed guesses)
+    when the answer is uniformly one of candidates, a boolean mask or index array over ALLOWED_WORDS
+    """
+    return entropy_from_counts(pattern_counts(candidates, guess_idxs, patterns))
+
+
+def bucket_info(buckets: np.ndarray, sizes: np.ndarray, num_guesses: int, total: int) -> np.ndarray:
+    """
+    Expected bits per guess from only the nonempty buckets, given as
+    guess * NUM_PATTERNS + pattern ids and their sizes
+    """
+    sizes = sizes.astype(np.float64)
+    sums = np.bincount(buckets // wp.NUM_PATTERNS, weights=sizes * np.log2(sizes), minlength=num_guesses)
+    return np.log2(total) - sums / total
+
+
+def candidate_buckets(candidates, answer_patterns: np.ndarray | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Get the nonempty buckets of every allowed guess as (ascending guess * NUM_PATTERNS + pattern
+    ids, sizes), read from the answer major matrix. Few candidates leave most buckets empty,
+    so up to SORT_BUCKETS_LIMIT the ids are sorted instead of clearing and scanning all bins.
+    """
+    answer_patterns = wp.get_answer_pattern_matrix() if answer_patterns is None else answer_patterns
+    answers = candidate_indexes(candidates, answer_patterns.shape[0])
+    if len(answers) <= SORT_BUCKETS_LIMIT:
+        guess_bins = np.arange(answer_patterns.shape[1], dtype=np.int32) * wp.NUM_PATTERNS
+        bins = np.sort((answer_patterns[answers] + guess_bins).ravel())
+        starts = np.flatnonzero(np.diff(bins, prepend=-1))
+        return bins[starts], np.diff(np.append(starts, len(bins)))
+
+    counts = answer_pattern_counts(answers, answer_patterns).ravel()
+    nonempty = np.flatnonzero(counts)
+    return nonempty, counts[nonempty]
+
+
+def candidate_info(candidates, answer_patterns: np.ndarray | None = None) -> np.ndarray:
+    """
+    expected_info of every allowed guess through candidate_buckets
+    """
+    answer_patterns = wp.get_answer_pattern_matrix() if answer_patterns is None else answer_patterns
+    answers = candidate_indexes(candidates, answer_patterns.shape[0])
+    if len(answers) == 0:
+        return np.zeros(answer_patterns.shape[1])
+    buckets, sizes = candidate_buckets(answers, answer_patterns)
+    return bucket_info(buckets, sizes, answer_patterns.shape[1], len(answers))
+
+
+def first_guess_info(patterns: np.ndarray | None = None) -> dict:
+    """
+    Expected information of every first guess keyed by stringified word index,
+    the layout of nyt_first_guess_info.json
+    """
+    info = expected_info(patterns=patterns)
+    return {str(i): float(bits) for i, bits in enumerate(info)}
+
+
+def main():
+    """
+    Regenerate ./assets/nyt_first_guess_info.json
+    """
+    start = perf_counter()
+    info = first_guess_info()
+    with open('./assets/nyt_first_guess_info.json', 'w', encoding='utf-8') as file:
+        json.dump(info, file)
+    print(f'Scored {len(info)} first guesses in {round(perf_counter() - start, 2)}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+"""
+Resumable second guess information precompute.
+
+For a first guess, every (first_pattern, second_guess) pair where second_guess is still
+a possible answer after first_pattern gets the expected information of second_guess over
+those remaining answers. The pairs are laid out in the order PatternIndex buckets the
+first guess's row, pattern by pattern, so each first guess has exactly one float32 slot
+per allowed word and a slot's position is known from the bucket offsets alone.
+
+Each first guess writes {idx}.npy holding the values and {idx}.json, a manifest of the
+patterns finished so far. Values are flushed before the manifest is replaced, so after a
+crash the job picks up at the first pattern the manifest does not list.
+"""
+import json
+import os
+from time import perf_counter
+
+import numpy as np
+
+import wordle
+import wordle_utils as utils
+from wordle_index import PatternIndex
+from wordle_info import expected_info
+
+SECOND_GUESS_INFO_DIR = f'.{utils.ASSETS_PATH}/second_guess_info'
+SECOND_GUESS_INFO_VERSION = 1
+# Rows computed between manifest checkpoints
+CHECKPOINT_ROWS = 2048
+
+
+def second_guess_info_paths(first_guess_idx: int, out_dir: str = SECOND_GUESS_INFO_DIR) -> tuple[str, str]:
+    """
+    Get (values path, manifest path) for a first guess
+    """
+    return os.path.join(out_dir, f'{first_guess_idx}.npy'), os.path.join(out_dir, f'{first_guess_idx}.json')
+
+
+def new_manifest(first_guess_idx: int, rows_total: int) -> dict:
+    """
+    Manifest of a first guess with nothing computed yet
+    """
+    return {
+        'version': SECOND_GUESS_INFO_VERSION,
+        'first_guess_idx': first_guess_idx,
+        'words_hash': utils.word_list_hash(wordle.ALLOWED_WORDS).hex(),
+        'rows_total': rows_total,
+        'rows_done': 0,
+        'patterns_done': [],
+        'complete': False,
+        'seconds': 0.0
+    }
+
+
+def read_manifest(manifest_path: str) -> dict | None:
+    """
+    Read a manifest, None if it does not exist yet
+    """
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as file:
+            manifest = json.load(file)
+    except FileNotFoundError:
+        return None
+    if manifest.get('version') != SECOND_GUESS_INFO_VERSION:
+        raise ValueError(f'{manifest_path} is version {manifest.get("version")}, expected {SECOND_GUESS_INFO_VERSION}')
+    if manifest['words_hash'] != utils.word_list_hash(wordle.ALLOWED_WORDS).hex():
+        raise ValueError(f'{manifest_path} was written for a different word list')
+    return manifest
+
+
+def write_manifest(manifest_path: str, manifest: dict):
+    """
+    Replace manifest atomically so a crash leaves either the old or the new one
+    """
+    tmp_path = f'{manifest_path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        json.dump(manifest, file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, manifest_path)
+
+
+def run_second_guess_job(first_guess_idx: int, out_dir: str = SECOND_GUESS_INFO_DIR, index: PatternIndex | None = None,
+                         checkpoint_rows: int = CHECKPOINT_ROWS, verbose: bool = False) -> dict:
+    """
+    Compute, or finish computing, second guess info for a first guess.
+    Returns {'first_guess_idx', 'rows', 'seconds', 'rows_per_second'} for this run.
+    """
+    start = perf_counter()
+    index = PatternIndex() if index is None else index
+    patterns = index.get_patterns()
+    sizes = index.partition_sizes(first_guess_idx)
+    offsets = np.concatenate([[0], np.cumsum(sizes)])
+
+    os.makedirs(out_dir, exist_ok=True)
+    values_path, manifest_path = second_guess_info_paths(first_guess_idx, out_dir)
+    manifest = read_manifest(manifest_path)
+    if manifest is None or not os.path.exists(values_path):
+        manifest = new_manifest(first_guess_idx, int(offsets[-1]))
+        values = np.lib.format.open_memmap(values_path, mode='w+', dtype=np.float32, shape=(int(offsets[-1]),))
+        values[:] = np.nan
+        values.flush()
+        write_manifest(manifest_path, manifest)
+    else:
+        values = np.lib.format.open_memmap(values_path, mode='r+')
+
+    done = set(manifest['patterns_done'])
+    rows = 0
+    rows_since_checkpoint = 0
+    for pattern_idx in np.flatnonzero(sizes):
+        pattern_idx = int(pattern_idx)
+        if pattern_idx in done:
+            continue
+        remaining = index.remaining(first_guess_idx, pattern_idx)
+        values[offsets[pattern_idx]:offsets[pattern_idx + 1]] = expected_info(remaining, remaining, patterns)
+        manifest['patterns_done'].append(pattern_idx)
+        rows += len(remaining)
+        rows_since_checkpoint += len(remaining)
+        if rows_since_checkpoint >= checkpoint_rows:
+            values.flush()
+            manifest['rows_done'] += rows_since_checkpoint
+            write_manifest(manifest_path, manifest)
+            rows_since_checkpoint = 0
+
+    seconds = perf_counter() - start
+    values.flush()
+    manifest['rows_done'] += rows_since_checkpoint
+    manifest['complete'] = manifest['rows_done'] == manifest['rows_total']
+    manifest['seconds'] += seconds
+    write_manifest(manifest_path, manifest)
+
+    stats = {
+        'first_guess_idx': first_guess_idx,
+        'rows': rows,
+        'seconds': seconds,
+        'rows_per_second': rows / seconds if seconds > 0 else 0.0
+    }
+    if verbose:
+        print(f'[{first_guess_idx}] {rows} rows in {round(seconds, 2)}s ({round(stats["rows_per_second"])} rows/s)')
+    return stats
+
+
+def pending_first_guesses(out_dir: str = SECOND_GUESS_INFO_DIR) -> list[int]:
+    """
+    First guess indexes without a complete manifest in out_dir
+    """
+    pending = []
+    for first_guess_idx in range(len(wordle.ALLOWED_WORDS)):
+        manifest = read_manifest(second_guess_info_paths(first_guess_idx, out_dir)[1])
+        if manifest is None or not manifest['complete']:
+            pending.append(first_guess_idx)
+    return pending
+
+
+def load_second_guess_info(first_guess_idx: int, out_dir: str = SECOND_GUESS_INFO_DIR) -> np.ndarray:
+    """
+    Open a first guess's values read only, slots not computed yet are NaN
+    """
+    return np.load(second_guess_info_paths(first_guess_idx, out_dir)[0], mmap_mode='r')
+
+
+def second_guess_info(first_guess_idx: int, first_pattern_idx: int, second_guess_idx: int,
+                      index: PatternIndex, out_dir: str = SECOND_GUESS_INFO_DIR) -> float:
+    """
+    Look up one (first_guess, first_pattern, second_guess) value.
+    second_guess must be a possible answer after first_pattern.
+    """
+    remaining = index.remaining(first_guess_idx, first_pattern_idx)
+    slot = int(np.searchsorted(remaining, second_guess_idx))
+    if slot == len(remaining) or remaining[slot] != second_guess_idx:
+        raise KeyError(f'{wordle.ALLOWED_WORDS[second_guess_idx]} is not possible after pattern {first_pattern_idx} of {wordle.ALLOWED_WORDS[first_guess_idx]}')
+    offset = int(index.partition_sizes(first_guess_idx)[:first_pattern_idx].sum())
+    return float(load_second_guess_info(first_guess_idx, out_dir)[offset + slot])
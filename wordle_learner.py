@@ -0,0 +1,239 @@
+"""
+Parallel actor/learner training of the Q-network.
+
+Actor processes each step a VecWordleEnv with a CPU copy of the policy, picking the
+best valid action (see wordle_masks) or a random valid one with a decaying epsilon,
+and push every step's transitions to the learner through a bounded queue. The
+learner drains the queue into its ReplayBuffer, trains on sampled batches without
+waiting for the actors, and every PUBLISH_EVERY updates copies its weights into a
+shared memory model that the actors reload when its version changes. Actors run
+one torch thread each and the learner gets the remaining cores.
+
+Environment steps and learner updates are counted separately and reported as
+steps/s and updates/s, along with the actors' win rate.
+
+    python wordle_learner.py [actors] [envs_per_actor] [seconds]
+"""
+import os
+import queue
+import sys
+from time import perf_counter
+
+import numpy as np
+import torch
+import torch.multiprocessing as mp
+
+from model import Linear_QNet, QTrainer
+from wordle_buffer import ReplayBuffer
+from wordle_env import VecWordleEnv
+from wordle_state import STATE_SIZE
+
+HIDDEN_LAYERS = [780, 26]
+NUM_ACTIONS = 14855
+MEMORY_SIZE = 200_000
+BATCH_SIZE = 1024
+LR = 0.001
+GAMMA = 0.9
+# Transitions in the buffer before the learner starts updating
+MIN_MEMORY = 10_000
+# Learner updates between weight publishes and between target network syncs
+PUBLISH_EVERY = 50
+TARGET_UPDATE = 500
+# Actor env steps between checks for newer weights
+SYNC_EVERY = 10
+# Step batches an actor can queue before it waits for the learner
+QUEUE_SIZE = 64
+# Epsilon decays linearly from START to END over DECAY_STEPS of each actor's env steps
+EPSILON_START = 1.0
+EPSILON_END = 0.05
+EPSILON_DECAY_STEPS = 20_000
+REPORT_SECONDS = 10.0
+
+
+def epsilon(step: int) -> float:
+    """
+    Exploration rate of an actor after step env steps
+    """
+    progress = min(step / EPSILON_DECAY_STEPS, 1.0)
+    return EPSILON_START + (EPSILON_END - EPSILON_START) * progress
+
+
+def make_model(device=None) -> Linear_QNet:
+    return Linear_QNet(STATE_SIZE, HIDDEN_LAYERS, NUM_ACTIONS, device)
+
+
+def actor(actor_id: int, num_envs: int, shared_model: Linear_QNet, version, lock, transitions, steps, stop, seed: int):
+    """
+    Step num_envs games with the latest published policy until stop is set, putting
+    (states, actions, rewards, next states, dones, packed next valid actions, episodes,
+    wins) on transitions. Next states of finished games are their final states, not
+    the reset ones; their valid actions are the new game's, which done ignores.
+    """
+    try:
+        run_actor(num_envs, shared_model, version, lock, transitions, steps, stop, seed)
+    except KeyboardInterrupt:
+        # The learner stops the actors on Ctrl-C
+        pass
+
+
+def run_actor(num_envs: int, shared_model: Linear_QNet, version, lock, transitions, steps, stop, seed: int):
+    # Exit without waiting for queued steps to reach a learner that stopped reading
+    transitions.cancel_join_thread()
+    torch.set_num_threads(1)
+    rng = np.random.default_rng(seed)
+    env = VecWordleEnv(num_envs, seed=seed)
+    masks = env.get_masks()
+    model = make_model()
+    model.requires_grad_(False)
+    local_version = -1
+    states = env.states().copy()
+    step = 0
+    while not stop.is_set():
+        if step % SYNC_EVERY == 0 and version.value != local_version:
+            with lock:
+                model.load_state_dict(shared_model.state_dict())
+                local_version = version.value
+
+        with torch.no_grad():
+            actions = masks.select(model(torch.from_numpy(states))).numpy()
+        explore = rng.random(num_envs) < epsilon(step * num_envs)
+        if explore.any():
+            actions[explore] = masks.sample(rng)[explore]
+
+        next_states, rewards, dones, info = env.step(actions)
+        next_states = next_states.copy()
+        stored_next_states = next_states.copy()
+        stored_next_states[dones] = info['final_states']
+        next_valid = np.packbits(env.get_candidates(), axis=1)
+        episodes = int(np.count_nonzero(dones))
+        item = (states, actions, rewards.astype(np.float32), stored_next_states, dones, next_valid, episodes,
+                int(np.count_nonzero(info['won'])))
+        while not stop.is_set():
+            try:
+                transitions.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        with steps.get_lock():
+            steps.value += num_envs
+        states = next_states
+        step += 1
+
+
+def publish(model: Linear_QNet, shared_model: Linear_QNet, version, lock):
+    """
+    Copy the learner's weights into the shared model and bump its version
+    """
+    with lock:
+        shared_model.load_state_dict(model.state_dict())
+        version.value += 1
+
+
+def train(num_actors: int = 2, envs_per_actor: int = 64, seconds: float | None = None, device=None,
+          prioritized: bool = False, mixed_precision: bool = False, seed: int = 0):
+    """
+    Run actors in child processes and the learner in this one for seconds (default
+    until interrupted), saving the model to model/learner_model.pth when stopped.
+
+    Params:
+        num_actors:int - actor processes
+        envs_per_actor:int - games each actor steps at once
+        seconds:float - how long to train, None to run until KeyboardInterrupt
+        device:torch.device - learner device, actors always run on CPU
+        prioritized:bool - sample the replay buffer by TD error
+        mixed_precision:bool - bfloat16 forward passes on a CPU learner
+        seed:int - base seed of the actors' envs and the learner's sampling
+    """
+    context = mp.get_context('spawn')
+    model = make_model(device)
+    trainer = QTrainer(model, lr=LR, gamma=GAMMA, target_update=TARGET_UPDATE, mixed_precision=mixed_precision)
+    shared_model = make_model()
+    shared_model.share_memory()
+    version = context.Value('q', 0)
+    lock = context.Lock()
+    publish(model, shared_model, version, lock)
+    transitions = context.Queue(maxsize=QUEUE_SIZE * num_actors)
+    steps = context.Value('q', 0)
+    stop = context.Event()
+    torch.set_num_threads(max(1, (os.cpu_count() or 1) - num_actors))
+
+    actors = [
+        context.Process(target=actor, args=(i, envs_per_actor, shared_model, version, lock, transitions, steps, stop, seed + 1 + i), daemon=True)
+        for i in range(num_actors)
+    ]
+    for process in actors:
+        process.start()
+
+    memory = ReplayBuffer(MEMORY_SIZE, STATE_SIZE, prioritized, num_actions=NUM_ACTIONS)
+    rng = np.random.default_rng(seed)
+    updates = episodes = wins = 0
+    start = last_report = perf_counter()
+    last_steps = last_updates = 0
+    try:
+        while seconds is None or perf_counter() - start < seconds:
+            received = 0
+            while True:
+                try:
+                    # Wait for data only while there is not enough to train on
+                    block = len(memory) < MIN_MEMORY and received == 0
+                    states, actions, rewards, next_states, dones, next_valid, done_episodes, done_wins = transitions.get(
+                        block=block, timeout=0.1 if block else None)
+                except queue.Empty:
+                    break
+                memory.extend(states, actions, rewards, next_states, dones, next_valid)
+                episodes += done_episodes
+                wins += done_wins
+                received += 1
+                if received >= num_actors:
+                    break
+
+            if len(memory) >= MIN_MEMORY:
+                batch = memory.sample(BATCH_SIZE, rng)
+                td_errors = trainer.train_step(batch['states'], batch['actions'], batch['rewards'], batch['next_states'],
+                                               batch['dones'], batch['next_valid'], weights=batch['weights'] if prioritized else None)
+                memory.update_priorities(batch['indexes'], td_errors)
+                updates += 1
+                if updates % PUBLISH_EVERY == 0:
+                    publish(model, shared_model, version, lock)
+
+            now = perf_counter()
+            if now - last_report >= REPORT_SECONDS:
+                elapsed = now - last_report
+                total_steps = steps.value
+                print(f'{round(now - start)}s: {round((total_steps - last_steps) / elapsed)} steps/s, '
+                      f'{round((updates - last_updates) / elapsed, 1)} updates/s, {total_steps} steps, {updates} updates, '
+                      f'{episodes} games, win rate {round(wins / episodes, 4) if episodes else 0.0}, memory {len(memory)}')
+                last_report, last_steps, last_updates = now, total_steps, updates
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        for process in actors:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        model.save('learner_model.pth')
+    elapsed = perf_counter() - start
+    return {
+        'seconds': elapsed,
+        'steps': steps.value,
+        'updates': updates,
+        'steps_per_second': steps.value / elapsed,
+        'updates_per_second': updates / elapsed,
+        'episodes': episodes,
+        'win_rate': wins / episodes if episodes else 0.0
+    }
+
+
+def main():
+    """
+    Train for a while and print throughput
+    """
+    num_actors = int(sys.argv[1]) if len(sys.argv) > 1 else max(1, (os.cpu_count() or 2) // 2)
+    envs_per_actor = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+    seconds = float(sys.argv[3]) if len(sys.argv) > 3 else None
+    print(train(num_actors, envs_per_actor, seconds))
+
+
+if __name__ == '__main__':
+    main()
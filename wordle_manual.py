@@ -6,9 +6,11 @@ Author: Tony Audi teavse@rit.edu
 """
 import ast
 
+import wordle_words
+
 ASSETS_PATH = '/assets'
 POSSIBLE_ANSWERS_PATH = f'.{ASSETS_PATH}/wordle-allowed-guesses.txt'
-WORDS = sorted([word.strip() for word in open(POSSIBLE_ANSWERS_PATH).readlines()]) # Possible answers
+WORDS = wordle_words.get_word_list(POSSIBLE_ANSWERS_PATH).get_words() # Possible answers
 CONDITIONS_PATH = f'.{ASSETS_PATH}/conditions.json'
 
 with open(CONDITIONS_PATH) as f:
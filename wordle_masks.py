@@ -0,0 +1,144 @@
+"""
+Action masks for the Q-network as persistent arrays and tensors.
+
+The valid actions of B games are a (B, N) bool mask kept for the whole run and narrowed
+in place as feedback prunes candidates, e.g. VecWordleEnv's candidate mask. On CPU the
+torch tensor shares the mask's memory, so pruning the array is all the update there is;
+on another device only the rows that changed are copied over. The letter probability
+prior that WordleAI.get_prob_action_mask rebuilt every step is loaded once per device.
+Picking actions is then prediction * prior with invalid actions filled with -inf and an
+argmax over each row.
+"""
+import functools
+
+import numpy as np
+
+import wordle_patterns as wp
+import wordle_weights as ww
+
+try:
+    import torch
+except ImportError:
+    torch = None
+
+# Additive mask value of invalid actions, the value get_valid_action_mask used
+INVALID_ACTION = -1e6
+
+
+@functools.cache
+def prior_array() -> np.ndarray:
+    """
+    Letter probability weight of every word as float32, 0 where a word has none
+    """
+    return np.nan_to_num(ww.get_weights('letter_prob'), nan=0.0).astype(np.float32)
+
+
+@functools.cache
+def prior_tensor(device=None):
+    """
+    prior_array as a tensor, loaded once per device
+    """
+    if torch is None:
+        raise ImportError('torch is needed for tensor masks')
+    prior = torch.from_numpy(prior_array())
+    return prior if device is None else prior.to(device)
+
+
+def prune(valid: np.ndarray, rows: np.ndarray, actions: np.ndarray, codes: np.ndarray):
+    """
+    Narrow valid[rows] in place to the words that give codes against actions,
+    dropping the guessed words themselves
+    """
+    patterns = wp.get_pattern_matrix()
+    valid[rows] &= patterns[actions] == np.asarray(codes)[:, None]
+    valid[rows, actions] = False
+
+
+class ActionMasks:
+    """
+    Valid action mask of B games with its tensor copy and the probability prior
+    """
+    __slots__ = ['__valid', '__device', '__tensor']
+
+    def __init__(self, valid: np.ndarray | int, device=None):
+        """
+        Params:
+            valid:np.ndarray - (B, N) bool mask to wrap and keep in step with, e.g.
+                VecWordleEnv.get_candidates(), or a game count to start all valid
+            device:torch.device - device of the tensors, None for CPU
+        """
+        if isinstance(valid, (int, np.integer)):
+            valid = np.ones((valid, wp.get_pattern_matrix().shape[1]), dtype=bool)
+        self.__valid = valid
+        self.__device = None if device is None or torch is None or torch.device(device).type == 'cpu' else device
+        self.__tensor = None
+        if torch is not None:
+            self.__tensor = torch.from_numpy(valid)
+            if self.__device is not None:
+                self.__tensor = self.__tensor.to(self.__device)
+
+    def get_valid(self) -> np.ndarray:
+        return self.__valid
+
+    def get_tensor(self):
+        """
+        Get the (B, N) bool valid tensor
+        """
+        if self.__tensor is None:
+            raise ImportError('torch is needed for tensor masks')
+        return self.__tensor
+
+    def reset(self, rows: np.ndarray | None = None):
+        """
+        Make every action valid again in rows (default all)
+        """
+        rows = slice(None) if rows is None else rows
+        self.__valid[rows] = True
+        self.sync(rows)
+
+    def prune(self, rows: np.ndarray, actions: np.ndarray, codes: np.ndarray):
+        """
+        Narrow rows after guessing actions and getting codes, see prune
+        """
+        prune(self.__valid, rows, actions, codes)
+        self.sync(rows)
+
+    def sync(self, rows=None):
+        """
+        Copy rows (default all) changed on the array to the device tensor, nothing to do on CPU
+        """
+        if self.__device is None or self.__tensor is None:
+            return
+        if rows is None or isinstance(rows, slice):
+            self.__tensor.copy_(torch.from_numpy(self.__valid), non_blocking=True)
+            return
+        rows = np.asarray(rows)
+        self.__tensor[torch.as_tensor(rows, device=self.__device)] = torch.from_numpy(self.__valid[rows]).to(self.__device, non_blocking=True)
+
+    def additive(self, rows=None) -> np.ndarray:
+        """
+        Get the 0 / INVALID_ACTION float32 mask of get_valid_action_mask for rows (default all)
+        """
+        valid = self.__valid if rows is None else self.__valid[rows]
+        return np.where(valid, np.float32(0), np.float32(INVALID_ACTION))
+
+    def select(self, predictions, use_prior: bool = True):
+        """
+        Best valid action per row of (B, N) predictions, an array or a tensor,
+        weighted by the letter probability prior unless use_prior is False
+        """
+        if torch is not None and isinstance(predictions, torch.Tensor):
+            scores = predictions * prior_tensor(self.__device) if use_prior else predictions.clone()
+            return scores.masked_fill_(~self.__tensor, float('-inf')).argmax(dim=-1)
+        scores = predictions * prior_array() if use_prior else np.array(predictions, dtype=np.float32)
+        scores[~self.__valid] = -np.inf
+        return np.argmax(scores, axis=-1)
+
+    def sample(self, rng: np.random.Generator) -> np.ndarray:
+        """
+        One uniformly random valid action per row, for exploration
+        """
+        _, actions = np.nonzero(self.__valid)
+        counts = np.count_nonzero(self.__valid, axis=1)
+        starts = np.cumsum(counts) - counts
+        return actions[starts + (rng.random(len(counts)) * counts).astype(np.int64)]
@@ -0,0 +1,216 @@
+"""
+First guess partition tables.
+
+For every opener, the answers grouped by the pattern they give, in CSR layout:
+sizes[opener, pattern] counts each bucket, indptr[opener * NUM_PATTERNS + pattern]
+is where the bucket starts in one flat array of answer indexes, sorted inside each
+bucket. The remaining set after any first guess is one slice, and any opener metric
+(entropy, largest bucket, expected remaining) is a reduction over sizes.
+
+File layout, each section starting on a 64 byte boundary: header (magic, version,
+openers, answers, ALLOWED_WORDS hash, answer list hash), (answers,) uint16 answer
+indexes, (openers, NUM_PATTERNS) uint16 sizes, (openers * NUM_PATTERNS + 1,) uint32
+indptr, (openers * answers,) uint16 bucketed answer indexes.
+
+    python wordle_partitions.py [nyt|answers]
+"""
+import functools
+import hashlib
+import os
+import struct
+import sys
+from time import perf_counter
+
+import numpy as np
+
+import wordle
+import wordle_utils as utils
+import wordle_patterns as wp
+import wordle_sim as sim
+from wordle_info import entropy_from_counts
+
+PARTITIONS_MAGIC = b'WRDLCSR\0'
+PARTITIONS_VERSION = 1
+# magic, version, openers, answers, SHA-1 of ALLOWED_WORDS, SHA-1 of the answer indexes
+PARTITIONS_HEADER_FORMAT = '<8sIII20s20s'
+PARTITIONS_HEADER_SIZE = 64
+PARTITIONS_ALIGN = 64
+ANSWER_LISTS = {
+    'nyt': utils.NEW_ALLOWED_GUESSES_PATH,
+    'answers': utils.POSSIBLE_ANSWERS_PATH
+}
+
+
+def partitions_path(answer_list: str = 'nyt') -> str:
+    return f'.{utils.ASSETS_PATH}/first_guess_partitions_{answer_list}.bin'
+
+
+def answers_hash(answers: np.ndarray) -> bytes:
+    return hashlib.sha1(np.ascontiguousarray(answers, dtype='<u2').tobytes()).digest()
+
+
+def align(offset: int) -> int:
+    return -(-offset // PARTITIONS_ALIGN) * PARTITIONS_ALIGN
+
+
+def section_offsets(num_openers: int, num_answers: int) -> dict:
+    """
+    Byte offset of every section after the header
+    """
+    offsets = {'answers': PARTITIONS_HEADER_SIZE}
+    offsets['sizes'] = align(offsets['answers'] + num_answers * 2)
+    offsets['indptr'] = align(offsets['sizes'] + num_openers * wp.NUM_PATTERNS * 2)
+    offsets['buckets'] = align(offsets['indptr'] + (num_openers * wp.NUM_PATTERNS + 1) * 4)
+    offsets['end'] = offsets['buckets'] + num_openers * num_answers * 2
+    return offsets
+
+
+def build_partition_file(path: str, answers=None, chunk_size: int = 256) -> str:
+    """
+    Bucket every opener's row of the pattern matrix over answers (default every word)
+    and write the tables to path
+    """
+    patterns = wp.get_pattern_matrix()
+    answers = np.sort(sim.answer_indexes(answers)).astype(np.uint16)
+    num_openers, num_answers = patterns.shape[0], len(answers)
+    if num_openers * num_answers >= 1 << 32:
+        raise ValueError(f'{num_openers}x{num_answers} partitions overflow uint32 offsets')
+    offsets = section_offsets(num_openers, num_answers)
+
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as file:
+        header = struct.pack(PARTITIONS_HEADER_FORMAT, PARTITIONS_MAGIC, PARTITIONS_VERSION, num_openers, num_answers,
+                             utils.word_list_hash(wordle.ALLOWED_WORDS), answers_hash(answers))
+        file.write(header.ljust(PARTITIONS_HEADER_SIZE, b'\0'))
+        file.write(answers.astype('<u2').tobytes())
+        file.truncate(offsets['end'])
+
+    sizes = np.memmap(tmp_path, dtype='<u2', mode='r+', offset=offsets['sizes'], shape=(num_openers, wp.NUM_PATTERNS))
+    indptr = np.memmap(tmp_path, dtype='<u4', mode='r+', offset=offsets['indptr'], shape=(num_openers * wp.NUM_PATTERNS + 1,))
+    buckets = np.memmap(tmp_path, dtype='<u2', mode='r+', offset=offsets['buckets'], shape=(num_openers, num_answers))
+    every_answer = num_answers == patterns.shape[1]
+    for start in range(0, num_openers, chunk_size):
+        rows = np.asarray(patterns[start:start + chunk_size])
+        rows = rows if every_answer else rows[:, answers]
+        order = np.argsort(rows, axis=1, kind='stable')
+        bins = rows + (np.arange(len(rows), dtype=np.int64) * wp.NUM_PATTERNS)[:, None]
+        counts = np.bincount(bins.ravel(), minlength=len(rows) * wp.NUM_PATTERNS).reshape(len(rows), wp.NUM_PATTERNS)
+        buckets[start:start + len(rows)] = answers[order]
+        sizes[start:start + len(rows)] = counts
+        row_starts = np.arange(start, start + len(rows), dtype=np.int64)[:, None] * num_answers
+        local = np.cumsum(counts, axis=1) - counts
+        indptr[start * wp.NUM_PATTERNS:(start + len(rows)) * wp.NUM_PATTERNS] = (row_starts + local).ravel()
+    indptr[-1] = num_openers * num_answers
+    for table in (sizes, indptr, buckets):
+        table.flush()
+    del sizes, indptr, buckets
+    os.replace(tmp_path, path)
+    return path
+
+
+class FirstGuessPartitions:
+    """
+    Memory mapped first guess partition tables
+    """
+    __slots__ = ['__answers', '__sizes', '__indptr', '__buckets']
+
+    def __init__(self, path: str):
+        """
+        Params:
+            path:str - file written by build_partition_file
+        """
+        with open(path, 'rb') as file:
+            raw = file.read(PARTITIONS_HEADER_SIZE)
+        if len(raw) != PARTITIONS_HEADER_SIZE:
+            raise ValueError(f'{path} is too short to be a partition table')
+        magic, version, num_openers, num_answers, words_hash, list_hash = struct.unpack_from(PARTITIONS_HEADER_FORMAT, raw)
+        if magic != PARTITIONS_MAGIC:
+            raise ValueError(f'{path} is not a partition table')
+        if version != PARTITIONS_VERSION:
+            raise ValueError(f'{path} is partition table version {version}, expected {PARTITIONS_VERSION}')
+        if num_openers != len(wordle.ALLOWED_WORDS) or words_hash != utils.word_list_hash(wordle.ALLOWED_WORDS):
+            raise ValueError(f'{path} was built from a different word list, rebuild it with build_partition_file')
+        offsets = section_offsets(num_openers, num_answers)
+        self.__answers = np.memmap(path, dtype='<u2', mode='r', offset=offsets['answers'], shape=(num_answers,))
+        if answers_hash(self.__answers) != list_hash:
+            raise ValueError(f'{path} answer list does not match its header')
+        self.__sizes = np.memmap(path, dtype='<u2', mode='r', offset=offsets['sizes'], shape=(num_openers, wp.NUM_PATTERNS))
+        self.__indptr = np.memmap(path, dtype='<u4', mode='r', offset=offsets['indptr'], shape=(num_openers * wp.NUM_PATTERNS + 1,))
+        self.__buckets = np.memmap(path, dtype='<u2', mode='r', offset=offsets['buckets'], shape=(num_openers * num_answers,))
+
+    def get_answers(self) -> np.ndarray:
+        """
+        Get sorted answer indexes the tables cover
+        """
+        return self.__answers
+
+    def get_sizes(self) -> np.ndarray:
+        """
+        Get (openers, NUM_PATTERNS) bucket sizes
+        """
+        return self.__sizes
+
+    def get_indptr(self) -> np.ndarray:
+        return self.__indptr
+
+    def remaining(self, opener: int, pattern: int) -> np.ndarray:
+        """
+        Sorted answer indexes left after opener gives pattern
+        """
+        bucket = opener * wp.NUM_PATTERNS + pattern
+        return self.__buckets[self.__indptr[bucket]:self.__indptr[bucket + 1]]
+
+    def opener_row(self, opener: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Get (answers ordered by pattern, (NUM_PATTERNS + 1,) bucket offsets into them) for opener
+        """
+        start = opener * wp.NUM_PATTERNS
+        offsets = self.__indptr[start:start + wp.NUM_PATTERNS + 1].astype(np.int64)
+        offsets -= offsets[0]
+        num_answers = len(self.__answers)
+        return self.__buckets[opener * num_answers:(opener + 1) * num_answers], offsets
+
+    def metrics(self) -> dict:
+        """
+        Per opener entropy, largest bucket, expected remaining answers and buckets used
+        """
+        sizes = np.asarray(self.__sizes, dtype=np.float64)
+        return {
+            'entropy': entropy_from_counts(sizes),
+            'max_bucket': sizes.max(axis=1).astype(np.int64),
+            'expected_remaining': (sizes * sizes).sum(axis=1) / len(self.__answers),
+            'buckets': np.count_nonzero(sizes, axis=1)
+        }
+
+
+@functools.cache
+def get_partitions(path: str | None = None) -> FirstGuessPartitions:
+    """
+    Load partition tables over every word once per process, building them if needed
+    """
+    path = partitions_path() if path is None else path
+    if not os.path.exists(path):
+        print(f'Building first guess partitions at {path}...')
+        build_partition_file(path)
+    return FirstGuessPartitions(path)
+
+
+def main():
+    """
+    Build partition tables for an answer list and print the best openers by each metric
+    """
+    answer_list = sys.argv[1] if len(sys.argv) > 1 else 'nyt'
+    if answer_list not in ANSWER_LISTS:
+        print(f'Usage: python wordle_partitions.py [{"|".join(ANSWER_LISTS)}]')
+        return
+    start = perf_counter()
+    path = build_partition_file(partitions_path(answer_list), sim.load_answer_list(ANSWER_LISTS[answer_list]))
+    print(f'Built {path} in {round(perf_counter() - start, 2)}s')
+    metrics = FirstGuessPartitions(path).metrics()
+    for name, values in metrics.items():
+        best = np.argsort(values if name in ('max_bucket', 'expected_remaining') else -values, kind='stable')[:5]
+        print(f'{name}: {", ".join(f"{wordle.ALLOWED_WORDS[i]} ({round(float(values[i]), 3)})" for i in best)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,307 @@
+"""
+Vectorized Wordle feedback scoring.
+
+Scores whole arrays of (guess, answer) index pairs over ALLOWED_WORDS into pattern
+codes 0..242 in one call instead of building a wordle.Guess per pair. A pattern code
+is the feedback read as a base 3 number, first letter most significant, with
+WRONG = 0, CORRECT_LETTER = 1 and CORRECT_ALL = 2, so it lines up with
+wordle_ai.ALL_POSSIBLE_PATTERNS and 242 is the solved pattern.
+"""
+import functools
+import os
+import struct
+from time import perf_counter
+
+import numpy as np
+
+import wordle
+import wordle_utils as utils
+import wordle_words as words
+
+ALPHABET = 'abcdefghijklmnopqrstuvwxyz'
+NUM_PATTERNS = 3 ** utils.WORD_LEN
+CORRECT_PATTERN = NUM_PATTERNS - 1
+POSITION_MASKS = 1 << utils.WORD_LEN
+
+# Pattern matrix asset: a fixed size header followed by a (guesses, answers) uint8 matrix
+PATTERNS_PATH = f'.{utils.ASSETS_PATH}/patterns.bin'
+PATTERNS_MAGIC = b'WRDLPAT\0'
+# Same matrix stored answer major, (answers, guesses), so a handful of candidate
+# answers reads a few contiguous rows instead of a strided slice of every guess row
+ANSWER_PATTERNS_PATH = f'.{utils.ASSETS_PATH}/answer_patterns.bin'
+ANSWER_PATTERNS_MAGIC = b'WRDLANS\0'
+PATTERNS_VERSION = 1
+# magic, version, rows, cols, word list sha1
+PATTERNS_HEADER_FORMAT = '<8sIII20s'
+PATTERNS_HEADER_SIZE = 64
+
+SCORE_TO_TRIT = {
+    utils.WRONG: 0,
+    utils.CORRECT_LETTER: 1,
+    utils.CORRECT_ALL: 2
+}
+TRIT_TO_SCORE = {trit: score for score, trit in SCORE_TO_TRIT.items()}
+
+
+def pattern_to_index(pattern: tuple) -> int:
+    """
+    Get pattern code of a score pattern such as (0, 10, 20, 0, 0)
+    """
+    index = 0
+    for score in pattern:
+        index = index * 3 + SCORE_TO_TRIT[score]
+    return index
+
+
+def index_to_pattern(index: int) -> tuple:
+    """
+    Get score pattern of a pattern code
+    """
+    pattern = []
+    for _ in range(utils.WORD_LEN):
+        index, trit = divmod(index, 3)
+        pattern.append(TRIT_TO_SCORE[trit])
+    return tuple(reversed(pattern))
+
+
+ALL_PATTERNS = tuple(index_to_pattern(i) for i in range(NUM_PATTERNS))
+
+
+def build_feedback_table() -> np.ndarray:
+    """
+    Build a (32, 32, WORD_LEN) table of trits where [guess_mask, answer_mask, i] is the
+    feedback wordle.Guess gives at position i for a letter found at the positions in
+    guess_mask of the guess and answer_mask of the answer.
+
+    Guess treats every letter independently of the others, so its feedback for a letter
+    only depends on where that letter sits in both words. Building the table from Guess
+    itself keeps its duplicate letter handling exactly, quirks included.
+    """
+    guess_filler = 'bcdef'
+    answer_filler = 'vwxyz'
+    table = np.zeros((POSITION_MASKS, POSITION_MASKS, utils.WORD_LEN), dtype=np.uint8)
+    for guess_mask in range(1, POSITION_MASKS):
+        guess = ''.join('a' if guess_mask >> i & 1 else guess_filler[i] for i in range(utils.WORD_LEN))
+        for answer_mask in range(POSITION_MASKS):
+            answer = ''.join('a' if answer_mask >> i & 1 else answer_filler[i] for i in range(utils.WORD_LEN))
+            pattern = wordle.Guess(guess, answer).get_score_pattern()
+            table[guess_mask, answer_mask] = [SCORE_TO_TRIT[score] for score in pattern]
+    return table
+
+
+def letter_position_masks(letters: np.ndarray) -> np.ndarray:
+    """
+    Get (N, 26) array where [word, letter] is a bitmask of the positions letter is at in word
+    """
+    masks = np.zeros((len(letters), len(ALPHABET)), dtype=np.uint8)
+    rows = np.arange(len(letters))
+    for i in range(utils.WORD_LEN):
+        masks[rows, letters[:, i]] |= np.uint8(1 << i)
+    return masks
+
+
+def repeated_letter_masks(letters: np.ndarray, position_masks: np.ndarray) -> np.ndarray:
+    """
+    Get (N, WORD_LEN) array where [word, i] is a bitmask of every position holding the
+    same letter as position i of word
+    """
+    rows = np.arange(len(letters))[:, None]
+    return position_masks[rows, letters]
+
+
+FEEDBACK_TABLE = build_feedback_table()
+LETTERS = words.get_word_list().get_letters()
+LETTER_MASKS = letter_position_masks(LETTERS)
+REPEAT_MASKS = repeated_letter_masks(LETTERS, LETTER_MASKS)
+# Letter major copy so a guess row gathers one contiguous run of answer masks
+LETTER_MASKS_T = np.ascontiguousarray(LETTER_MASKS.T)
+
+
+def score_patterns(guess_idxs, answer_idxs) -> np.ndarray:
+    """
+    Score guesses against answers, both given as indexes into ALLOWED_WORDS.
+    Index arrays are broadcast against each other, so a column of guesses and a row
+    of answers scores the whole grid. Returns uint8 pattern codes in the broadcast shape,
+    equal to pattern_to_index(Guess(guess, answer).get_score_pattern()).
+    """
+    guess_idxs, answer_idxs = np.broadcast_arrays(np.asarray(guess_idxs), np.asarray(answer_idxs))
+    codes = np.zeros(guess_idxs.shape, dtype=np.uint8)
+    for i in range(utils.WORD_LEN):
+        guess_mask = REPEAT_MASKS[guess_idxs, i]
+        answer_mask = LETTER_MASKS[answer_idxs, LETTERS[guess_idxs, i]]
+        codes *= 3
+        codes += FEEDBACK_TABLE[guess_mask, answer_mask, i]
+    return codes
+
+
+def score_rows(guess_idxs, answer_idxs) -> np.ndarray:
+    """
+    Score every guess in guess_idxs against every answer in answer_idxs, returning a
+    (guesses, answers) uint8 array. Faster than broadcasting score_patterns because
+    each guess row only needs a 32 entry slice of FEEDBACK_TABLE per position.
+    """
+    guess_idxs = np.asarray(guess_idxs)
+    answer_masks = LETTER_MASKS_T[:, np.asarray(answer_idxs)]
+    codes = np.zeros((len(guess_idxs), answer_masks.shape[1]), dtype=np.uint8)
+    for i in range(utils.WORD_LEN):
+        row_tables = FEEDBACK_TABLE[REPEAT_MASKS[guess_idxs, i], :, i]
+        codes *= 3
+        codes += np.take_along_axis(row_tables, answer_masks[LETTERS[guess_idxs, i]], axis=1)
+    return codes
+
+
+def pattern_matrix(guess_idxs=None, answer_idxs=None, chunk_size: int = 256, out: np.ndarray | None = None) -> np.ndarray:
+    """
+    Score every guess against every answer, defaulting to all of ALLOWED_WORDS for both.
+    Rows are built chunk_size guesses at a time to keep temporaries small.
+    out can be any (guesses, answers) uint8 array, np.memmap included.
+    """
+    if guess_idxs is None:
+        guess_idxs = np.arange(len(wordle.ALLOWED_WORDS))
+    if answer_idxs is None:
+        answer_idxs = np.arange(len(wordle.ALLOWED_WORDS))
+    guess_idxs = np.asarray(guess_idxs)
+    answer_idxs = np.asarray(answer_idxs)
+    if out is None:
+        out = np.empty((len(guess_idxs), len(answer_idxs)), dtype=np.uint8)
+
+    for start in range(0, len(guess_idxs), chunk_size):
+        chunk = guess_idxs[start:start + chunk_size]
+        out[start:start + len(chunk)] = score_rows(chunk, answer_idxs)
+    return out
+
+
+def write_pattern_header(file, rows: int, cols: int, words_hash: bytes, magic: bytes = PATTERNS_MAGIC):
+    """
+    Write pattern matrix header padded out to PATTERNS_HEADER_SIZE
+    """
+    header = struct.pack(PATTERNS_HEADER_FORMAT, magic, PATTERNS_VERSION, rows, cols, words_hash)
+    file.write(header.ljust(PATTERNS_HEADER_SIZE, b'\0'))
+
+
+def read_pattern_header(path: str = PATTERNS_PATH, magic: bytes = PATTERNS_MAGIC) -> dict:
+    """
+    Read and check the header of a pattern matrix file
+    """
+    with open(path, 'rb') as file:
+        raw = file.read(PATTERNS_HEADER_SIZE)
+    if len(raw) != PATTERNS_HEADER_SIZE:
+        raise ValueError(f'{path} is too short to be a pattern matrix')
+    file_magic, version, rows, cols, words_hash = struct.unpack_from(PATTERNS_HEADER_FORMAT, raw)
+    if file_magic != magic:
+        raise ValueError(f'{path} is not a {"pattern" if magic == PATTERNS_MAGIC else "answer pattern"} matrix')
+    if version != PATTERNS_VERSION:
+        raise ValueError(f'{path} is pattern matrix version {version}, expected {PATTERNS_VERSION}')
+    return {'version': version, 'rows': rows, 'cols': cols, 'words_hash': words_hash}
+
+
+def allocate_pattern_file(path: str, magic: bytes = PATTERNS_MAGIC) -> str:
+    """
+    Write a header and an unfilled matrix to path, returns path
+    """
+    num_words = len(wordle.ALLOWED_WORDS)
+    with open(path, 'wb') as file:
+        write_pattern_header(file, num_words, num_words, utils.word_list_hash(wordle.ALLOWED_WORDS), magic)
+        file.truncate(PATTERNS_HEADER_SIZE + num_words * num_words)
+    return path
+
+
+def fill_pattern_rows(path: str, guess_idxs, chunk_size: int = 256):
+    """
+    Score guess_idxs against every answer into their rows of an allocated pattern file.
+    Separate processes can fill disjoint rows of the same file at once.
+    """
+    num_words = len(wordle.ALLOWED_WORDS)
+    matrix = np.memmap(path, dtype=np.uint8, mode='r+', offset=PATTERNS_HEADER_SIZE, shape=(num_words, num_words))
+    guess_idxs = np.asarray(guess_idxs)
+    for start in range(0, len(guess_idxs), chunk_size):
+        chunk = guess_idxs[start:start + chunk_size]
+        matrix[chunk] = score_rows(chunk, np.arange(num_words))
+    matrix.flush()
+
+
+def fill_answer_pattern_rows(path: str, answer_idxs, chunk_size: int = 256):
+    """
+    Score every guess against answer_idxs into their rows of an allocated answer pattern file
+    """
+    num_words = len(wordle.ALLOWED_WORDS)
+    matrix = np.memmap(path, dtype=np.uint8, mode='r+', offset=PATTERNS_HEADER_SIZE, shape=(num_words, num_words))
+    answer_idxs = np.asarray(answer_idxs)
+    for start in range(0, len(answer_idxs), chunk_size):
+        chunk = answer_idxs[start:start + chunk_size]
+        matrix[chunk] = score_rows(np.arange(num_words), chunk).T
+    matrix.flush()
+
+
+def build_pattern_file(path: str = PATTERNS_PATH, chunk_size: int = 256) -> str:
+    """
+    Score ALLOWED_WORDS against itself straight into a memory mapped file at path.
+    The file is written next to path first and moved into place once complete, so
+    a reader never maps a half built matrix.
+    """
+    tmp_path = allocate_pattern_file(f'{path}.tmp')
+    fill_pattern_rows(tmp_path, np.arange(len(wordle.ALLOWED_WORDS)), chunk_size)
+    os.replace(tmp_path, path)
+    return path
+
+
+def build_answer_pattern_file(path: str = ANSWER_PATTERNS_PATH, chunk_size: int = 256) -> str:
+    """
+    build_pattern_file for the answer major matrix
+    """
+    tmp_path = allocate_pattern_file(f'{path}.tmp', ANSWER_PATTERNS_MAGIC)
+    fill_answer_pattern_rows(tmp_path, np.arange(len(wordle.ALLOWED_WORDS)), chunk_size)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_pattern_matrix(path: str = PATTERNS_PATH, magic: bytes = PATTERNS_MAGIC) -> np.memmap:
+    """
+    Open a pattern matrix file read only. Every process mapping the same file shares
+    the OS page cache, so loading costs no parsing and no private memory.
+    Rows are guesses and columns are answers, both in ALLOWED_WORDS order, or the
+    other way around for an answer pattern matrix.
+    """
+    header = read_pattern_header(path, magic)
+    num_words = len(wordle.ALLOWED_WORDS)
+    if header['rows'] != num_words or header['cols'] != num_words:
+        raise ValueError(f'{path} is {header["rows"]}x{header["cols"]}, expected {num_words}x{num_words}')
+    if header['words_hash'] != utils.word_list_hash(wordle.ALLOWED_WORDS):
+        raise ValueError(f'{path} was built from a different word list, rebuild it with build_pattern_file')
+    return np.memmap(path, dtype=np.uint8, mode='r', offset=PATTERNS_HEADER_SIZE, shape=(num_words, num_words))
+
+
+@functools.cache
+def get_pattern_matrix(path: str = PATTERNS_PATH) -> np.memmap:
+    """
+    Load pattern matrix once per process, building it first if it does not exist yet
+    """
+    if not os.path.exists(path):
+        print(f'Building pattern matrix at {path}...')
+        build_pattern_file(path)
+    return load_pattern_matrix(path)
+
+
+@functools.cache
+def get_answer_pattern_matrix(path: str = ANSWER_PATTERNS_PATH) -> np.memmap:
+    """
+    Load answer major pattern matrix once per process, building it first if needed
+    """
+    if not os.path.exists(path):
+        print(f'Building answer pattern matrix at {path}...')
+        build_answer_pattern_file(path)
+    return load_pattern_matrix(path, ANSWER_PATTERNS_MAGIC)
+
+
+def main():
+    """
+    Build the pattern matrix assets
+    """
+    for build in (build_pattern_file, build_answer_pattern_file):
+        start = perf_counter()
+        path = build()
+        print(f'Built {path} in {round(perf_counter() - start, 2)}s')
+
+
+if __name__ == '__main__':
+    main()
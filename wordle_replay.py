@@ -0,0 +1,372 @@
+"""
+Streaming game log reader and replay analyzer.
+
+Reads played games from JSONL or CSV one at a time and replays them chunk_size games
+at once. Every game's candidate mask is narrowed turn by turn through the pattern
+matrix, which keeps exactly the words Constraint keeps for the same feedback. Each turn
+is scored as bits actually gained, expected bits of the guess played and expected bits
+of the best guess. A turn is a miss when the guess played was worth measurably less
+than the best one. Only per turn running totals and the bounded solver cache are kept,
+so memory stays flat however long the log is.
+
+JSONL, one game per line, patterns optional when the answer is given:
+
+    {"answer": "crane", "guesses": ["tares", "crane"], "patterns": ["10100", "22222"]}
+    {"history": [["tares", "10100"], ["crane", "22222"]]}
+
+CSV, either one row per turn with game, guess, pattern (and optionally answer)
+columns, consecutive rows of the same game together, or one row per game with space
+separated guesses and patterns columns.
+
+    python wordle_replay.py <log.jsonl|log.csv> [chunk_size]
+    python wordle_replay.py generate <log.jsonl|log.csv> [games] [solver]
+"""
+import csv
+import json
+import sys
+from time import perf_counter
+
+import numpy as np
+
+import wordle
+import wordle_utils as utils
+import wordle_patterns as wp
+import wordle_sim as sim
+import wordle_words as words
+from wordle_cache import bitset_hash
+from wordle_info import entropy_from_counts
+from wordle_solvers import SOLVERS, EntropySolver
+
+CHUNK_GAMES = 1024
+# Bits a played guess can fall short of the best guess and still not count as a miss,
+# above the float32 rounding of cached entropy summaries
+MISS_TOLERANCE = 1e-4
+# Turns tracked per game, longer games are cut off
+MAX_TURNS = 16
+
+
+def pattern_code(pattern) -> int:
+    """
+    Get a pattern code from five 0/1/2 digits or a code
+    """
+    if isinstance(pattern, int) and 0 <= pattern < wp.NUM_PATTERNS:
+        return pattern
+    pattern = str(pattern).strip()
+    if len(pattern) == utils.WORD_LEN and set(pattern) <= set('012'):
+        return int(pattern, 3)
+    if pattern.isdigit() and int(pattern) < wp.NUM_PATTERNS:
+        return int(pattern)
+    raise ValueError(f'Bad pattern {pattern!r}')
+
+
+def parse_game(guesses: list, patterns: list | None = None, answer: str | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Get (guess indexes, pattern codes) of one game, patterns are scored from
+    answer when missing. Raises ValueError for words off the list.
+    """
+    word_list = words.get_word_list()
+    guess_idxs = word_list.indexes_of(str(guess).strip().lower() for guess in guesses)
+    if len(guess_idxs) != len(guesses):
+        raise ValueError(f'Guesses off the word list in {guesses}')
+    if patterns is None or len(patterns) == 0:
+        answer_idx = None if answer is None else word_list.index_of(str(answer).strip().lower())
+        if answer_idx is None:
+            raise ValueError('Game has neither patterns nor a known answer')
+        codes = np.asarray(wp.get_pattern_matrix()[guess_idxs, answer_idx], dtype=np.int64)
+    else:
+        if len(patterns) != len(guesses):
+            raise ValueError(f'{len(guesses)} guesses but {len(patterns)} patterns')
+        codes = np.array([pattern_code(pattern) for pattern in patterns], dtype=np.int64)
+    return guess_idxs[:MAX_TURNS], codes[:MAX_TURNS]
+
+
+def read_jsonl(path: str):
+    """
+    Yield (guess indexes, pattern codes) per game line, None for lines that can't be parsed
+    """
+    with open(path, 'r', encoding='utf-8') as file:
+        for line in file:
+            if not line.strip():
+                continue
+            try:
+                game = json.loads(line)
+                if 'history' in game:
+                    history = game['history']
+                    yield parse_game([guess for guess, _ in history], [pattern for _, pattern in history])
+                else:
+                    yield parse_game(game['guesses'], game.get('patterns'), game.get('answer'))
+            except (ValueError, KeyError, TypeError):
+                yield None
+
+
+def read_csv(path: str):
+    """
+    Yield (guess indexes, pattern codes) per game, None for games that can't be parsed
+    """
+    with open(path, 'r', encoding='utf-8', newline='') as file:
+        reader = csv.DictReader(file)
+        if 'guesses' in (reader.fieldnames or []):
+            for row in reader:
+                try:
+                    patterns = (row.get('patterns') or '').split()
+                    yield parse_game(row['guesses'].split(), patterns, row.get('answer'))
+                except (ValueError, KeyError, TypeError):
+                    yield None
+            return
+
+        game_id, rows = None, []
+        for row in reader:
+            if rows and row.get('game') != game_id:
+                yield parse_turn_rows(rows)
+                rows = []
+            game_id = row.get('game')
+            rows.append(row)
+        if rows:
+            yield parse_turn_rows(rows)
+
+
+def parse_turn_rows(rows: list[dict]) -> tuple[np.ndarray, np.ndarray] | None:
+    try:
+        patterns = [row['pattern'] for row in rows] if all(row.get('pattern') for row in rows) else None
+        return parse_game([row['guess'] for row in rows], patterns, rows[0].get('answer'))
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def read_games(path: str):
+    """
+    Stream games from a .jsonl or .csv log
+    """
+    if path.endswith('.csv'):
+        return read_csv(path)
+    return read_jsonl(path)
+
+
+def chunked(games, chunk_size: int = CHUNK_GAMES):
+    """
+    Group a game stream into lists of up to chunk_size games
+    """
+    chunk = []
+    for game in games:
+        chunk.append(game)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class ReplayStats:
+    """
+    Running per turn totals over every replayed game
+    """
+    __slots__ = ['__games', '__skipped', '__inconsistent', '__solved_in', '__turns', '__candidates',
+                 '__gained', '__expected', '__optimal', '__missed', '__forced_missed']
+
+    def __init__(self, max_turns: int = MAX_TURNS):
+        self.__games = 0
+        self.__skipped = 0
+        self.__inconsistent = 0
+        # Guesses each solved game took, index 0 counts unsolved games
+        self.__solved_in = np.zeros(max_turns + 1, dtype=np.int64)
+        self.__turns = np.zeros(max_turns, dtype=np.int64)
+        self.__candidates = np.zeros(max_turns, dtype=np.float64)
+        self.__gained = np.zeros(max_turns, dtype=np.float64)
+        self.__expected = np.zeros(max_turns, dtype=np.float64)
+        self.__optimal = np.zeros(max_turns, dtype=np.float64)
+        self.__missed = np.zeros(max_turns, dtype=np.int64)
+        self.__forced_missed = np.zeros(max_turns, dtype=np.int64)
+
+    def add_games(self, games: int, skipped: int, inconsistent: int, solved_in: np.ndarray):
+        self.__games += games
+        self.__skipped += skipped
+        self.__inconsistent += inconsistent
+        self.__solved_in += np.bincount(solved_in, minlength=len(self.__solved_in))
+
+    def add_turn(self, turn: int, candidates: np.ndarray, gained: np.ndarray, expected: np.ndarray,
+                 optimal: np.ndarray, missed: np.ndarray, forced_missed: np.ndarray):
+        self.__turns[turn] += len(candidates)
+        self.__candidates[turn] += candidates.sum()
+        self.__gained[turn] += gained.sum()
+        self.__expected[turn] += expected.sum()
+        self.__optimal[turn] += optimal.sum()
+        self.__missed[turn] += np.count_nonzero(missed)
+        self.__forced_missed[turn] += np.count_nonzero(forced_missed)
+
+    def summary(self) -> dict:
+        """
+        Per turn and overall information gained against the best guess, and miss rates
+        """
+        turns = []
+        for turn in np.flatnonzero(self.__turns):
+            count = self.__turns[turn]
+            turns.append({
+                'turn': int(turn) + 1,
+                'count': int(count),
+                'mean_candidates': self.__candidates[turn] / count,
+                'mean_bits_gained': self.__gained[turn] / count,
+                'mean_expected_bits': self.__expected[turn] / count,
+                'mean_optimal_bits': self.__optimal[turn] / count,
+                'missed_rate': self.__missed[turn] / count
+            })
+        total_turns = int(self.__turns.sum())
+        solved = self.__solved_in[1:]
+        return {
+            'games': self.__games,
+            'skipped': self.__skipped,
+            'inconsistent': self.__inconsistent,
+            'solved': int(solved.sum()),
+            'mean_guesses': float((solved * np.arange(1, len(self.__solved_in))).sum() / solved.sum()) if solved.sum() else 0.0,
+            'turns': total_turns,
+            'bits_gained': float(self.__gained.sum()),
+            'expected_bits': float(self.__expected.sum()),
+            'optimal_bits': float(self.__optimal.sum()),
+            'efficiency': float(self.__expected.sum() / self.__optimal.sum()) if self.__optimal.sum() else 1.0,
+            'missed_guess_rate': float(self.__missed.sum() / total_turns) if total_turns else 0.0,
+            'forced_miss_rate': float(self.__forced_missed.sum() / total_turns) if total_turns else 0.0,
+            'per_turn': turns
+        }
+
+
+def guess_info(patterns: np.ndarray, guesses: np.ndarray, candidates: np.ndarray) -> np.ndarray:
+    """
+    Expected bits of each row's guess against that row's (rows, N) candidate mask, one bincount for every row
+    """
+    bins = patterns[guesses].astype(np.int64) + (np.arange(len(guesses), dtype=np.int64) * wp.NUM_PATTERNS)[:, None]
+    counts = np.bincount(bins[candidates], minlength=len(guesses) * wp.NUM_PATTERNS)
+    return entropy_from_counts(counts.reshape(len(guesses), wp.NUM_PATTERNS))
+
+
+def best_info(solver, candidates: np.ndarray) -> np.ndarray:
+    """
+    Most expected bits any guess gets against each row's candidate mask, every
+    distinct set analyzed once through the solver's cache
+    """
+    packed, first, inverse = np.unique(np.packbits(candidates, axis=1), axis=0, return_index=True, return_inverse=True)
+    answer_sets = [np.flatnonzero(candidates[row]) for row in first]
+    states = solver.states(answer_sets, [bitset_hash(row) for row in packed])
+    # Two candidates split by guessing either, one has nothing left to learn
+    best = np.array([min(1.0, len(answers) - 1.0) if state is None else float(state.top_info[0])
+                     for answers, state in zip(answer_sets, states)], dtype=np.float64)
+    return best[inverse.ravel()]
+
+
+def replay_chunk(solver, games: list, stats: ReplayStats):
+    """
+    Replay one chunk of parsed games (None for unparsable ones) in lockstep into stats
+    """
+    patterns = wp.get_pattern_matrix()
+    parsed = [game for game in games if game is not None]
+    lengths = np.array([len(guesses) for guesses, _ in parsed], dtype=np.int64)
+    max_len = int(lengths.max(initial=0))
+    guesses = np.zeros((len(parsed), max_len), dtype=np.int64)
+    codes = np.zeros((len(parsed), max_len), dtype=np.int64)
+    for row, (game_guesses, game_codes) in enumerate(parsed):
+        guesses[row, :len(game_guesses)] = game_guesses
+        codes[row, :len(game_codes)] = game_codes
+
+    candidates = np.ones((len(parsed), patterns.shape[1]), dtype=bool)
+    solved_in = np.zeros(len(parsed), dtype=np.int64)
+    consistent = np.ones(len(parsed), dtype=bool)
+    active = np.flatnonzero(lengths > 0)
+    for turn in range(max_len):
+        active = active[(lengths[active] > turn) & (solved_in[active] == 0)]
+        if len(active) == 0:
+            break
+        masks = candidates[active]
+        turn_guesses, turn_codes = guesses[active, turn], codes[active, turn]
+        sizes = masks.sum(axis=1)
+        expected = guess_info(patterns, turn_guesses, masks)
+        optimal = best_info(solver, masks)
+
+        masks &= patterns[turn_guesses] == turn_codes[:, None]
+        remaining = masks.sum(axis=1)
+        fits = remaining > 0
+        candidates[active] = masks
+        won = turn_codes == wp.CORRECT_PATTERN
+        solved_in[active[won & fits]] = turn + 1
+
+        # A history no answer could give stops counting at the turn it broke
+        consistent[active[~fits]] = False
+        gained = np.log2(sizes[fits] / remaining[fits])
+        missed = expected[fits] < optimal[fits] - MISS_TOLERANCE
+        forced_missed = (sizes[fits] == 1) & ~won[fits]
+        stats.add_turn(turn, sizes[fits], gained, expected[fits], optimal[fits], missed, forced_missed)
+        active = active[fits]
+
+    stats.add_games(len(games), len(games) - len(parsed), int(np.count_nonzero(~consistent)), solved_in[consistent])
+
+
+def replay_log(path: str, solver=None, chunk_size: int = CHUNK_GAMES, verbose: bool = False) -> dict:
+    """
+    Replay every game in a log against solver's (default EntropySolver) analysis,
+    returns ReplayStats.summary()
+    """
+    solver = EntropySolver() if solver is None else solver
+    stats = ReplayStats()
+    start = perf_counter()
+    replayed = 0
+    for chunk in chunked(read_games(path), chunk_size):
+        replay_chunk(solver, chunk, stats)
+        replayed += len(chunk)
+        if verbose:
+            print(f'Replayed {replayed} games ({round(replayed / (perf_counter() - start))} games/s)')
+    summary = stats.summary()
+    summary['seconds'] = perf_counter() - start
+    if solver.get_cache() is not None:
+        summary['cache'] = solver.get_cache().get_stats()
+    return summary
+
+
+def write_log(path: str, solver=None, answers=None, sample: int | None = None, seed: int = 0,
+              batch_size: int = sim.BATCH_SIZE) -> int:
+    """
+    Play solver against answers (or a seeded sample) with the simulator and write
+    the games as a JSONL or per turn CSV log, returns games written
+    """
+    solver = EntropySolver() if solver is None else solver
+    answers = sim.answer_indexes(answers)
+    if sample is not None and sample < len(answers):
+        answers = np.random.default_rng(seed).choice(answers, sample, replace=False)
+    patterns = wp.get_pattern_matrix()
+    is_csv = path.endswith('.csv')
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        writer = csv.writer(file) if is_csv else None
+        if is_csv:
+            writer.writerow(['game', 'guess', 'pattern', 'answer'])
+        for start in range(0, len(answers), batch_size):
+            batch = answers[start:start + batch_size]
+            _, paths = sim.play_paths(solver, batch)
+            for game, (answer, path_row) in enumerate(zip(batch, paths)):
+                played = path_row[path_row >= 0]
+                game_patterns = [np.base_repr(int(code), 3).zfill(utils.WORD_LEN) for code in patterns[played, answer]]
+                game_words = [wordle.ALLOWED_WORDS[i] for i in played]
+                if is_csv:
+                    writer.writerows([start + game, word, pattern, wordle.ALLOWED_WORDS[answer]]
+                                     for word, pattern in zip(game_words, game_patterns))
+                else:
+                    file.write(json.dumps({'answer': wordle.ALLOWED_WORDS[answer], 'guesses': game_words,
+                                           'patterns': game_patterns}) + '\n')
+    return len(answers)
+
+
+def main():
+    """
+    Replay a game log, or generate one from a solver
+    """
+    if len(sys.argv) < 2:
+        print('Usage: python wordle_replay.py <log.jsonl|log.csv> [chunk_size] | generate <log> [games] [solver]')
+        return
+    if sys.argv[1] == 'generate':
+        path = sys.argv[2]
+        games = int(sys.argv[3]) if len(sys.argv) > 3 else None
+        solver = SOLVERS[sys.argv[4]]() if len(sys.argv) > 4 else None
+        print(f'Wrote {write_log(path, solver, sample=games)} games to {path}')
+        return
+    chunk_size = int(sys.argv[2]) if len(sys.argv) > 2 else CHUNK_GAMES
+    summary = replay_log(sys.argv[1], chunk_size=chunk_size, verbose=True)
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == '__main__':
+    main()
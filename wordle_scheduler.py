@@ -0,0 +1,240 @@
+"""
+Sharded multi-core scheduler for the precompute jobs.
+
+Work items are split into shards of roughly equal estimated cost, several per worker,
+and queued heaviest first. Idle workers pull the next shard off the queue, so a worker
+that finishes early takes on shards a static split would have given to a slower one;
+those are reported as steals. Workers never receive the pattern matrix: the initializer
+maps the file once per process and every worker shares the OS page cache.
+
+    python wordle_scheduler.py [patterns|entropy|second_guess] [workers]
+"""
+import json
+import os
+import sys
+from time import perf_counter
+import concurrent.futures as concurr
+
+import numpy as np
+
+import wordle
+import wordle_jobs as jobs
+import wordle_patterns as wp
+from wordle_info import expected_info, pattern_counts
+
+SHARDS_PER_WORKER = 4
+
+
+class Shard:
+    """
+    A slice of work items and their summed cost estimate
+    """
+    __slots__ = ['shard_id', 'items', 'cost']
+
+    def __init__(self, shard_id: int, items: np.ndarray, cost: float):
+        self.shard_id = shard_id
+        self.items = items
+        self.cost = cost
+
+
+def make_shards(items, costs=None, num_shards: int = 1) -> list[Shard]:
+    """
+    Split items into up to num_shards contiguous shards of about equal total cost,
+    ordered heaviest first. costs defaults to 1 per item.
+    """
+    items = np.asarray(items)
+    costs = np.ones(len(items)) if costs is None else np.asarray(costs, dtype=np.float64)
+    if len(items) == 0:
+        return []
+    num_shards = max(1, min(num_shards, len(items)))
+    cumulative = np.cumsum(costs)
+    bounds = np.searchsorted(cumulative, cumulative[-1] * np.arange(1, num_shards) / num_shards)
+    shards = []
+    for items_part, costs_part in zip(np.split(items, bounds), np.split(costs, bounds)):
+        if len(items_part) > 0:
+            shards.append(Shard(len(shards), items_part, float(costs_part.sum())))
+    return sorted(shards, key=lambda shard: shard.cost, reverse=True)
+
+
+def init_worker(patterns_path: str | None = wp.PATTERNS_PATH):
+    """
+    Map the pattern matrix once in each worker
+    """
+    if patterns_path is not None:
+        wp.get_pattern_matrix(patterns_path)
+
+
+def run_shard(task, shard: Shard) -> tuple:
+    """
+    Run task on a shard in a worker, returns (shard_id, worker pid, seconds, result)
+    """
+    start = perf_counter()
+    result = task(shard.items)
+    return shard.shard_id, os.getpid(), perf_counter() - start, result
+
+
+def format_seconds(seconds: float) -> str:
+    return f'{int(seconds // 60)}m {round(seconds % 60)}s'
+
+
+def run_sharded(task, shards: list[Shard], workers: int | None = None, on_result=None,
+                patterns_path: str | None = wp.PATTERNS_PATH, verbose: bool = True) -> dict:
+    """
+    Run task(shard.items) for every shard across worker processes.
+    task must be a module level function. on_result(shard, result) is called in this
+    process as shards finish. Returns a report of per shard timings, per worker totals,
+    steals and utilization.
+    """
+    workers = os.cpu_count() if workers is None else workers
+    shards_by_id = {shard.shard_id: shard for shard in shards}
+    total_cost = sum(shard.cost for shard in shards)
+    fair_share = len(shards) / workers if workers else 0
+    shard_reports = []
+    worker_reports = {}
+    done_cost = 0.0
+
+    start = perf_counter()
+    with concurr.ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(patterns_path,)) as executor:
+        tasks = [executor.submit(run_shard, task, shard) for shard in shards]
+        for task_future in concurr.as_completed(tasks):
+            shard_id, pid, seconds, result = task_future.result()
+            shard = shards_by_id[shard_id]
+            if on_result is not None:
+                on_result(shard, result)
+
+            done_cost += shard.cost
+            shard_reports.append({'shard_id': shard_id, 'worker': pid, 'items': len(shard.items), 'cost': shard.cost, 'seconds': seconds})
+            worker = worker_reports.setdefault(pid, {'shards': 0, 'cost': 0.0, 'busy_seconds': 0.0})
+            worker['shards'] += 1
+            worker['cost'] += shard.cost
+            worker['busy_seconds'] += seconds
+
+            elapsed = perf_counter() - start
+            eta = (total_cost - done_cost) * elapsed / done_cost if done_cost else 0.0
+            if verbose:
+                print(
+                    f' ({len(shard_reports)}/{len(shards)}) Shard: {round(seconds, 2)}s',
+                    f'Elapsed: {format_seconds(elapsed)}',
+                    f'Cost/s: {round(done_cost / elapsed) if elapsed else 0}',
+                    f'ETA: {format_seconds(eta)} {" " * 10}',
+                    sep=' - ',
+                    end='\r',
+                    flush=True
+                )
+    seconds = perf_counter() - start
+    if verbose:
+        print()
+
+    for worker in worker_reports.values():
+        worker['steals'] = max(0, worker['shards'] - int(np.ceil(fair_share)))
+    busy_seconds = sum(worker['busy_seconds'] for worker in worker_reports.values())
+    report = {
+        'workers': workers,
+        'shards': len(shards),
+        'cost': total_cost,
+        'seconds': seconds,
+        'utilization': busy_seconds / (seconds * workers) if seconds and workers else 0.0,
+        'steals': sum(worker['steals'] for worker in worker_reports.values()),
+        'shard_times': sorted(shard_reports, key=lambda item: item['shard_id']),
+        'worker_stats': worker_reports
+    }
+    if verbose:
+        shard_seconds = [item['seconds'] for item in shard_reports] or [0.0]
+        print(
+            f'{len(shards)} shards on {workers} workers in {format_seconds(seconds)}',
+            f'Shard min/mean/max: {round(min(shard_seconds), 2)}s/{round(float(np.mean(shard_seconds)), 2)}s/{round(max(shard_seconds), 2)}s',
+            f'Utilization: {round(report["utilization"] * 100, 1)}%',
+            f'Steals: {report["steals"]}',
+            sep=' - '
+        )
+    return report
+
+
+def pattern_rows_task(guess_idxs: np.ndarray):
+    wp.fill_pattern_rows(f'{wp.PATTERNS_PATH}.tmp', guess_idxs)
+
+
+def first_guess_info_task(guess_idxs: np.ndarray) -> np.ndarray:
+    return expected_info(guess_idxs=guess_idxs)
+
+
+def second_guess_task(first_guess_idxs: np.ndarray) -> list[dict]:
+    return [jobs.run_second_guess_job(int(first_guess_idx)) for first_guess_idx in first_guess_idxs]
+
+
+def precompute_patterns(workers: int | None = None) -> dict:
+    """
+    Build wordle_patterns.PATTERNS_PATH with workers filling disjoint row shards
+    """
+    workers = os.cpu_count() if workers is None else workers
+    tmp_path = wp.allocate_pattern_file(f'{wp.PATTERNS_PATH}.tmp')
+    shards = make_shards(np.arange(len(wordle.ALLOWED_WORDS)), num_shards=workers * SHARDS_PER_WORKER)
+    report = run_sharded(pattern_rows_task, shards, workers, patterns_path=None)
+    os.replace(tmp_path, wp.PATTERNS_PATH)
+    return report
+
+
+def precompute_first_guess_info(workers: int | None = None, path: str = './assets/nyt_first_guess_info.json') -> dict:
+    """
+    Expected information of every first guess, written to path keyed by word index
+    """
+    workers = os.cpu_count() if workers is None else workers
+    info = np.zeros(len(wordle.ALLOWED_WORDS))
+
+    def store(shard: Shard, result: np.ndarray):
+        info[shard.items] = result
+
+    shards = make_shards(np.arange(len(wordle.ALLOWED_WORDS)), num_shards=workers * SHARDS_PER_WORKER)
+    report = run_sharded(first_guess_info_task, shards, workers, on_result=store)
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump({str(i): float(bits) for i, bits in enumerate(info)}, file)
+    return report
+
+
+def precompute_second_guess_info(workers: int | None = None) -> dict:
+    """
+    Run wordle_jobs.run_second_guess_job for every unfinished first guess. A first guess
+    costs about the sum of its squared partition sizes, which is what shards balance on.
+    """
+    workers = os.cpu_count() if workers is None else workers
+    first_guess_idxs = np.array(jobs.pending_first_guesses(), dtype=np.int64)
+    if len(first_guess_idxs) == 0:
+        print('Second guess info is complete.')
+        return {}
+    sizes = pattern_counts(guess_idxs=first_guess_idxs)
+    costs = (sizes.astype(np.float64) ** 2).sum(axis=1)
+    rows = []
+
+    def collect(shard: Shard, result: list[dict]):
+        rows.extend(result)
+
+    shards = make_shards(first_guess_idxs, costs, workers * SHARDS_PER_WORKER)
+    report = run_sharded(second_guess_task, shards, workers, on_result=collect)
+    total_rows = sum(stats['rows'] for stats in rows)
+    report['rows'] = total_rows
+    report['rows_per_second'] = total_rows / report['seconds'] if report['seconds'] else 0.0
+    print(f'{total_rows} rows at {round(report["rows_per_second"])} rows/s')
+    return report
+
+
+PRECOMPUTE_JOBS = {
+    'patterns': precompute_patterns,
+    'entropy': precompute_first_guess_info,
+    'second_guess': precompute_second_guess_info
+}
+
+
+def main():
+    """
+    Run a precompute job from the command line
+    """
+    job = sys.argv[1] if len(sys.argv) > 1 else 'second_guess'
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    if job not in PRECOMPUTE_JOBS:
+        print(f'Unknown job "{job}", expected one of {", ".join(PRECOMPUTE_JOBS)}')
+        return
+    PRECOMPUTE_JOBS[job](workers)
+
+
+if __name__ == '__main__':
+    main()
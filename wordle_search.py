@@ -0,0 +1,251 @@
+"""
+Depth limited search for the minimum expected number of guesses.
+
+Works on totals: T(S), the guesses summed over every answer in candidate set S, is
+|S| plus T of every bucket the next guess splits S into, except the solved bucket.
+A bucket of s answers needs at least 2s - 1 more guesses, so with d distinct
+patterns over S a guess costs at least
+
+    LB = 3|S| - [guess in S] - d
+
+which orders the guesses tried at every node, prunes them against the best total
+found so far and bounds every bucket searched. Subproblems are memoized on a 128 bit
+hash of the sorted candidate indexes and the guesses left. beam limits how many
+guesses are tried per node; None searches every guess that splits S, which is exact.
+
+Exact search is only practical against wordle-answers.txt, the default answer set.
+
+    python wordle_search.py [openers] [beam] [workers]
+"""
+import functools
+import hashlib
+import os
+import sys
+from time import perf_counter
+
+import numpy as np
+
+import wordle
+import wordle_utils as utils
+import wordle_patterns as wp
+import wordle_sim as sim
+import wordle_scheduler as scheduler
+from wordle_tree import split_by_pattern
+
+DEFAULT_BEAM = 10
+# Openers evaluated by default, best by lower bound first
+DEFAULT_OPENERS = 200
+
+
+def candidate_set_key(answers: np.ndarray, guesses_left: int) -> tuple[bytes, int]:
+    """
+    Canonical memo key of a sorted candidate index array and the guesses left
+    """
+    digest = hashlib.blake2b(np.ascontiguousarray(answers, dtype=np.int32).tobytes(), digest_size=16).digest()
+    return digest, guesses_left
+
+
+def guess_lower_bounds(answers: np.ndarray, answer_patterns: np.ndarray | None = None) -> np.ndarray:
+    """
+    Get LB, the least total guesses every allowed guess could solve answers in, 3|S| - [guess in S]
+    - distinct patterns. Guesses that can't split answers at all get inf.
+    """
+    answer_patterns = wp.get_answer_pattern_matrix() if answer_patterns is None else answer_patterns
+    rows = np.sort(answer_patterns[answers], axis=0)
+    distinct = 1 + np.count_nonzero(np.diff(rows, axis=0), axis=0)
+    in_answers = np.zeros(rows.shape[1], dtype=np.int64)
+    in_answers[answers] = 1
+    bounds = (3 * len(answers) - in_answers - distinct).astype(np.float64)
+    bounds[(distinct == 1) & (in_answers == 0)] = np.inf
+    return bounds
+
+
+class ExpectedGuessSearch:
+    """
+    Memoized branch and bound search over candidate sets of one answer list
+    """
+    __slots__ = ['__answers', '__beam', '__max_guesses', '__exact', '__bounds', '__nodes', '__hits']
+
+    def __init__(self, answers=None, beam: int | None = DEFAULT_BEAM, max_guesses: int = utils.MAX_GUESSES):
+        """
+        Params:
+            answers - words or indexes the answer can be, defaults to wordle-answers.txt
+            beam:int - guesses tried per node in lower bound order, None tries all of them
+            max_guesses:int - guesses allowed per game
+        """
+        if answers is None:
+            answers = sim.load_answer_list(utils.POSSIBLE_ANSWERS_PATH)
+        self.__answers = np.sort(sim.answer_indexes(answers))
+        self.__beam = beam
+        self.__max_guesses = max_guesses
+        # memo key -> (exact total, best guess) and memo key -> proven lower bound
+        self.__exact = {}
+        self.__bounds = {}
+        self.__nodes = 0
+        self.__hits = 0
+
+    def get_answers(self) -> np.ndarray:
+        return self.__answers
+
+    def get_stats(self) -> dict:
+        """
+        Get search counters
+        """
+        return {'nodes': self.__nodes, 'memo_hits': self.__hits, 'exact': len(self.__exact), 'bounds': len(self.__bounds)}
+
+    def best_guess(self, answers: np.ndarray, guesses_left: int) -> int | None:
+        """
+        Get the memoized best guess for a solved candidate set, None if unknown
+        """
+        if len(answers) <= 2:
+            return int(answers[0])
+        result = self.__exact.get(candidate_set_key(answers, guesses_left))
+        return None if result is None else result[1]
+
+    def total_after(self, guess: int, answers: np.ndarray, guesses_left: int, limit: float = np.inf) -> float:
+        """
+        Total guesses to solve every answer when guess is played next, stops early and
+        returns something >= limit once the total can't come in under it
+        """
+        patterns = wp.get_pattern_matrix()
+        codes, groups = split_by_pattern(patterns[guess][answers])
+        buckets = [answers[group] for code, group in zip(codes, groups) if code != wp.CORRECT_PATTERN]
+        buckets.sort(key=len, reverse=True)
+        # Least the buckets not searched yet can add
+        remaining = float(sum(2 * len(bucket) - 1 for bucket in buckets))
+        total = float(len(answers))
+        for bucket in buckets:
+            remaining -= 2 * len(bucket) - 1
+            total += self.solve(bucket, guesses_left - 1, limit - total - remaining)
+            if total + remaining >= limit:
+                return total + remaining
+        return total
+
+    def solve(self, answers: np.ndarray, guesses_left: int, limit: float = np.inf) -> float:
+        """
+        Least total guesses to solve every answer in sorted answers with guesses_left
+        guesses, inf if they can't all be solved. Returns exactly that total when it's
+        under limit, otherwise some proven lower bound >= limit.
+        """
+        size = len(answers)
+        if size == 1:
+            return 1.0 if guesses_left >= 1 else np.inf
+        if guesses_left <= 1:
+            return np.inf
+        if size == 2:
+            return 3.0
+
+        key = candidate_set_key(answers, guesses_left)
+        if key in self.__exact:
+            self.__hits += 1
+            return self.__exact[key][0]
+        known_bound = self.__bounds.get(key, 0.0)
+        if known_bound >= limit:
+            self.__hits += 1
+            return known_bound
+        self.__nodes += 1
+
+        bounds = guess_lower_bounds(answers)
+        order = np.lexsort((~np.isin(np.arange(len(bounds)), answers), bounds))
+        if self.__beam is not None:
+            order = order[:self.__beam]
+        best_total, best_guess = np.inf, None
+        cutoff = limit
+        for guess in order:
+            if bounds[guess] >= min(best_total, cutoff):
+                break
+            total = self.total_after(int(guess), answers, guesses_left, min(best_total, cutoff))
+            if total < best_total and total < cutoff:
+                best_total, best_guess = total, int(guess)
+
+        if best_guess is not None:
+            self.__exact[key] = (best_total, best_guess)
+            return best_total
+        # Nothing came in under limit: every guess tried is at least its bound or the cutoff
+        first_bound = bounds[order[0]] if len(order) else np.inf
+        proven = max(known_bound, min(cutoff, first_bound)) if np.isfinite(cutoff) else np.inf
+        self.__bounds[key] = proven
+        return proven
+
+    def evaluate_opener(self, opener: int) -> dict:
+        """
+        Best expected guesses over every answer when opening with opener
+        """
+        start = perf_counter()
+        total = self.total_after(opener, self.__answers, self.__max_guesses)
+        return {
+            'opener': wordle.ALLOWED_WORDS[opener],
+            'total_guesses': total,
+            'expected_guesses': total / len(self.__answers),
+            'seconds': perf_counter() - start
+        }
+
+    def solve_all(self) -> dict:
+        """
+        Best opener and expected guesses over every answer
+        """
+        total = self.solve(self.__answers, self.__max_guesses)
+        opener = self.best_guess(self.__answers, self.__max_guesses)
+        return {
+            'opener': None if opener is None else wordle.ALLOWED_WORDS[opener],
+            'total_guesses': total,
+            'expected_guesses': total / len(self.__answers)
+        }
+
+
+def rank_openers(answers: np.ndarray, count: int = DEFAULT_OPENERS) -> np.ndarray:
+    """
+    Get the count openers with the lowest lower bound over answers
+    """
+    bounds = guess_lower_bounds(answers)
+    return np.argsort(bounds, kind='stable')[:count]
+
+
+@functools.cache
+def opener_search(beam: int | None, max_guesses: int) -> ExpectedGuessSearch:
+    """
+    One search per worker process so its memo carries over between openers
+    """
+    return ExpectedGuessSearch(beam=beam, max_guesses=max_guesses)
+
+
+def openers_task(beam: int | None, max_guesses: int, openers: np.ndarray) -> list[dict]:
+    search = opener_search(beam, max_guesses)
+    return [search.evaluate_opener(int(opener)) for opener in openers]
+
+
+def evaluate_openers(openers=None, beam: int | None = DEFAULT_BEAM, max_guesses: int = utils.MAX_GUESSES,
+                     workers: int | None = None, verbose: bool = True) -> list[dict]:
+    """
+    Evaluate openers (default the DEFAULT_OPENERS best by lower bound against
+    wordle-answers.txt) across worker processes, returns results best first
+    """
+    workers = os.cpu_count() if workers is None else workers
+    answers = sim.load_answer_list(utils.POSSIBLE_ANSWERS_PATH)
+    openers = rank_openers(answers) if openers is None else sim.answer_indexes(openers)
+    results = []
+
+    def collect(shard: scheduler.Shard, result: list[dict]):
+        results.extend(result)
+
+    shards = scheduler.make_shards(openers, num_shards=workers * scheduler.SHARDS_PER_WORKER)
+    task = functools.partial(openers_task, beam, max_guesses)
+    scheduler.run_sharded(task, shards, workers, on_result=collect, verbose=verbose)
+    return sorted(results, key=lambda result: result['total_guesses'])
+
+
+def main():
+    """
+    Evaluate the top openers from the command line
+    """
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_OPENERS
+    beam = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_BEAM
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else None
+    answers = sim.load_answer_list(utils.POSSIBLE_ANSWERS_PATH)
+    results = evaluate_openers(rank_openers(answers, count), beam, workers=workers)
+    for result in results[:10]:
+        print(f'{result["opener"]}: {round(result["expected_guesses"], 4)} guesses ({round(result["seconds"], 2)}s)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,546 @@
+"""
+Asyncio HTTP/JSON solving service.
+
+One long running process loads the pattern matrices, word weights and a solver once
+and answers requests over plain HTTP/1.1 with keep-alive, no web framework needed.
+Requests go through a wordle_batcher.MicroBatcher, which evaluates them together:
+candidate masks are built together, games reaching the same candidate set share one
+analysis, and solves play in lockstep. Evaluation runs in a worker thread so the event
+loop keeps accepting connections.
+
+    POST /next-guess  {"history": [["tares", "01020"], ...], "top": 5}
+    POST /solve       {"answers": ["crane", ...]}  (at most MAX_SOLVE_ANSWERS)
+    GET  /metrics
+    GET  /health
+
+Patterns are five digits, 0 wrong, 1 wrong position, 2 correct, or pattern codes.
+
+    python wordle_service.py serve [port] [solver] [max_batch] [max_wait_ms]
+    python wordle_service.py loadtest [concurrency] [games] [port] [max_batch] [max_wait_ms]
+"""
+import asyncio
+import json
+import sys
+from collections import deque
+from time import perf_counter
+
+import numpy as np
+
+import wordle
+import wordle_utils as utils
+import wordle_patterns as wp
+import wordle_sim as sim
+import wordle_weights as ww
+import wordle_words as words
+from wordle_batcher import DEFAULT_MAX_BATCH, DEFAULT_MAX_WAIT, Histogram, MicroBatcher
+from wordle_cache import SUMMARY_GUESSES, StateInfo, bitset_hash
+from wordle_solvers import SOLVERS, EntropySolver
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+MAX_BODY = 1 << 20
+# Seconds of completed requests the recent throughput is measured over
+THROUGHPUT_WINDOW = 10.0
+# Candidate words listed in a next guess response
+LISTED_CANDIDATES = 20
+# Most answers one /solve request may play
+MAX_SOLVE_ANSWERS = 256
+HTTP_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 413: 'Payload Too Large',
+                500: 'Internal Server Error'}
+
+
+class RequestError(Exception):
+    """
+    A request the service can't answer, reported to the client as a 400
+    """
+
+
+class ProtocolError(Exception):
+    """
+    A request that can't be read as HTTP, answered with status before closing the connection
+    """
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_pattern(pattern) -> int:
+    """
+    Get a pattern code from five 0/1/2 digits or a code
+    """
+    if isinstance(pattern, int) and 0 <= pattern < wp.NUM_PATTERNS:
+        return pattern
+    if isinstance(pattern, str) and len(pattern) == utils.WORD_LEN and set(pattern) <= set('012'):
+        return int(pattern, 3)
+    raise RequestError(f'Bad pattern {pattern!r}, expected {utils.WORD_LEN} digits of 0, 1 and 2')
+
+
+def parse_history(history) -> list[tuple[int, int]]:
+    """
+    Get (guess index, pattern code) pairs from a request's history
+    """
+    if not isinstance(history, list):
+        raise RequestError('history must be a list of [guess, pattern] pairs')
+    word_list = words.get_word_list()
+    pairs = []
+    for entry in history:
+        if not isinstance(entry, (list, tuple)) or len(entry) != 2:
+            raise RequestError('history must be a list of [guess, pattern] pairs')
+        guess = word_list.index_of(str(entry[0]).lower())
+        if guess is None:
+            raise RequestError(f'"{entry[0]}" is not on the word list')
+        pairs.append((guess, parse_pattern(entry[1])))
+    return pairs
+
+
+class Metrics:
+    """
+    Per endpoint latency histograms and throughput
+    """
+    __slots__ = ['__started', '__latency', '__recent', '__errors']
+
+    def __init__(self):
+        self.__started = perf_counter()
+        self.__latency = {}
+        self.__recent = deque()
+        self.__errors = 0
+
+    def record_request(self, endpoint: str, seconds: float, ok: bool = True):
+        self.__latency.setdefault(endpoint, Histogram()).record(seconds * 1000)
+        now = perf_counter()
+        self.__recent.append(now)
+        while self.__recent and self.__recent[0] < now - THROUGHPUT_WINDOW:
+            self.__recent.popleft()
+        if not ok:
+            self.__errors += 1
+
+    def snapshot(self) -> dict:
+        uptime = perf_counter() - self.__started
+        completed = sum(histogram.get_count() for histogram in self.__latency.values())
+        return {
+            'uptime_seconds': uptime,
+            'requests': completed,
+            'errors': self.__errors,
+            'requests_per_second': completed / uptime if uptime else 0.0,
+            'recent_requests_per_second': len(self.__recent) / min(THROUGHPUT_WINDOW, uptime) if uptime else 0.0,
+            'latency': {endpoint: histogram.snapshot() for endpoint, histogram in self.__latency.items()}
+        }
+
+
+class Engine:
+    """
+    Preloaded solver core that evaluates micro-batched requests
+    """
+    __slots__ = ['__solver', '__patterns', '__batcher', '__metrics']
+
+    def __init__(self, solver=None, max_batch: int = DEFAULT_MAX_BATCH, max_wait: float = DEFAULT_MAX_WAIT):
+        """
+        Params:
+            solver:Solver - strategy answering requests, defaults to EntropySolver
+            max_batch:int - most requests evaluated together
+            max_wait:float - seconds a batch waits to fill after its first request
+        """
+        self.__solver = EntropySolver() if solver is None else solver
+        # Load everything up front so no request pays for it
+        self.__patterns = wp.get_pattern_matrix()
+        wp.get_answer_pattern_matrix()
+        ww.get_weight_table()
+        self.__solver.get_opener()
+        self.__batcher = MicroBatcher(self.evaluate, max_batch, max_wait)
+        self.__metrics = Metrics()
+
+    def get_metrics(self) -> Metrics:
+        return self.__metrics
+
+    def get_solver(self):
+        return self.__solver
+
+    def get_batcher(self) -> MicroBatcher:
+        return self.__batcher
+
+    async def start(self):
+        await self.__batcher.start()
+
+    async def stop(self):
+        await self.__batcher.stop()
+
+    async def submit(self, kind: str, payload):
+        """
+        Queue a parsed request for the next batch and wait for its result
+        """
+        return await self.__batcher.submit((kind, payload))
+
+    def evaluate(self, requests: list[tuple[str, object]]) -> list:
+        """
+        Answer a batch of ('next_guess', (history, top)) and ('solve', answer indexes)
+        requests, returns a result or exception per request
+        """
+        results = [None] * len(requests)
+        next_guess = [i for i, (kind, _) in enumerate(requests) if kind == 'next_guess']
+        solve = [i for i, (kind, _) in enumerate(requests) if kind == 'solve']
+        if next_guess:
+            for i, result in zip(next_guess, self.next_guesses([requests[i][1] for i in next_guess])):
+                results[i] = result
+        if solve:
+            for i, result in zip(solve, self.solve([requests[i][1] for i in solve])):
+                results[i] = result
+        return results
+
+    def next_guesses(self, requests: list[tuple[list, int]]) -> list:
+        """
+        Suggested guesses for each (history, top), one analysis per distinct candidate set
+        """
+        masks = np.ones((len(requests), self.__patterns.shape[1]), dtype=bool)
+        for row, (history, _) in enumerate(requests):
+            for guess, code in history:
+                masks[row] &= self.__patterns[guess] == code
+        packed, first, inverse = np.unique(np.packbits(masks, axis=1), axis=0, return_index=True, return_inverse=True)
+        answer_sets = [np.flatnonzero(masks[row]) for row in first]
+        states = self.__solver.states(answer_sets, [bitset_hash(row) for row in packed])
+        suggestions = [self.suggest(answers, state) for answers, state in zip(answer_sets, states)]
+
+        results = []
+        for (history, top), suggestion in zip(requests, (suggestions[i] for i in inverse.ravel())):
+            if isinstance(suggestion, Exception):
+                results.append(suggestion)
+            elif history and history[-1][1] == wp.CORRECT_PATTERN:
+                results.append({'solved': True, 'answer': wordle.ALLOWED_WORDS[history[-1][0]], 'remaining': 1})
+            else:
+                results.append(dict(suggestion, guesses=suggestion['guesses'][:top]))
+        return results
+
+    @staticmethod
+    def suggest(answers: np.ndarray, state: StateInfo | None) -> dict | Exception:
+        """
+        Best guesses with expected bits for one candidate set from its analysis, None
+        for two or fewer candidates
+        """
+        if len(answers) == 0:
+            return RequestError('No word fits that history')
+        if len(answers) <= 2:
+            bits = float(np.log2(len(answers)))
+            guesses = [{'word': wordle.ALLOWED_WORDS[i], 'bits': bits} for i in answers]
+            best = int(answers[0])
+        else:
+            guesses = [{'word': wordle.ALLOWED_WORDS[i], 'bits': float(bits)} for i, bits in zip(state.top_guesses, state.top_info)]
+            best = state.guess
+        return {
+            'solved': False,
+            'best': wordle.ALLOWED_WORDS[best],
+            'guesses': guesses,
+            'remaining': int(len(answers)),
+            'candidates': [wordle.ALLOWED_WORDS[i] for i in answers[:LISTED_CANDIDATES]]
+        }
+
+    def solve(self, requests: list[np.ndarray]) -> list:
+        """
+        Play every requested answer in lockstep, sim.BATCH_SIZE games at a time to bound
+        the candidate masks, returns each game's guesses
+        """
+        answers = np.concatenate(requests) if requests else np.zeros(0, dtype=np.int64)
+        solved_in = np.zeros(len(answers), dtype=np.int64)
+        paths = np.full((len(answers), utils.MAX_GUESSES), -1, dtype=np.int64)
+        for start in range(0, len(answers), sim.BATCH_SIZE):
+            chunk = slice(start, start + sim.BATCH_SIZE)
+            solved_in[chunk], paths[chunk] = sim.play_paths(self.__solver, answers[chunk])
+        results, start = [], 0
+        for request in requests:
+            games = []
+            for game in range(start, start + len(request)):
+                played = paths[game][paths[game] >= 0]
+                games.append({
+                    'answer': wordle.ALLOWED_WORDS[answers[game]],
+                    'guesses': [wordle.ALLOWED_WORDS[i] for i in played],
+                    'solved': bool(solved_in[game])
+                })
+            results.append({'games': games})
+            start += len(request)
+        return results
+
+
+class SolverService:
+    """
+    HTTP front end of an Engine
+    """
+    __slots__ = ['__engine', '__server']
+
+    def __init__(self, engine: Engine):
+        self.__engine = engine
+        self.__server = None
+
+    async def start(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> int:
+        """
+        Start serving, returns the bound port (pass port 0 for any free one)
+        """
+        await self.__engine.start()
+        self.__server = await asyncio.start_server(self.__handle_connection, host, port)
+        return self.__server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self.__server is not None:
+            self.__server.close()
+            await self.__server.wait_closed()
+        await self.__engine.stop()
+
+    async def serve_forever(self):
+        async with self.__server:
+            await self.__server.serve_forever()
+
+    async def __handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                start = perf_counter()
+                status, response = await self.route(method, path, body)
+                self.__engine.get_metrics().record_request(path, perf_counter() - start, status == 200)
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                write_response(writer, status, response, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ProtocolError as error:
+            write_response(writer, error.status, {'error': str(error)}, keep_alive=False)
+            try:
+                await writer.drain()
+            except ConnectionError:
+                pass
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def route(self, method: str, path: str, body: bytes) -> tuple[int, dict]:
+        """
+        Dispatch one request, returns (status, JSON response)
+        """
+        if path == '/health':
+            return 200, {'ok': True}
+        if path == '/metrics':
+            return 200, self.metrics()
+        if path not in ('/next-guess', '/solve'):
+            return 404, {'error': f'No endpoint {path}'}
+        if method != 'POST':
+            return 405, {'error': f'{path} only accepts POST'}
+        try:
+            payload = json.loads(body or b'{}')
+            if not isinstance(payload, dict):
+                raise RequestError('Body must be a JSON object')
+            if path == '/next-guess':
+                top = int(payload.get('top', SUMMARY_GUESSES))
+                result = await self.__engine.submit('next_guess', (parse_history(payload.get('history', [])), max(1, top)))
+            else:
+                answers = payload.get('answers', [payload['answer']] if 'answer' in payload else [])
+                if len(answers) > MAX_SOLVE_ANSWERS:
+                    return 413, {'error': f'At most {MAX_SOLVE_ANSWERS} answers per request'}
+                indexes = words.get_word_list().indexes_of(str(answer).lower() for answer in answers)
+                if len(indexes) != len(answers) or len(indexes) == 0:
+                    raise RequestError('answers must be a nonempty list of words on the word list')
+                result = await self.__engine.submit('solve', indexes)
+        except (RequestError, ValueError, KeyError, TypeError) as error:
+            return 400, {'error': str(error)}
+        except Exception as error:
+            # Counted as an error by the request metrics like any non 200 answer
+            return 500, {'error': f'{type(error).__name__}: {error}'}
+        return 200, result
+
+    def metrics(self) -> dict:
+        metrics = self.__engine.get_metrics().snapshot()
+        cache = self.__engine.get_solver().get_cache()
+        metrics['cache'] = None if cache is None else cache.get_stats()
+        metrics['batcher'] = self.__engine.get_batcher().get_stats()
+        return metrics
+
+
+async def read_request(reader: asyncio.StreamReader) -> tuple | None:
+    """
+    Read one HTTP/1.1 request, None when the client closed the connection. Raises
+    ProtocolError for requests that can't be read.
+    """
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    parts = request_line.decode('latin-1').split()
+    if len(parts) != 3:
+        raise ProtocolError(400, 'Malformed request line')
+    method, path, _ = parts
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get('content-length', 0))
+    except ValueError:
+        raise ProtocolError(400, f'Bad Content-Length {headers["content-length"]!r}') from None
+    if length < 0:
+        raise ProtocolError(400, f'Bad Content-Length {length}')
+    if length > MAX_BODY:
+        raise ProtocolError(413, f'Request body over {MAX_BODY} bytes')
+    body = await reader.readexactly(length) if length else b''
+    return method.upper(), path.split('?')[0], headers, body
+
+
+def write_response(writer: asyncio.StreamWriter, status: int, response: dict, keep_alive: bool = True):
+    body = json.dumps(response).encode('utf-8')
+    head = (
+        f'HTTP/1.1 {status} {HTTP_REASONS.get(status, "")}\r\n'
+        f'Content-Type: application/json\r\n'
+        f'Content-Length: {len(body)}\r\n'
+        f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n'
+    )
+    writer.write(head.encode('latin-1') + body)
+
+
+class ServiceClient:
+    """
+    Minimal keep-alive JSON client for the service
+    """
+    __slots__ = ['__host', '__port', '__reader', '__writer']
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        self.__host = host
+        self.__port = port
+        self.__reader = None
+        self.__writer = None
+
+    async def request(self, method: str, path: str, payload: dict | None = None) -> tuple[int, dict]:
+        if self.__writer is None:
+            self.__reader, self.__writer = await asyncio.open_connection(self.__host, self.__port)
+        body = b'' if payload is None else json.dumps(payload).encode('utf-8')
+        head = f'{method} {path} HTTP/1.1\r\nHost: {self.__host}\r\nContent-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n'
+        self.__writer.write(head.encode('latin-1') + body)
+        await self.__writer.drain()
+        status_line = await self.__reader.readline()
+        status = int(status_line.split()[1])
+        length = 0
+        while True:
+            line = await self.__reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            if name.strip().lower() == 'content-length':
+                length = int(value)
+        return status, json.loads(await self.__reader.readexactly(length))
+
+    async def close(self):
+        if self.__writer is not None:
+            self.__writer.close()
+            await self.__writer.wait_closed()
+            self.__writer = None
+
+
+async def play_remote(client: ServiceClient, answer: str, top: int = 1) -> int:
+    """
+    Play one game against the service through /next-guess, returns guesses taken, 0 if lost
+    """
+    history = []
+    for turn in range(utils.MAX_GUESSES):
+        status, response = await client.request('POST', '/next-guess', {'history': history, 'top': top})
+        if status != 200:
+            raise RuntimeError(response.get('error'))
+        guess = response['best']
+        pattern = wp.pattern_to_index(wordle.Guess(guess, answer).get_score_pattern())
+        if pattern == wp.CORRECT_PATTERN:
+            return turn + 1
+        history.append([guess, np.base_repr(pattern, 3).zfill(utils.WORD_LEN)])
+    return 0
+
+
+async def load_test(concurrency: int = 32, games: int = 256, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                    seed: int = 0) -> dict:
+    """
+    Play games seeded random answers against a running service with concurrency
+    clients, returns client side throughput and the service's metrics
+    """
+    rng = np.random.default_rng(seed)
+    answers = [wordle.ALLOWED_WORDS[i] for i in rng.integers(len(wordle.ALLOWED_WORDS), size=games)]
+    queue = asyncio.Queue()
+    for answer in answers:
+        queue.put_nowait(answer)
+    latency = Histogram()
+    results = []
+
+    async def client_loop():
+        client = ServiceClient(host, port)
+        try:
+            while not queue.empty():
+                answer = queue.get_nowait()
+                start = perf_counter()
+                results.append(await play_remote(client, answer))
+                latency.record((perf_counter() - start) * 1000)
+        finally:
+            await client.close()
+
+    start = perf_counter()
+    await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+    seconds = perf_counter() - start
+    client = ServiceClient(host, port)
+    _, metrics = await client.request('GET', '/metrics')
+    await client.close()
+    return {
+        'games': games,
+        'concurrency': concurrency,
+        'seconds': seconds,
+        'games_per_second': games / seconds if seconds else 0.0,
+        'game_latency': latency.snapshot(),
+        'summary': sim.summarize(np.array(results, dtype=np.int64)),
+        'service': metrics
+    }
+
+
+async def run_local_load_test(concurrency: int, games: int, port: int = 0, solver=None,
+                              max_batch: int = DEFAULT_MAX_BATCH, max_wait: float = DEFAULT_MAX_WAIT) -> dict:
+    """
+    Start a service in this process and load test it
+    """
+    service = SolverService(Engine(solver, max_batch, max_wait))
+    port = await service.start(port=port)
+    try:
+        return await load_test(concurrency, games, port=port)
+    finally:
+        await service.stop()
+
+
+async def serve(port: int = DEFAULT_PORT, solver=None, max_batch: int = DEFAULT_MAX_BATCH, max_wait: float = DEFAULT_MAX_WAIT):
+    service = SolverService(Engine(solver, max_batch, max_wait))
+    port = await service.start(port=port)
+    print(f'Serving on http://{DEFAULT_HOST}:{port}')
+    await service.serve_forever()
+
+
+def main():
+    """
+    Serve or load test from the command line
+    """
+    command = sys.argv[1] if len(sys.argv) > 1 else 'serve'
+    if command == 'serve':
+        port = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_PORT
+        solver = SOLVERS[sys.argv[3]]() if len(sys.argv) > 3 else None
+        max_batch = int(sys.argv[4]) if len(sys.argv) > 4 else DEFAULT_MAX_BATCH
+        max_wait = float(sys.argv[5]) / 1000 if len(sys.argv) > 5 else DEFAULT_MAX_WAIT
+        asyncio.run(serve(port, solver, max_batch, max_wait))
+    elif command == 'loadtest':
+        concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+        games = int(sys.argv[3]) if len(sys.argv) > 3 else 256
+        # A port load tests a service already running there, 0 or none starts one in this process
+        port = int(sys.argv[4]) if len(sys.argv) > 4 else 0
+        max_batch = int(sys.argv[5]) if len(sys.argv) > 5 else DEFAULT_MAX_BATCH
+        max_wait = float(sys.argv[6]) / 1000 if len(sys.argv) > 6 else DEFAULT_MAX_WAIT
+        if port:
+            report = asyncio.run(load_test(concurrency, games, port=port))
+        else:
+            report = asyncio.run(run_local_load_test(concurrency, games, max_batch=max_batch, max_wait=max_wait))
+        print(json.dumps(report, indent=2))
+    else:
+        print('Usage: python wordle_service.py [serve [port] [solver] [max_batch] [max_wait_ms] | '
+              'loadtest [concurrency] [games] [port] [max_batch] [max_wait_ms]]')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+"""
+Batch game simulator.
+
+Plays a solver against many answers in lockstep: every game's candidate mask lives in
+one (games, N) bool array, feedback comes straight from the pattern matrix and each
+turn is a handful of array operations for the whole batch. Replaces running
+test_winrate's one Wordle and WordleAI object per game.
+
+Solvers given first guess partitions pick their second guesses from the opener's
+buckets, so turn 1 skips deduplicating the candidate masks.
+
+    python wordle_sim.py [solver] [processes] [partitions_path]
+"""
+import functools
+import os
+import sys
+from time import perf_counter
+
+import numpy as np
+
+import wordle
+import wordle_utils as utils
+import wordle_patterns as wp
+import wordle_scheduler as scheduler
+import wordle_words as words
+from wordle_solvers import SOLVERS, EntropySolver
+
+BATCH_SIZE = 1024
+
+
+def answer_indexes(answers=None) -> np.ndarray:
+    """
+    Get ALLOWED_WORDS indexes from a list of words or indexes, every word if None
+    """
+    if answers is None:
+        return np.arange(len(wordle.ALLOWED_WORDS))
+    answers = list(answers)
+    if answers and isinstance(answers[0], str):
+        return words.get_word_list().indexes_of(answers)
+    return np.asarray(answers, dtype=np.int64)
+
+
+def load_answer_list(path: str) -> np.ndarray:
+    """
+    Read a word list file into ALLOWED_WORDS indexes, skipping words not on the list
+    """
+    with open(path, 'r', encoding='utf-8') as file:
+        return answer_indexes(sorted(word.strip() for word in file if word.strip()))
+
+
+def play_paths(solver, answers: np.ndarray, max_guesses: int = utils.MAX_GUESSES) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Play one game per answer at once, returns (guesses each game took, 0 if lost,
+    (games, max_guesses) guess indexes played, -1 after the game ended)
+    """
+    patterns = wp.get_pattern_matrix()
+    answers = np.asarray(answers)
+    candidates = np.ones((len(answers), patterns.shape[1]), dtype=bool)
+    solved_in = np.zeros(len(answers), dtype=np.int64)
+    paths = np.full((len(answers), max_guesses), -1, dtype=np.int64)
+    active = np.arange(len(answers))
+    use_partitions = solver.get_partitions() is not None
+    codes = None
+    for turn in range(max_guesses):
+        if turn == 1 and use_partitions:
+            guesses = solver.second_guesses(codes)
+        else:
+            guesses = solver.next_guesses(candidates[active], turn)
+        paths[active, turn] = guesses
+        codes = patterns[guesses, answers[active]]
+        won = codes == wp.CORRECT_PATTERN
+        solved_in[active[won]] = turn + 1
+
+        active, guesses, codes = active[~won], guesses[~won], codes[~won]
+        if len(active) == 0:
+            break
+        candidates[active] &= patterns[guesses] == codes[:, None]
+    return solved_in, paths
+
+
+def play_batch(solver, answers: np.ndarray, max_guesses: int = utils.MAX_GUESSES) -> np.ndarray:
+    """
+    Play one game per answer at once, returns the guesses each game took, 0 if lost
+    """
+    return play_paths(solver, answers, max_guesses)[0]
+
+
+def play_answers(solver, max_guesses: int, batch_size: int, answers: np.ndarray) -> np.ndarray:
+    """
+    play_batch over answers batch_size games at a time
+    """
+    return np.concatenate([play_batch(solver, answers[start:start + batch_size], max_guesses)
+                           for start in range(0, len(answers), batch_size)])
+
+
+def summarize(solved_in: np.ndarray, max_guesses: int = utils.MAX_GUESSES) -> dict:
+    """
+    Guess count histogram, win rate and mean guesses of won games
+    """
+    histogram = np.bincount(solved_in, minlength=max_guesses + 1)
+    wins = len(solved_in) - histogram[0]
+    return {
+        'games': len(solved_in),
+        'histogram': {str(guesses): int(histogram[guesses]) for guesses in range(1, max_guesses + 1)},
+        'failed': int(histogram[0]),
+        'win_rate': float(wins / len(solved_in)) if len(solved_in) else 0.0,
+        'mean_guesses': float(solved_in[solved_in > 0].mean()) if wins else 0.0
+    }
+
+
+def simulate(solver=None, answers=None, sample: int | None = None, seed: int = 0,
+             max_guesses: int = utils.MAX_GUESSES, batch_size: int = BATCH_SIZE,
+             processes: int = 1, verbose: bool = False) -> dict:
+    """
+    Play solver (default EntropySolver) against every answer, or sample of them drawn
+    with seed, and summarize the results. processes > 1 shards the answers across
+    worker processes that share the memory mapped pattern matrix.
+    """
+    solver = EntropySolver() if solver is None else solver
+    answers = answer_indexes(answers)
+    if sample is not None and sample < len(answers):
+        answers = np.sort(np.random.default_rng(seed).choice(answers, sample, replace=False))
+
+    start = perf_counter()
+    if processes > 1:
+        solved_in = np.zeros(len(answers), dtype=np.int64)
+        positions = np.arange(len(answers))
+
+        def store(shard: scheduler.Shard, result: np.ndarray):
+            solved_in[shard.items] = result
+
+        task = functools.partial(play_positions, solver, max_guesses, batch_size, answers)
+        shards = scheduler.make_shards(positions, num_shards=processes * scheduler.SHARDS_PER_WORKER)
+        scheduler.run_sharded(task, shards, processes, on_result=store, verbose=verbose)
+    else:
+        solved_in = play_answers(solver, max_guesses, batch_size, answers)
+
+    summary = summarize(solved_in, max_guesses)
+    summary['solver'] = solver.name
+    summary['seconds'] = perf_counter() - start
+    if processes <= 1 and solver.get_cache() is not None:
+        summary['cache'] = solver.get_cache().get_stats()
+    if verbose:
+        print(summary)
+    return summary
+
+
+def play_positions(solver, max_guesses: int, batch_size: int, answers: np.ndarray, positions: np.ndarray) -> np.ndarray:
+    """
+    Worker task for simulate, plays answers[positions]
+    """
+    return play_answers(solver, max_guesses, batch_size, answers[positions])
+
+
+def main():
+    """
+    Simulate a solver against every word
+    """
+    name = sys.argv[1] if len(sys.argv) > 1 else EntropySolver.name
+    processes = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+    partitions = sys.argv[3] if len(sys.argv) > 3 else None
+    solver = SOLVERS[name](partitions=partitions)
+    simulate(solver, processes=processes, verbose=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,232 @@
+"""
+Vectorized solver strategies.
+
+A solver picks the next guess for a whole batch of games at once from their candidate
+masks, a (games, N) bool array over ALLOWED_WORDS. Games that reach the same candidate
+set share one decision. Solvers only keep settings, never matrices, so they pickle
+cheaply into worker processes.
+"""
+import functools
+
+import numpy as np
+
+import wordle
+import wordle_patterns as wp
+import wordle_weights as ww
+import wordle_words as words
+from wordle_cache import DEFAULT_CACHE_ENTRIES, StateInfo, TranspositionCache, bitset_hash, candidate_hash, state_info
+from wordle_info import bucket_info, candidate_buckets, expected_info
+
+
+@functools.cache
+def best_entropy_opener() -> int:
+    """
+    Index of the first guess with the most expected information over every word
+    """
+    return int(np.argmax(expected_info()))
+
+
+class Solver:
+    """
+    Base strategy: subclasses score every allowed guess against a candidate set
+    with score_guesses, lower is better, and ties go to guesses that could be the answer.
+    Decisions are kept in a TranspositionCache so games reaching a candidate set
+    another game already reached reuse its analysis. With first guess partitions the
+    second guesses are picked from the opener's buckets, see second_guesses.
+    """
+    __slots__ = ['__opener', '__cache', '__partitions']
+    name = 'solver'
+
+    def __init__(self, opener: str | None = None, cache_entries: int = DEFAULT_CACHE_ENTRIES,
+                 partitions: str | None = None):
+        """
+        Params:
+            opener:str - first guess of every game, defaults to best_entropy_opener()
+            cache_entries:int - candidate sets remembered, 0 turns the cache off
+            partitions:str - path of first guess partitions over every word, see
+                             wordle_partitions, loaded once per process when first used
+        """
+        self.__opener = opener
+        self.__cache = TranspositionCache(cache_entries) if cache_entries > 0 else None
+        self.__partitions = partitions
+
+    def get_opener(self) -> int:
+        """
+        Get first guess index
+        """
+        if self.__opener is None:
+            return best_entropy_opener()
+        return words.get_word_list().get_index()[self.__opener]
+
+    def get_partitions(self):
+        """
+        Get the FirstGuessPartitions second guesses are read from, None if not set
+        """
+        if self.__partitions is None:
+            return None
+        from wordle_partitions import get_partitions
+        partitions = get_partitions(self.__partitions)
+        if len(partitions.get_answers()) != len(wordle.ALLOWED_WORDS):
+            raise ValueError(f'{self.__partitions} must partition every word to pick second guesses')
+        return partitions
+
+    def score_guesses(self, buckets: np.ndarray, sizes: np.ndarray, total: int) -> np.ndarray:
+        """
+        Score every allowed guess from its nonempty buckets, see wordle_info.candidate_buckets
+        """
+        raise NotImplementedError
+
+    def guess_info(self, scores: np.ndarray, buckets: np.ndarray, sizes: np.ndarray, total: int) -> np.ndarray:
+        """
+        Expected information of every allowed guess, solvers that score by it return it from scores
+        """
+        return bucket_info(buckets, sizes, len(wordle.ALLOWED_WORDS), total)
+
+    def get_cache(self) -> TranspositionCache | None:
+        return self.__cache
+
+    def analyze(self, answers: np.ndarray) -> StateInfo:
+        """
+        Score every guess against one sorted array of more than two candidate answer
+        indexes, returns the pick with its entropy summary and partition
+        """
+        buckets, sizes = candidate_buckets(answers)
+        scores = self.score_guesses(buckets, sizes, len(answers))
+        best = np.flatnonzero(scores <= scores.min() + 1e-9)
+        in_answers = best[np.isin(best, answers)]
+        guess = int(in_answers[0] if len(in_answers) else best[0])
+        info = self.guess_info(scores, buckets, sizes, len(answers))
+        return state_info(guess, info, buckets, sizes)
+
+    def state(self, answers: np.ndarray, key: bytes | None = None) -> StateInfo:
+        """
+        analyze through the cache, key is the candidate set's hash if already known
+        """
+        if self.__cache is None:
+            return self.analyze(answers)
+        key = candidate_hash(np.isin(np.arange(len(wordle.ALLOWED_WORDS)), answers)) if key is None else key
+        entry = self.__cache.get(key)
+        if entry is None:
+            entry = self.analyze(answers)
+            self.__cache.put(key, entry)
+        return entry
+
+    def states(self, answer_sets: list[np.ndarray], keys: list[bytes] | None = None) -> list[StateInfo | None]:
+        """
+        state of every distinct candidate set in a batch, None for sets of two or fewer
+        candidates, which need no analysis
+        """
+        keys = [None] * len(answer_sets) if keys is None else keys
+        return [self.state(answers, key) if len(answers) > 2 else None for answers, key in zip(answer_sets, keys)]
+
+    def choose(self, answers: np.ndarray, key: bytes | None = None) -> int:
+        """
+        Pick the next guess for one sorted array of candidate answer indexes,
+        key is the candidate set's hash to look it up in the cache
+        """
+        if len(answers) <= 2:
+            return int(answers[0])
+        return self.state(answers, key).guess
+
+    def next_guesses(self, candidates: np.ndarray, turn: int) -> np.ndarray:
+        """
+        Get (games,) next guess indexes from (games, N) candidate masks
+        """
+        if turn == 0:
+            return np.full(len(candidates), self.get_opener(), dtype=np.int64)
+        packed, first, inverse = np.unique(np.packbits(candidates, axis=1), axis=0, return_index=True, return_inverse=True)
+        answer_sets = [np.flatnonzero(candidates[row]) for row in first]
+        return self.pick(answer_sets, [bitset_hash(row) for row in packed])[inverse.ravel()]
+
+    def pick(self, answer_sets: list[np.ndarray], keys: list[bytes] | None = None) -> np.ndarray:
+        """
+        Next guess for each distinct sorted array of candidate answer indexes, keys are
+        their hashes if already known
+        """
+        states = self.states(answer_sets, keys)
+        return np.array([int(answers[0]) if state is None else state.guess for answers, state in zip(answer_sets, states)], dtype=np.int64)
+
+    def second_guesses(self, codes: np.ndarray) -> np.ndarray:
+        """
+        Get (games,) second guesses after the opener gave codes, the same picks as
+        next_guesses on turn 1 with every candidate set read straight from the
+        partitions instead of deduplicated from candidate masks
+        """
+        partitions = self.get_partitions()
+        if partitions is None:
+            raise ValueError('second_guesses needs the solver to be given first guess partitions')
+        opener = self.get_opener()
+        unique, inverse = np.unique(codes, return_inverse=True)
+        answer_sets = [partitions.remaining(opener, int(code)).astype(np.int64) for code in unique]
+        return self.pick(answer_sets)[inverse.ravel()]
+
+
+class EntropySolver(Solver):
+    """
+    Greedy information theory: guess with the most expected bits
+    """
+    __slots__ = []
+    name = 'entropy'
+
+    def score_guesses(self, buckets, sizes, total):
+        return -bucket_info(buckets, sizes, len(wordle.ALLOWED_WORDS), total)
+
+    def guess_info(self, scores, buckets, sizes, total):
+        return -scores
+
+
+class ExpectedSizeSolver(Solver):
+    """
+    Guess leaving the fewest candidates on average, sum(size ** 2) / total
+    """
+    __slots__ = []
+    name = 'min-expected'
+
+    def score_guesses(self, buckets, sizes, total):
+        sizes = sizes.astype(np.float64)
+        return np.bincount(buckets // wp.NUM_PATTERNS, weights=sizes * sizes, minlength=len(wordle.ALLOWED_WORDS)) / total
+
+
+class MinimaxSolver(Solver):
+    """
+    Guess whose largest bucket is smallest, expected size breaks ties
+    """
+    __slots__ = []
+    name = 'minimax'
+
+    def score_guesses(self, buckets, sizes, total):
+        guesses = buckets // wp.NUM_PATTERNS
+        starts = np.flatnonzero(np.diff(guesses, prepend=-1))
+        largest = np.maximum.reduceat(sizes, starts)
+        sizes = sizes.astype(np.float64)
+        expected = np.bincount(guesses, weights=sizes * sizes, minlength=len(wordle.ALLOWED_WORDS)) / total
+        return largest + expected / (total + 1)
+
+
+class LetterProbSolver(Solver):
+    """
+    Guess the remaining candidate with the highest letter probability weight, the
+    deterministic version of wordle_ai_old.WordleAI's weighted pick
+    """
+    __slots__ = []
+    name = 'letter-prob'
+
+    def next_guesses(self, candidates: np.ndarray, turn: int) -> np.ndarray:
+        if turn == 0:
+            return np.full(len(candidates), self.get_opener(), dtype=np.int64)
+        return np.argmax(np.where(candidates, letter_prob_weights(), -np.inf), axis=1)
+
+    def pick(self, answer_sets, keys=None):
+        weights = letter_prob_weights()
+        return np.array([answers[np.argmax(weights[answers])] for answers in answer_sets], dtype=np.int64)
+
+
+@functools.cache
+def letter_prob_weights() -> np.ndarray:
+    """
+    Letter probability weight of every word in ALLOWED_WORDS order
+    """
+    return np.asarray(ww.get_weights('letter_prob'), dtype=np.float64)
+
+
+SOLVERS = {solver.name: solver for solver in (EntropySolver, ExpectedSizeSolver, MinimaxSolver, LetterProbSolver)}
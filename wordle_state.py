@@ -0,0 +1,210 @@
+"""
+Vectorized board state encoding for the Q-network.
+
+Boards are described by arrays instead of Board and Guess objects: (B, MAX_GUESSES)
+guess indexes, -1 for turns not played yet, and (B, MAX_GUESSES) pattern codes. A
+whole batch is written into a preallocated float32 buffer with a few table lookups.
+
+The compact layout is get_state_from_board's 61 features: guesses left / MAX_GUESSES
+rounded to 2 places, then (letter, score) per tile with letters (i + 1) / 27 and scores
+0.33, 0.66 or 1, zero for tiles not played. The one hot layout keeps guesses left and
+gives every tile 26 letter and 3 score indicators instead.
+"""
+import numpy as np
+
+import wordle
+import wordle_utils as utils
+import wordle_patterns as wp
+
+try:
+    import torch
+except ImportError:
+    torch = None
+
+TILES = utils.MAX_GUESSES * utils.WORD_LEN
+STATE_SIZE = 1 + TILES * 2
+ONE_HOT_STATE_SIZE = 1 + TILES * (len(wp.ALPHABET) + 3)
+LAYOUT_SIZES = {
+    'compact': STATE_SIZE,
+    'one_hot': ONE_HOT_STATE_SIZE
+}
+
+LETTER_VALUES = ((np.arange(len(wp.ALPHABET)) + 1) / (len(wp.ALPHABET) + 1)).astype(np.float32)
+TRIT_VALUES = np.array([0.33, 0.66, 1.0], dtype=np.float32)
+# Feature 0 by number of guesses made
+GUESSES_LEFT_VALUES = np.round((utils.MAX_GUESSES - np.arange(utils.MAX_GUESSES + 1)) / utils.MAX_GUESSES, 2).astype(np.float32)
+# (NUM_PATTERNS, WORD_LEN) trit of every tile of every pattern code, first letter first
+PATTERN_TRITS = (np.arange(wp.NUM_PATTERNS)[:, None] // 3 ** np.arange(utils.WORD_LEN - 1, -1, -1) % 3).astype(np.int8)
+
+
+def encode_tiles(letters: np.ndarray, trits: np.ndarray, guesses_made: np.ndarray, out: np.ndarray,
+                 layout: str = 'compact') -> np.ndarray:
+    """
+    Write (B, MAX_GUESSES, WORD_LEN) letter indexes and trits of boards with guesses_made
+    guesses each into out, (B, LAYOUT_SIZES[layout]) float32. Tiles past guesses_made
+    are ignored.
+    """
+    batch = len(guesses_made)
+    played = (np.arange(utils.MAX_GUESSES) < guesses_made[:, None])[:, :, None]
+    np.take(GUESSES_LEFT_VALUES, guesses_made, out=out[:, 0], mode='clip')
+    if layout == 'compact':
+        tiles = out[:, 1:].reshape(batch, utils.MAX_GUESSES, utils.WORD_LEN, 2)
+        np.multiply(LETTER_VALUES[letters], played, out=tiles[..., 0])
+        np.multiply(TRIT_VALUES[trits], played, out=tiles[..., 1])
+    elif layout == 'one_hot':
+        tiles = out[:, 1:].reshape(batch, utils.MAX_GUESSES, utils.WORD_LEN, len(wp.ALPHABET) + 3)
+        tiles[:] = 0
+        played = np.broadcast_to(played, letters.shape)
+        rows, turns, positions = np.nonzero(played)
+        tiles[rows, turns, positions, letters[played]] = 1
+        tiles[rows, turns, positions, len(wp.ALPHABET) + trits[played]] = 1
+    else:
+        raise ValueError(f'Unknown layout {layout!r}, expected one of {list(LAYOUT_SIZES)}')
+    return out
+
+
+def encode_states(guesses: np.ndarray, codes: np.ndarray, out: np.ndarray | None = None,
+                  layout: str = 'compact') -> np.ndarray:
+    """
+    Encode (B, MAX_GUESSES) guess indexes, -1 where not played, and their pattern
+    codes into out, allocated if None
+    """
+    guesses = np.asarray(guesses)
+    codes = np.asarray(codes)
+    if out is None:
+        out = np.empty((len(guesses), LAYOUT_SIZES[layout]), dtype=np.float32)
+    guesses_made = np.count_nonzero(guesses >= 0, axis=1)
+    letters = wp.LETTERS[np.maximum(guesses, 0)]
+    trits = PATTERN_TRITS[np.clip(codes, 0, wp.CORRECT_PATTERN)]
+    return encode_tiles(letters, trits, guesses_made, out, layout)
+
+
+def board_tiles(board: wordle.Board) -> tuple[np.ndarray, np.ndarray, int]:
+    """
+    Get (MAX_GUESSES, WORD_LEN) letter indexes, trits and the guesses made on a board
+    """
+    letters = np.zeros((utils.MAX_GUESSES, utils.WORD_LEN), dtype=np.int64)
+    trits = np.zeros((utils.MAX_GUESSES, utils.WORD_LEN), dtype=np.int64)
+    turn = 0
+    for guess in board.get_guesses():
+        if isinstance(guess, str):
+            continue
+        for i, (letter, score) in enumerate(guess.get_feedback()):
+            letters[turn, i] = ord(letter) - ord('a')
+            trits[turn, i] = wp.SCORE_TO_TRIT[score]
+        turn += 1
+    return letters, trits, turn
+
+
+def encode_board(board: wordle.Board, out: np.ndarray | None = None, layout: str = 'compact') -> np.ndarray:
+    """
+    Encode one Board into out, (LAYOUT_SIZES[layout],) float32, allocated if None
+    """
+    letters, trits, guesses_made = board_tiles(board)
+    out = np.empty(LAYOUT_SIZES[layout], dtype=np.float32) if out is None else out
+    encode_tiles(letters[None], trits[None], np.array([guesses_made]), out[None], layout)
+    return out
+
+
+class StateEncoder:
+    """
+    Encodes batches of boards into one reused buffer. With torch installed the same
+    memory is also exposed as a CPU tensor, and copied into a device tensor when the
+    model lives elsewhere.
+    """
+    __slots__ = ['__layout', '__buffer', '__tensor', '__device_tensor']
+
+    def __init__(self, batch_size: int, layout: str = 'compact', device=None):
+        """
+        Params:
+            batch_size:int - most boards encoded per call
+            layout:str - 'compact' for the 61 feature layout or 'one_hot'
+            device:torch.device - device of the tensors returned by encode_tensor, None for CPU
+        """
+        if layout not in LAYOUT_SIZES:
+            raise ValueError(f'Unknown layout {layout!r}, expected one of {list(LAYOUT_SIZES)}')
+        self.__layout = layout
+        self.__buffer = np.zeros((batch_size, LAYOUT_SIZES[layout]), dtype=np.float32)
+        self.__tensor = None if torch is None else torch.from_numpy(self.__buffer)
+        self.__device_tensor = None
+        if torch is not None and device is not None and torch.device(device).type != 'cpu':
+            self.__device_tensor = torch.empty(self.__buffer.shape, dtype=torch.float32, device=device)
+
+    def get_layout(self) -> str:
+        return self.__layout
+
+    def get_state_size(self) -> int:
+        return self.__buffer.shape[1]
+
+    def get_buffer(self) -> np.ndarray:
+        return self.__buffer
+
+    def encode(self, guesses: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        """
+        Encode up to batch_size boards, returns a view of the first rows of the buffer
+        that the next call overwrites
+        """
+        out = self.__buffer[:len(guesses)]
+        return encode_states(guesses, codes, out, self.__layout)
+
+    def encode_boards(self, boards: list) -> np.ndarray:
+        """
+        encode from Board objects
+        """
+        for row, board in enumerate(boards):
+            encode_board(board, self.__buffer[row], self.__layout)
+        return self.__buffer[:len(boards)]
+
+    def to_tensor(self, rows: int):
+        """
+        Get the first rows of the buffer as a tensor on the encoder's device
+        """
+        if torch is None:
+            raise ImportError('torch is needed for tensor states')
+        if self.__device_tensor is None:
+            return self.__tensor[:rows]
+        return self.__device_tensor[:rows].copy_(self.__tensor[:rows], non_blocking=True)
+
+    def encode_tensor(self, guesses: np.ndarray, codes: np.ndarray):
+        """
+        encode straight into a tensor, no copy on CPU
+        """
+        self.encode(guesses, codes)
+        return self.to_tensor(len(guesses))
+
+
+def main():
+    """
+    Check the encoder against get_state_from_board and time both
+    """
+    from time import perf_counter
+
+    rng = np.random.default_rng(0)
+    games = 2000
+    patterns = wp.get_pattern_matrix()
+    answers = rng.integers(len(wordle.ALLOWED_WORDS), size=games)
+    turns = rng.integers(utils.MAX_GUESSES + 1, size=games)
+    guesses = rng.integers(len(wordle.ALLOWED_WORDS), size=(games, utils.MAX_GUESSES))
+    guesses[np.arange(utils.MAX_GUESSES) >= turns[:, None]] = -1
+    codes = np.where(guesses >= 0, patterns[np.maximum(guesses, 0), answers[:, None]], 0)
+
+    boards = []
+    for game in range(games):
+        board = wordle.Board()
+        for guess in guesses[game][guesses[game] >= 0]:
+            board.make_guess(wordle.Guess(wordle.ALLOWED_WORDS[guess], wordle.ALLOWED_WORDS[answers[game]]))
+        boards.append(board)
+
+    start = perf_counter()
+    expected = np.array([wordle.get_state_from_board(board) for board in boards], dtype=np.float32)
+    old_seconds = perf_counter() - start
+    encoder = StateEncoder(games)
+    start = perf_counter()
+    states = encoder.encode(guesses, codes)
+    new_seconds = perf_counter() - start
+    print(f'Max difference: {float(np.abs(states - expected).max())}')
+    print(f'get_state_from_board: {round(old_seconds * 1e6 / games, 2)}us/board, StateEncoder: {round(new_seconds * 1e6 / games, 2)}us/board')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,275 @@
+"""
+Offline decision tree compiler.
+
+Plays a solver strategy against every answer at once, level by level, and records
+each decision: node -> guess, and (node, pattern) -> next node. Every node is the set
+of words consistent with the path to it, so the solver only runs once per distinct
+state. At runtime each move is a single dict lookup.
+
+    python wordle_tree.py [strategy] [answers|nyt]
+"""
+import os
+import sys
+from time import perf_counter
+
+import numpy as np
+
+import wordle
+import wordle_utils as utils
+import wordle_patterns as wp
+import wordle_sim as sim
+import wordle_words as words
+from wordle_solvers import SOLVERS
+
+TREE_VERSION = 1
+TREE_DIR = f'.{utils.ASSETS_PATH}/trees'
+# Depth past which a branch is left unsolved instead of expanded
+MAX_TREE_DEPTH = 12
+# Nodes whose candidate masks are built at once when asking the solver for guesses
+NODE_BATCH = 1024
+ANSWER_LISTS = {
+    'answers': utils.POSSIBLE_ANSWERS_PATH,
+    'nyt': utils.NEW_ALLOWED_GUESSES_PATH
+}
+
+
+def tree_path(strategy: str, answer_list: str = 'nyt') -> str:
+    return f'{TREE_DIR}/{strategy}_{answer_list}.npz'
+
+
+def split_by_pattern(codes: np.ndarray) -> tuple[np.ndarray, list[np.ndarray]]:
+    """
+    Group positions of codes by value, returns (unique codes, positions of each)
+    """
+    order = np.argsort(codes, kind='stable')
+    unique, starts = np.unique(codes[order], return_index=True)
+    return unique, np.split(order, starts[1:])
+
+
+def level_guesses(solver, frontier: list[np.ndarray], depth: int) -> np.ndarray:
+    """
+    Ask solver for the guess of every frontier node from its candidate indexes
+    """
+    num_words = len(wordle.ALLOWED_WORDS)
+    guesses = np.empty(len(frontier), dtype=np.int64)
+    for start in range(0, len(frontier), NODE_BATCH):
+        batch = frontier[start:start + NODE_BATCH]
+        masks = np.zeros((len(batch), num_words), dtype=bool)
+        for row, candidates in enumerate(batch):
+            masks[row, candidates] = True
+        guesses[start:start + len(batch)] = solver.next_guesses(masks, depth)
+    return guesses
+
+
+def compile_tree(solver, answers=None, max_depth: int = MAX_TREE_DEPTH, verbose: bool = False) -> dict:
+    """
+    Build the complete decision tree of solver over answers (default every word).
+    Nodes are numbered breadth first from the root at 0. Returns the tree arrays:
+        guesses - (nodes,) guess index of each node
+        depths - (nodes,) turn of each node's guess, 0 for the opener
+        edge_keys - (edges,) sorted parent * NUM_PATTERNS + pattern
+        edge_children - (edges,) child node of each edge key
+        solved_in - (answers,) guesses taken per answer, 0 if it was never guessed
+        answers - (answers,) answer indexes the tree was built for
+    """
+    patterns = wp.get_pattern_matrix()
+    answers = sim.answer_indexes(answers)
+    is_answer = np.zeros(len(wordle.ALLOWED_WORDS), dtype=bool)
+    is_answer[answers] = True
+    answer_position = np.full(len(wordle.ALLOWED_WORDS), -1, dtype=np.int64)
+    answer_position[answers] = np.arange(len(answers))
+
+    guesses, depths, edge_keys, edge_children = [], [], [], []
+    solved_in = np.zeros(len(answers), dtype=np.int64)
+    frontier = [np.arange(len(wordle.ALLOWED_WORDS))]
+    start = perf_counter()
+    for depth in range(max_depth):
+        if not frontier:
+            break
+        first_node = len(guesses)
+        level = level_guesses(solver, frontier, depth)
+        guesses.extend(level.tolist())
+        depths.extend([depth] * len(frontier))
+
+        next_frontier = []
+        for offset, (candidates, guess) in enumerate(zip(frontier, level)):
+            node = first_node + offset
+            if is_answer[guess] and np.any(candidates == guess):
+                solved_in[answer_position[guess]] = depth + 1
+            codes, groups = split_by_pattern(patterns[guess, candidates])
+            for code, group in zip(codes, groups):
+                child = candidates[group]
+                if code == wp.CORRECT_PATTERN or not is_answer[child].any():
+                    continue
+                if len(child) == len(candidates):
+                    raise ValueError(f'{solver.name} guessed {wordle.ALLOWED_WORDS[guess]} without narrowing {len(candidates)} candidates')
+                edge_keys.append(node * wp.NUM_PATTERNS + int(code))
+                edge_children.append(first_node + len(frontier) + len(next_frontier))
+                next_frontier.append(child)
+        if verbose:
+            print(f'Depth {depth + 1}: {len(frontier)} nodes, {len(next_frontier)} open - {round(perf_counter() - start, 2)}s')
+        frontier = next_frontier
+
+    return {
+        'guesses': np.array(guesses, dtype=np.int32),
+        'depths': np.array(depths, dtype=np.uint8),
+        'edge_keys': np.array(edge_keys, dtype=np.int64),
+        'edge_children': np.array(edge_children, dtype=np.int32),
+        'solved_in': solved_in,
+        'answers': answers
+    }
+
+
+def save_tree(path: str, tree: dict, strategy: str):
+    """
+    Write compiled tree arrays to a compressed npz with its version, strategy and word list hash
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    np.savez_compressed(
+        path,
+        version=np.array(TREE_VERSION),
+        strategy=np.array(strategy),
+        words_hash=np.frombuffer(utils.word_list_hash(wordle.ALLOWED_WORDS), dtype=np.uint8),
+        **tree
+    )
+
+
+class DecisionTree:
+    """
+    A compiled decision tree loaded for O(1) move lookups
+    """
+    __slots__ = ['__strategy', '__guesses', '__depths', '__edge_keys', '__edge_children', '__children', '__solved_in', '__answers']
+
+    def __init__(self, path: str):
+        """
+        Params:
+            path:str - npz written by save_tree
+        """
+        with np.load(path) as data:
+            if int(data['version']) != TREE_VERSION:
+                raise ValueError(f'{path} is tree version {int(data["version"])}, expected {TREE_VERSION}')
+            if data['words_hash'].tobytes() != utils.word_list_hash(wordle.ALLOWED_WORDS):
+                raise ValueError(f'{path} was built from a different word list, recompile it')
+            self.__strategy = str(data['strategy'])
+            self.__guesses = data['guesses']
+            self.__depths = data['depths']
+            self.__edge_keys = data['edge_keys']
+            self.__edge_children = data['edge_children']
+            self.__solved_in = data['solved_in']
+            self.__answers = data['answers']
+        self.__children = dict(zip(self.__edge_keys.tolist(), self.__edge_children.tolist()))
+
+    def __len__(self) -> int:
+        return len(self.__guesses)
+
+    def get_strategy(self) -> str:
+        return self.__strategy
+
+    def get_guess(self, node: int = 0) -> int:
+        """
+        Get guess index at a node, the root is 0
+        """
+        return int(self.__guesses[node])
+
+    def get_child(self, node: int, pattern: int) -> int | None:
+        """
+        Get the node reached from node by a pattern code, None if the tree never reaches it
+        """
+        return self.__children.get(node * wp.NUM_PATTERNS + pattern)
+
+    def get_children(self, nodes: np.ndarray, patterns: np.ndarray) -> np.ndarray:
+        """
+        get_child for arrays of nodes and patterns, -1 where there is no child
+        """
+        keys = np.asarray(nodes, dtype=np.int64) * wp.NUM_PATTERNS + patterns
+        if len(self.__edge_keys) == 0:
+            return np.full(len(keys), -1, dtype=np.int64)
+        found = np.minimum(np.searchsorted(self.__edge_keys, keys), len(self.__edge_keys) - 1)
+        return np.where(self.__edge_keys[found] == keys, self.__edge_children[found], -1)
+
+    def get_guesses(self, nodes: np.ndarray) -> np.ndarray:
+        return self.__guesses[nodes]
+
+    def get_depths(self) -> np.ndarray:
+        return self.__depths
+
+    def summary(self) -> dict:
+        """
+        Guess histogram, win rate and mean guesses over the answers it was compiled for
+        """
+        # Answers the tree only reaches past the last turn count as lost
+        solved_in = np.where(self.__solved_in <= utils.MAX_GUESSES, self.__solved_in, 0)
+        summary = sim.summarize(solved_in)
+        summary['nodes'] = len(self)
+        summary['max_depth'] = int(self.__depths.max()) + 1
+        return summary
+
+
+class TreePlayer:
+    """
+    Plays one game by walking a DecisionTree, reading feedback like WordleAI.read_report
+    """
+    __slots__ = ['__tree', '__node']
+
+    def __init__(self, tree: DecisionTree):
+        self.__tree = tree
+        self.__node = 0
+
+    def next_guess(self) -> str | None:
+        """
+        Get the next word to guess, None once play has left the tree
+        """
+        if self.__node is None:
+            return None
+        return wordle.ALLOWED_WORDS[self.__tree.get_guess(self.__node)]
+
+    def read_report(self, guess: wordle.Guess):
+        """
+        Move to the node the guess's feedback leads to
+        """
+        if self.__node is not None:
+            self.__node = self.__tree.get_child(self.__node, wp.pattern_to_index(guess.get_score_pattern()))
+
+
+def play_tree(tree: DecisionTree, answers, max_guesses: int = utils.MAX_GUESSES) -> np.ndarray:
+    """
+    Play every answer through the tree at once, returns guesses taken, 0 if lost
+    """
+    patterns = wp.get_pattern_matrix()
+    answers = np.asarray(answers)
+    solved_in = np.zeros(len(answers), dtype=np.int64)
+    nodes = np.zeros(len(answers), dtype=np.int64)
+    active = np.arange(len(answers))
+    for turn in range(max_guesses):
+        codes = patterns[tree.get_guesses(nodes), answers[active]]
+        won = codes == wp.CORRECT_PATTERN
+        solved_in[active[won]] = turn + 1
+        nodes = tree.get_children(nodes[~won], codes[~won])
+        active = active[~won]
+        reachable = nodes >= 0
+        nodes, active = nodes[reachable], active[reachable]
+        if len(active) == 0:
+            break
+    return solved_in
+
+
+def main():
+    """
+    Compile a strategy's tree from the command line
+    """
+    strategy = sys.argv[1] if len(sys.argv) > 1 else 'entropy'
+    answer_list = sys.argv[2] if len(sys.argv) > 2 else 'nyt'
+    if strategy not in SOLVERS or answer_list not in ANSWER_LISTS:
+        print(f'Usage: python wordle_tree.py [{"|".join(SOLVERS)}] [{"|".join(ANSWER_LISTS)}]')
+        return
+    answers = words.get_word_list().indexes_of(words.get_word_list(ANSWER_LISTS[answer_list]).get_words())
+    start = perf_counter()
+    tree = compile_tree(SOLVERS[strategy](), answers, verbose=True)
+    path = tree_path(strategy, answer_list)
+    save_tree(path, tree, strategy)
+    print(f'Compiled {len(tree["guesses"])} nodes to {path} in {round(perf_counter() - start, 2)}s')
+    print(DecisionTree(path).summary())
+
+
+if __name__ == '__main__':
+    main()
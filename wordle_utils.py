@@ -1,6 +1,8 @@
 """
 Helper functions used by Wordle
 """
+import hashlib
+
 # Colours used in output
 RED = '\033[1;31m'
 GREEN = '\033[1;32m'
@@ -65,3 +67,11 @@ def remove_flag_from_dict(flag, result, answer_dict):
                 else:
                     value[1] = WRONG
                 break
+
+
+def word_list_hash(words) -> bytes:
+    """
+    SHA-1 digest of a word list in order, stored in binary asset headers so an asset
+    built against a different word list is caught at load time
+    """
+    return hashlib.sha1('\n'.join(words).encode('utf-8')).digest()
@@ -0,0 +1,213 @@
+"""
+Binary word weight store.
+
+Every JSON weight asset becomes one float32 column of a single file, aligned to
+ALLOWED_WORDS order, so loading it is a memory map instead of parsing a few hundred
+KB of JSON into a dict per import. Words missing from a source (the old 12972 word
+list assets) are NaN.
+
+File layout: a WEIGHTS_HEADER_SIZE header (magic, version, column count, word count,
+word list hash, source hash), one WEIGHTS_NAME_SIZE null padded name per column, then the
+(columns, words) float32 table starting at the next 64 byte boundary. The source
+hash covers the JSON assets the file was built from, so get_weight_table rebuilds it
+when any of them change.
+"""
+import functools
+import hashlib
+import json
+import os
+import struct
+import sys
+from time import perf_counter
+
+import numpy as np
+
+import wordle
+import wordle_utils as utils
+import wordle_words as words
+
+WEIGHTS_PATH = f'.{utils.ASSETS_PATH}/word_weights.bin'
+WEIGHTS_MAGIC = b'WRDLWGT\0'
+WEIGHTS_VERSION = 2
+# magic, version, columns, words, SHA-1 of the word list, SHA-1 of the sources
+WEIGHTS_HEADER_FORMAT = '<8sIII20s20s'
+WEIGHTS_HEADER_SIZE = 64
+WEIGHTS_NAME_SIZE = 32
+WEIGHTS_ALIGN = 64
+
+# Column name -> JSON asset keyed by word or by stringified ALLOWED_WORDS index
+WEIGHT_SOURCES = {
+    'letter_prob': f'.{utils.ASSETS_PATH}/nyt_word_weights_letter_prob.json',
+    'first_guess_info': f'.{utils.ASSETS_PATH}/nyt_first_guess_info.json',
+    'first_guess_info_theory': f'.{utils.ASSETS_PATH}/nyt_first_guess_word_weights_info_theory.json',
+    'first_guess_score': f'.{utils.ASSETS_PATH}/nyt_first_guess_score.json',
+    'old_letter_prob': f'.{utils.ASSETS_PATH}/word_weights_letter_prob.json',
+    'winrate': f'.{utils.ASSETS_PATH}/word_weights_winrate.json'
+}
+
+
+def weights_column(weights: dict) -> np.ndarray:
+    """
+    Align a JSON weight dict to ALLOWED_WORDS order as float32, NaN where missing
+    """
+    column = np.full(len(wordle.ALLOWED_WORDS), np.nan, dtype=np.float32)
+    if not weights:
+        return column
+    if next(iter(weights)).isdigit():
+        idxs = np.fromiter((int(key) for key in weights), dtype=np.int64, count=len(weights))
+    else:
+        word_index = words.get_word_list().get_index()
+        idxs = np.fromiter((word_index.get(word, -1) for word in weights), dtype=np.int64, count=len(weights))
+    values = np.fromiter(weights.values(), dtype=np.float64, count=len(weights))
+    known = idxs >= 0
+    column[idxs[known]] = values[known]
+    return column
+
+
+def sources_hash(sources: dict[str, str] = WEIGHT_SOURCES) -> bytes | None:
+    """
+    SHA-1 of the column names and contents of the JSON assets in sources, None if
+    any of them is missing
+    """
+    digest = hashlib.sha1()
+    for name, source in sources.items():
+        if not os.path.exists(source):
+            return None
+        digest.update(name.encode('ascii') + b'\0')
+        with open(source, 'rb') as file:
+            digest.update(hashlib.sha1(file.read()).digest())
+    return digest.digest()
+
+
+def data_offset(num_columns: int) -> int:
+    """
+    Byte offset of the weight table after the header and column names
+    """
+    names_end = WEIGHTS_HEADER_SIZE + num_columns * WEIGHTS_NAME_SIZE
+    return -(-names_end // WEIGHTS_ALIGN) * WEIGHTS_ALIGN
+
+
+def write_weight_file(path: str, columns: dict[str, np.ndarray], source_hash: bytes = b'') -> str:
+    """
+    Write named (N,) columns to a weight file, replacing path atomically. source_hash
+    identifies what the columns were built from, see sources_hash.
+    """
+    num_words = len(wordle.ALLOWED_WORDS)
+    names = list(columns)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as file:
+        header = struct.pack(WEIGHTS_HEADER_FORMAT, WEIGHTS_MAGIC, WEIGHTS_VERSION, len(names), num_words,
+                             utils.word_list_hash(wordle.ALLOWED_WORDS), source_hash)
+        file.write(header.ljust(WEIGHTS_HEADER_SIZE, b'\0'))
+        for name in names:
+            encoded = name.encode('ascii')
+            if len(encoded) >= WEIGHTS_NAME_SIZE:
+                raise ValueError(f'Weight column name "{name}" is longer than {WEIGHTS_NAME_SIZE - 1} bytes')
+            file.write(encoded.ljust(WEIGHTS_NAME_SIZE, b'\0'))
+        file.write(b'\0' * (data_offset(len(names)) - file.tell()))
+        table = np.stack([np.asarray(columns[name], dtype=np.float32) for name in names])
+        if table.shape != (len(names), num_words):
+            raise ValueError(f'Weight columns are {table.shape[1]} long, expected {num_words}')
+        file.write(table.astype('<f4').tobytes())
+    os.replace(tmp_path, path)
+    return path
+
+
+def build_weight_file(path: str = WEIGHTS_PATH, sources: dict[str, str] = WEIGHT_SOURCES) -> str:
+    """
+    Convert every JSON weight asset in sources into one weight file
+    """
+    columns = {}
+    for name, source in sources.items():
+        with open(source, 'r', encoding='utf-8') as file:
+            columns[name] = weights_column(json.load(file))
+    return write_weight_file(path, columns, sources_hash(sources) or b'')
+
+
+def read_weight_header(path: str = WEIGHTS_PATH) -> dict:
+    """
+    Read and check the header and column names of a weight file
+    """
+    with open(path, 'rb') as file:
+        raw = file.read(WEIGHTS_HEADER_SIZE)
+        if len(raw) != WEIGHTS_HEADER_SIZE:
+            raise ValueError(f'{path} is too short to be a weight file')
+        magic, version, num_columns, num_words, words_hash, source_hash = struct.unpack_from(WEIGHTS_HEADER_FORMAT, raw)
+        if magic != WEIGHTS_MAGIC:
+            raise ValueError(f'{path} is not a weight file')
+        if version != WEIGHTS_VERSION:
+            raise ValueError(f'{path} is weight file version {version}, expected {WEIGHTS_VERSION}')
+        raw_names = file.read(num_columns * WEIGHTS_NAME_SIZE)
+    names = [raw_names[i:i + WEIGHTS_NAME_SIZE].rstrip(b'\0').decode('ascii')
+             for i in range(0, len(raw_names), WEIGHTS_NAME_SIZE)]
+    return {'version': version, 'columns': names, 'words': num_words, 'words_hash': words_hash, 'source_hash': source_hash}
+
+
+def load_weight_table(path: str = WEIGHTS_PATH) -> tuple[list[str], np.memmap]:
+    """
+    Open a weight file read only, returns (column names, (columns, N) float32 table)
+    """
+    header = read_weight_header(path)
+    num_words = len(wordle.ALLOWED_WORDS)
+    if header['words'] != num_words:
+        raise ValueError(f'{path} has {header["words"]} words, expected {num_words}')
+    if header['words_hash'] != utils.word_list_hash(wordle.ALLOWED_WORDS):
+        raise ValueError(f'{path} was built from a different word list, rebuild it with build_weight_file')
+    names = header['columns']
+    table = np.memmap(path, dtype='<f4', mode='r', offset=data_offset(len(names)), shape=(len(names), num_words))
+    return names, table
+
+
+def is_stale(path: str = WEIGHTS_PATH, sources: dict[str, str] = WEIGHT_SOURCES) -> bool:
+    """
+    Whether a weight file is from another version or its sources have changed since it
+    was built. Files can't be stale when the sources aren't there to rebuild from.
+    """
+    current = sources_hash(sources)
+    if current is None:
+        return False
+    try:
+        header = read_weight_header(path)
+    except ValueError:
+        return True
+    return header['source_hash'] != current
+
+
+@functools.cache
+def get_weight_table(path: str = WEIGHTS_PATH) -> tuple[list[str], np.memmap]:
+    """
+    Load the weight table once per process, building it from the JSON assets if it is
+    missing, from an older version or built from assets that have since changed
+    """
+    if not os.path.exists(path):
+        print(f'Building word weights at {path}...')
+        build_weight_file(path)
+    elif is_stale(path):
+        print(f'Rebuilding stale word weights at {path}...')
+        build_weight_file(path)
+    return load_weight_table(path)
+
+
+def get_weights(name: str, path: str = WEIGHTS_PATH) -> np.ndarray:
+    """
+    Get one read only (N,) weight column in ALLOWED_WORDS order
+    """
+    names, table = get_weight_table(path)
+    if name not in names:
+        raise KeyError(f'No "{name}" weights in {path}, expected one of {", ".join(names)}')
+    return table[names.index(name)]
+
+
+def main():
+    """
+    Rebuild the weight file from the JSON assets
+    """
+    path = sys.argv[1] if len(sys.argv) > 1 else WEIGHTS_PATH
+    start = perf_counter()
+    build_weight_file(path)
+    names, _ = load_weight_table(path)
+    print(f'Built {path} with {", ".join(names)} in {round(perf_counter() - start, 2)}s')
+
+
+if __name__ == '__main__':
+    main()
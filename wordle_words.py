@@ -0,0 +1,98 @@
+"""
+Word list registry.
+
+Each word list file is read once per process, the first time something asks for it,
+and every module shares that one WordList. The sorted words, a word -> index map
+and the letter code matrix are each built on first use.
+"""
+import functools
+
+import numpy as np
+
+import wordle_utils as utils
+
+
+class WordList:
+    """
+    A sorted word list and the lookups built from it
+    """
+    __slots__ = ['__path', '__words', '__array', '__index', '__letters']
+
+    def __init__(self, path: str):
+        """
+        Params:
+            path:str - text file with one word per line
+        """
+        self.__path = path
+        self.__words = None
+        self.__array = None
+        self.__index = None
+        self.__letters = None
+
+    def __len__(self) -> int:
+        return len(self.get_words())
+
+    def __contains__(self, word: str) -> bool:
+        return word in self.get_index()
+
+    def get_path(self) -> str:
+        """
+        Get path the words are read from
+        """
+        return self.__path
+
+    def get_words(self) -> list[str]:
+        """
+        Get sorted words, shared by every caller so never modify it
+        """
+        if self.__words is None:
+            with open(self.__path, 'r', encoding='utf-8') as file:
+                self.__words = sorted(word.strip() for word in file if word.strip())
+        return self.__words
+
+    def get_array(self) -> np.ndarray:
+        """
+        Get sorted words as a numpy string array
+        """
+        if self.__array is None:
+            self.__array = np.array(self.get_words())
+        return self.__array
+
+    def get_index(self) -> dict[str, int]:
+        """
+        Get word -> position in get_words() map
+        """
+        if self.__index is None:
+            self.__index = {word: i for i, word in enumerate(self.get_words())}
+        return self.__index
+
+    def index_of(self, word: str) -> int | None:
+        """
+        Get a word's position in get_words(), None if not on the list
+        """
+        return self.get_index().get(word)
+
+    def indexes_of(self, words) -> np.ndarray:
+        """
+        Get positions of every word in words that is on the list
+        """
+        index = self.get_index()
+        return np.fromiter((index[word] for word in words if word in index), dtype=np.int64)
+
+    def get_letters(self) -> np.ndarray:
+        """
+        Get (N, WORD_LEN) uint8 matrix of letter codes, a = 0 to z = 25
+        """
+        if self.__letters is None:
+            raw = np.frombuffer(''.join(self.get_words()).encode('ascii'), dtype=np.uint8)
+            self.__letters = raw.reshape(-1, utils.WORD_LEN) - np.uint8(ord('a'))
+            self.__letters.flags.writeable = False
+        return self.__letters
+
+
+@functools.cache
+def get_word_list(path: str = utils.NEW_ALLOWED_GUESSES_PATH) -> WordList:
+    """
+    Get the shared WordList for path, the NYT allowed guesses by default
+    """
+    return WordList(path)
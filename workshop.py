@@ -3,9 +3,10 @@ import numpy as np
 import json
 import matplotlib.pyplot as plt
 import wordle_utils as utils
+import wordle_patterns as patterns
+import wordle_words as words
 
-with open(utils.NEW_ALLOWED_GUESSES_PATH, 'r', encoding='utf-8') as file:
-    ALLOWED_WORDS = sorted([word.strip() for word in file.readlines()])
+ALLOWED_WORDS = words.get_word_list().get_words()
 
 # words_freq = {}
 # with open('./assets/word_frequencies.txt') as words_f:
@@ -79,19 +80,17 @@ def word_weight(weighted_dict):
 
 
 def patterns_for_word_group(group_num, total_groups, all_patterns: dict):
-    result_patterns = {}
     if group_num == total_groups - 1:
-        word_group = ALLOWED_WORDS[len(ALLOWED_WORDS) // total_groups * group_num:]
+        group_idxs = np.arange(len(ALLOWED_WORDS) // total_groups * group_num, len(ALLOWED_WORDS))
     else:
-        word_group = ALLOWED_WORDS[len(ALLOWED_WORDS) // total_groups * group_num:len(ALLOWED_WORDS) // total_groups * (group_num + 1)]
+        group_idxs = np.arange(len(ALLOWED_WORDS) // total_groups * group_num, len(ALLOWED_WORDS) // total_groups * (group_num + 1))
 
-    for answer in word_group:
-        print(f'[{group_num}] Building patterns for {answer} ({len(result_patterns)}/{len(word_group)})...')
-        patterns = []
-        for first_guess in ALLOWED_WORDS:
-            pattern = wordle.Guess(first_guess, answer).get_score_pattern()
-            patterns.append(pattern)
-        result_patterns[answer] = patterns
+    print(f'[{group_num}] Building patterns for {len(group_idxs)} answers...')
+    # Rows are answers and columns are guesses, same as the old Guess loop
+    codes = patterns.pattern_matrix(np.arange(len(ALLOWED_WORDS)), group_idxs).T
+    result_patterns = {}
+    for answer_idx, row in zip(group_idxs, codes):
+        result_patterns[ALLOWED_WORDS[answer_idx]] = [patterns.ALL_PATTERNS[code] for code in row]
 
     all_patterns[group_num] = result_patterns
 
@@ -152,40 +151,7 @@ def main():
     #
     # with open('./assets/unlimited_word_weights_letter_prob.json', 'w') as file:
     #     json.dump(word_weights, file)
-    # from pickle import dump, load
-    # from multiprocessing import cpu_count, Pool, Manager
-
-    # all_patterns = Manager().dict()
-    # for i in range(cpu_count()):
-    #     all_patterns[i] = {}
-
-    # with Pool(cpu_count()) as p:
-    #     p.starmap(patterns_for_word_group, [(i, cpu_count(), all_patterns) for i in range(cpu_count())])
-
-    # print('Building answer to patterns...')
-    # all_patterns = dict(all_patterns)
-    # answer_to_patterns = {}
-    # for group_num in range(len(all_patterns)):
-    #     print(f'\t [{group_num}] Started...')
-    #     for word in sorted(list(all_patterns[group_num].keys())):
-    #         answer_to_patterns[word] = list(all_patterns[group_num][word])
-
-    # print('Building final patterns list...')
-    # final_patterns_list = []
-    # for answer_word in sorted(list(answer_to_patterns.keys())):
-    #     final_patterns_list.append(answer_to_patterns[answer_word])
-
-    # print('Saving pickled list...')
-    # with open('./assets/patterns.pkl', 'wb') as file:
-    #     dump(final_patterns_list, file)
-    # import sys
-    # with open('./assets/patterns.pkl', 'rb') as file:
-    #     patterns = load(file)
-    #     print(type(patterns))
-    #     print(len(patterns))
-    #     for i in range(14855):
-    #         pattern = patterns[i][i]
-    #         assert pattern == (20, 20, 20, 20, 20)
+    # patterns.build_pattern_file()
     # import json
     # word_weights = None
     # with open('./assets/nyt_first_guess_word_weights_info_theory.json') as file: